@@ -0,0 +1,174 @@
+package benchmarks;
+
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+
+import evaluation.EVEngine;
+import evaluation.GameSettings;
+import evaluation.IterativeEVSolver;
+
+/**
+ * Throughput benchmark and cross-check for {@link IterativeEVSolver} against
+ * the recursive {@link EVEngine}. For each shoe size and scenario, both
+ * calculators evaluate every action from a cold cache; the benchmark reports
+ * the time per evaluation, evaluations per second, and the largest absolute
+ * difference between the two. The engine's results are also checked against
+ * one solver that is reused across every scenario of a shoe size, as the
+ * application reuses it, so that answers from grown tables are covered.
+ *
+ * Usage: {@code java -cp <jar> benchmarks.SolverBenchmark [decks...]}, run
+ * from the directory containing {@code config.yaml}. The recursive engine is
+ * only timed for shoes of {@value #MAX_ENGINE_DECKS} decks or fewer, where it
+ * finishes in reasonable time.
+ */
+public final class SolverBenchmark {
+  private static final int MAX_ENGINE_DECKS = 2;
+  private static final int REPETITIONS = 5;
+  private static final double TOLERANCE = 1e-9;
+  private static final String[] ACTIONS = { "stand", "hit", "double", "split" };
+
+  /** Player hand, dealer hand pairs in engine card values. */
+  private static final int[][][] SCENARIOS = {
+      { { 10, 6 }, { 10 } },
+      { { 10, 2 }, { 4 } },
+      { { 1, 7 }, { 9 } },
+      { { 5, 6 }, { 5 } },
+      { { 8, 8 }, { 10 } },
+      { { 2, 2 }, { 6 } },
+      { { 1, 1 }, { 1 } },
+      { { 9, 9 }, { 7 } },
+  };
+
+  private SolverBenchmark() {
+    throw new UnsupportedOperationException("SolverBenchmark is a utility class and cannot be instantiated");
+  }
+
+  public static void main(String[] args) {
+    int[] deckSizes = args.length > 0 ? Arrays.stream(args).mapToInt(Integer::parseInt).toArray() : new int[] { 1, 2, 6, 8 };
+    GameSettings rules = GameSettings.load("config.yaml");
+    double maxDifference = 0.0;
+    boolean mismatch = false;
+
+    System.out.printf("%-6s %-14s %-8s %14s %14s %14s%n", "decks", "hand", "action", "solver ms", "solver eval/s",
+        "engine ms");
+
+    for (int decks : deckSizes) {
+      IterativeEVSolver shared = new IterativeEVSolver(rules);
+
+      for (int[][] scenario : SCENARIOS) {
+        List<Integer> player = toList(scenario[0]);
+        List<Integer> dealer = toList(scenario[1]);
+        int[] counts = shoe(decks, scenario[0], scenario[1]);
+
+        for (String action : ACTIONS) {
+          long solverNanos = Long.MAX_VALUE;
+          double solverEV = 0.0;
+
+          for (int r = 0; r < REPETITIONS; r++) {
+            IterativeEVSolver solver = new IterativeEVSolver(rules);
+            long start = System.nanoTime();
+            solverEV = evaluate(solver, action, counts, player, dealer);
+            solverNanos = Math.min(solverNanos, System.nanoTime() - start);
+          }
+
+          String engineColumn = "-";
+
+          if (decks <= MAX_ENGINE_DECKS) {
+            EVEngine engine = new EVEngine(rules);
+            long start = System.nanoTime();
+            double engineEV = evaluate(engine, action, counts, player, dealer);
+            long engineNanos = System.nanoTime() - start;
+            engineColumn = String.format("%.3f", engineNanos / 1e6);
+
+            if (!Double.isInfinite(engineEV)) {
+              maxDifference = Math.max(maxDifference, Math.abs(engineEV - solverEV));
+            }
+
+            if (!matches(engineEV, solverEV)) {
+              mismatch = true;
+              System.out.printf("MISMATCH %s vs %s %s: engine=%.12f solver=%.12f%n", player, dealer, action,
+                  engineEV, solverEV);
+            }
+
+            double sharedEV = evaluate(shared, action, counts, player, dealer);
+
+            if (!matches(engineEV, sharedEV)) {
+              mismatch = true;
+              System.out.printf("MISMATCH %s vs %s %s: engine=%.12f reused solver=%.12f%n", player, dealer, action,
+                  engineEV, sharedEV);
+            }
+          }
+
+          System.out.printf("%-6d %-14s %-8s %14.3f %14.1f %14s%n", decks, player + "v" + dealer, action,
+              solverNanos / 1e6, 1e9 / solverNanos, engineColumn);
+        }
+      }
+    }
+
+    System.out.printf("max |engine - solver| = %.3e (tolerance %.0e)%n", maxDifference, TOLERANCE);
+
+    if (mismatch) {
+      System.exit(1);
+    }
+  }
+
+  private static double evaluate(IterativeEVSolver solver, String action, int[] counts, List<Integer> player,
+      List<Integer> dealer) {
+    switch (action) {
+      case "stand":
+        return solver.calculateStandEV(counts, player, dealer);
+      case "hit":
+        return solver.calculateHitEV(counts, player, dealer);
+      case "double":
+        return solver.calculateDoubleEV(counts, player, dealer);
+      default:
+        return solver.calculateSplitEV(counts, player, dealer);
+    }
+  }
+
+  private static double evaluate(EVEngine engine, String action, int[] counts, List<Integer> player,
+      List<Integer> dealer) {
+    switch (action) {
+      case "stand":
+        return engine.calculateStandEV(counts, player, dealer);
+      case "hit":
+        return engine.calculateHitEV(counts, player, dealer);
+      case "double":
+        return engine.calculateDoubleEV(counts, player, dealer);
+      default:
+        return engine.calculateSplitEV(counts, player, dealer);
+    }
+  }
+
+  private static boolean matches(double a, double b) {
+    return (Double.isInfinite(a) && a == b) || Math.abs(a - b) <= TOLERANCE;
+  }
+
+  /**
+   * Builds the composition of a full shoe with the given cards removed.
+   */
+  private static int[] shoe(int decks, int[]... dealt) {
+    int[] counts = new int[IterativeEVSolver.NUM_VALUES];
+    Arrays.fill(counts, 4 * decks);
+    counts[9] = 16 * decks;
+
+    for (int[] hand : dealt) {
+      for (int card : hand) {
+        counts[card - 1]--;
+      }
+    }
+
+    return counts;
+  }
+
+  private static List<Integer> toList(int[] cards) {
+    List<Integer> list = new ArrayList<>();
+
+    for (int card : cards) {
+      list.add(card);
+    }
+
+    return list;
+  }
+}
@@ -0,0 +1,51 @@
+package evaluation;
+
+/**
+ * Read-only statistics exposed by the memoization caches of the EV
+ * calculators, so callers such as the Python wrapper can report cache usage
+ * without depending on a particular cache implementation.
+ */
+public interface CacheStats {
+  /**
+   * @return The number of states currently cached.
+   */
+  int size();
+
+  /**
+   * @return The maximum number of states the cache will hold.
+   */
+  int getCapacity();
+
+  /**
+   * @return The approximate heap footprint of the cached states in bytes.
+   */
+  long getEstimatedBytes();
+
+  /**
+   * @return The number of lookups that found a cached state.
+   */
+  long getHits();
+
+  /**
+   * @return The number of lookups that missed.
+   */
+  long getMisses();
+
+  /**
+   * @return The number of states evicted to respect the size limits.
+   */
+  long getEvictions();
+
+  /**
+   * @return The number of states removed by pruning or clearing.
+   */
+  long getPruned();
+
+  /**
+   * @return The fraction of lookups that hit, or {@code 0.0} before any lookup.
+   */
+  default double getHitRate() {
+    long lookups = getHits() + getMisses();
+    return lookups > 0 ? (double) getHits() / lookups : 0.0;
+  }
+}
@@ -0,0 +1,184 @@
+package evaluation;
+
+import java.util.Iterator;
+import java.util.LinkedHashMap;
+import java.util.Map;
+
+/**
+ * A bounded memoization cache for {@link EVEngine} states. Entries are kept
+ * in least-recently-used order and evicted once the configured entry count or
+ * estimated byte budget is exceeded. Because cards are only ever removed
+ * within a shoe, the cache can also be pruned of every state whose
+ * composition holds more of any value than the current deck, since those
+ * states can never be reached again.
+ */
+public class EVCache implements CacheStats {
+  /**
+   * Approximate heap footprint of one entry: the {@link StateKey} and its
+   * copied count array, the boxed {@link Double}, and the linked map entry.
+   */
+  public static final long ESTIMATED_ENTRY_BYTES = 160L;
+
+  public static final int DEFAULT_MAX_ENTRIES = 2_000_000;
+  public static final long DEFAULT_MAX_BYTES = 512L * 1024L * 1024L;
+
+  private final LinkedHashMap<StateKey, Double> entries;
+  private final int capacity;
+
+  private long hits;
+  private long misses;
+  private long evictions;
+  private long pruned;
+
+  /**
+   * Constructs a cache with the default entry and byte limits.
+   */
+  public EVCache() {
+    this(DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES);
+  }
+
+  /**
+   * Constructs a cache bounded by both an entry count and a byte budget; the
+   * tighter of the two limits applies.
+   *
+   * @param maxEntries The maximum number of cached states.
+   * @param maxBytes   The approximate maximum heap size of the cache in bytes.
+   * @throws IllegalArgumentException if either limit is not positive.
+   */
+  public EVCache(int maxEntries, long maxBytes) {
+    if (maxEntries <= 0 || maxBytes <= 0) {
+      throw new IllegalArgumentException(
+          "Cache limits must be positive: maxEntries=" + maxEntries + ", maxBytes=" + maxBytes);
+    }
+
+    this.capacity = (int) Math.max(1L, Math.min(maxEntries, maxBytes / ESTIMATED_ENTRY_BYTES));
+    this.entries = new LinkedHashMap<StateKey, Double>(16, 0.75f, true) {
+      private static final long serialVersionUID = 1L;
+
+      @Override
+      protected boolean removeEldestEntry(Map.Entry<StateKey, Double> eldest) {
+        if (size() > capacity) {
+          evictions++;
+          return true;
+        }
+
+        return false;
+      }
+    };
+  }
+
+  /**
+   * Looks up a cached EV and records the hit or miss.
+   *
+   * @param key The state to look up.
+   * @return The cached EV, or {@code null} if the state is not cached.
+   */
+  public Double get(StateKey key) {
+    Double value = entries.get(key);
+
+    if (value != null) {
+      hits++;
+    } else {
+      misses++;
+    }
+
+    return value;
+  }
+
+  /**
+   * Stores an EV, evicting the least recently used state if the cache is full.
+   *
+   * @param key   The state being cached.
+   * @param value The EV of the state.
+   */
+  public void put(StateKey key, double value) {
+    entries.put(key, value);
+  }
+
+  /**
+   * Removes every state that cannot be reached from the given deck, i.e. every
+   * state whose composition holds more of some value than the deck does.
+   *
+   * @param valueCounts The current distribution of card values in the deck.
+   * @return The number of states removed.
+   */
+  public int prune(int[] valueCounts) {
+    int removed = 0;
+    Iterator<StateKey> it = entries.keySet().iterator();
+
+    while (it.hasNext()) {
+      if (!it.next().isReachableFrom(valueCounts)) {
+        it.remove();
+        removed++;
+      }
+    }
+
+    pruned += removed;
+    return removed;
+  }
+
+  /**
+   * Removes every cached state, e.g. when the shoe is reshuffled.
+   */
+  public void clear() {
+    pruned += entries.size();
+    entries.clear();
+  }
+
+  /**
+   * @return The number of states currently cached.
+   */
+  @Override
+  public int size() {
+    return entries.size();
+  }
+
+  /**
+   * @return The effective maximum number of states, after applying the byte
+   *         budget.
+   */
+  @Override
+  public int getCapacity() {
+    return capacity;
+  }
+
+  /**
+   * @return The approximate heap footprint of the cached states in bytes.
+   */
+  @Override
+  public long getEstimatedBytes() {
+    return entries.size() * ESTIMATED_ENTRY_BYTES;
+  }
+
+  /**
+   * @return The number of lookups that found a cached state.
+   */
+  @Override
+  public long getHits() {
+    return hits;
+  }
+
+  /**
+   * @return The number of lookups that missed.
+   */
+  @Override
+  public long getMisses() {
+    return misses;
+  }
+
+  /**
+   * @return The number of states evicted to respect the size limits.
+   */
+  @Override
+  public long getEvictions() {
+    return evictions;
+  }
+
+  /**
+   * @return The number of states removed by pruning or clearing.
+   */
+  @Override
+  public long getPruned() {
+    return pruned;
+  }
+}
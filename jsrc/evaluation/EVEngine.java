@@ -8,16 +8,62 @@ import java.util.Map;
  * Represents an engine for calculating the expected values (EV) of various
  * actions in a blackjack game. The EV represents the average outcome of a
  * decision over many iterations. This class uses memoization to cache results
- * and optimize recursive EV calculations.
+ * and optimize recursive EV calculations; the cache is bounded and can be
+ * pruned as the shoe is dealt.
+ *
+ * Rules are supplied per instance as a default {@link GameSettings}, and may
+ * be overridden per call. Each distinct rule set gets its own cache
+ * namespace, so a single engine can serve tables with different rules.
  */
 public class EVEngine {
-  private Map<StateKey, Double> cache;
+  private final GameSettings defaultRules;
+  private final int maxCacheEntries;
+  private final long maxCacheBytes;
+  private final Map<GameSettings, EVCache> caches;
+
+  // Rules and cache of the calculation in progress
+  private GameSettings rules;
+  private EVCache cache;
 
   /**
-   * Constructs an EVEngine instance and initializes the cache.
+   * Constructs an EVEngine instance using the rules in {@code config.yaml} in
+   * the working directory and the default cache limits.
    */
   public EVEngine() {
-    this.cache = new HashMap<>();
+    this(GameSettings.load("config.yaml"));
+  }
+
+  /**
+   * Constructs an EVEngine instance with the given default rules and the
+   * default cache limits.
+   *
+   * @param rules The rules applied when a call does not supply its own.
+   */
+  public EVEngine(GameSettings rules) {
+    this(rules, EVCache.DEFAULT_MAX_ENTRIES, EVCache.DEFAULT_MAX_BYTES);
+  }
+
+  /**
+   * Constructs an EVEngine instance with the given default rules and a cache
+   * per rule set bounded by the given limits.
+   *
+   * @param rules           The rules applied when a call does not supply its
+   *                        own.
+   * @param maxCacheEntries The maximum number of cached states per rule set.
+   * @param maxCacheBytes   The approximate maximum heap size of the cache per
+   *                        rule set in bytes.
+   * @throws IllegalArgumentException if {@code rules} is {@code null}.
+   */
+  public EVEngine(GameSettings rules, int maxCacheEntries, long maxCacheBytes) {
+    if (rules == null) {
+      throw new IllegalArgumentException("Argument to EVEngine cannot be null: rules is required");
+    }
+
+    this.defaultRules = rules;
+    this.maxCacheEntries = maxCacheEntries;
+    this.maxCacheBytes = maxCacheBytes;
+    this.caches = new HashMap<>();
+    select(rules);
   }
 
   // ------------------------------------------------------------------------
@@ -25,7 +71,8 @@ public class EVEngine {
   // ------------------------------------------------------------------------
 
   /**
-   * Calculates the expected value when the player chooses to stand.
+   * Calculates the expected value when the player chooses to stand, under
+   * the engine's default rules.
    *
    * @param valueCounts An array representing the current distribution of card
    *                    values in the deck.
@@ -35,16 +82,35 @@ public class EVEngine {
    * @throws IllegalArgumentException if any of the arguments are {@code null}.
    */
   public double calculateStandEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
-    if (valueCounts == null || playerHand == null || dealerHand == null) {
+    return calculateStandEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to stand.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for standing.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}.
+   */
+  public double calculateStandEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
       throw new IllegalArgumentException(
-          "Arguments to calculateStandEV cannot be null: valueCounts, playerHand, and dealerHand are required");
+          "Arguments to calculateStandEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
     }
 
+    select(rules);
+
     return calculateStandEV(valueCounts, playerHand, dealerHand, false);
   }
 
   /**
-   * Calculates the expected value when the player chooses to hit.
+   * Calculates the expected value when the player chooses to hit, under
+   * the engine's default rules.
    *
    * @param valueCounts An array representing the current distribution of card
    *                    values in the deck.
@@ -54,16 +120,35 @@ public class EVEngine {
    * @throws IllegalArgumentException if any of the arguments are {@code null}.
    */
   public double calculateHitEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
-    if (valueCounts == null || playerHand == null || dealerHand == null) {
+    return calculateHitEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to hit.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for hitting.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}.
+   */
+  public double calculateHitEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
       throw new IllegalArgumentException(
-          "Arguments to calculateHitEV cannot be null: valueCounts, playerHand, and dealerHand are required");
+          "Arguments to calculateHitEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
     }
 
+    select(rules);
+
     return calculateHitEV(valueCounts, playerHand, dealerHand, false);
   }
 
   /**
-   * Calculates the expected value when the player chooses to double.
+   * Calculates the expected value when the player chooses to double, under
+   * the engine's default rules.
    *
    * @param valueCounts An array representing the current distribution of card
    *                    values in the deck.
@@ -73,16 +158,35 @@ public class EVEngine {
    * @throws IllegalArgumentException if any of the arguments are {@code null}.
    */
   public double calculateDoubleEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
-    if (valueCounts == null || playerHand == null || dealerHand == null) {
+    return calculateDoubleEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to double.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for doubling.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}.
+   */
+  public double calculateDoubleEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
       throw new IllegalArgumentException(
-          "Arguments to calculateDoubleEV cannot be null: valueCounts, playerHand, and dealerHand are required");
+          "Arguments to calculateDoubleEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
     }
 
+    select(rules);
+
     return calculateDoubleEV(valueCounts, playerHand, dealerHand, false);
   }
 
   /**
-   * Calculates the expected value when the player chooses to split.
+   * Calculates the expected value when the player chooses to split, under
+   * the engine's default rules.
    *
    * @param valueCounts An array representing the current distribution of card
    *                    values in the deck.
@@ -94,11 +198,31 @@ public class EVEngine {
    *                                  split.
    */
   public double calculateSplitEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
-    if (valueCounts == null || playerHand == null || dealerHand == null) {
+    return calculateSplitEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to split.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for splitting.
+   * @throws IllegalArgumentException if any of the arguments are {@code null} or
+   *                                  if the player's hand cannot be
+   *                                  split.
+   */
+  public double calculateSplitEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
       throw new IllegalArgumentException(
-          "Arguments to calculateSplitEV cannot be null: valueCounts, playerHand, and dealerHand are required");
+          "Arguments to calculateSplitEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
     }
 
+    select(rules);
+
     if (!canSplitHand(playerHand)) {
       return Double.NEGATIVE_INFINITY;
     }
@@ -106,6 +230,107 @@ public class EVEngine {
     return calculateSplitEV(valueCounts, playerHand, dealerHand, true);
   }
 
+  // ------------------------------------------------------------------------
+  // Cache Management Methods
+  // ------------------------------------------------------------------------
+
+  /**
+   * Notifies the engine that cards have been dealt from the shoe, pruning every
+   * state that can no longer be reached from the cache of the given rules.
+   *
+   * @param rules       The rules whose cache namespace is pruned.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @return The number of cached states removed.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}.
+   */
+  public int onDeckUpdated(GameSettings rules, int[] valueCounts) {
+    if (rules == null || valueCounts == null) {
+      throw new IllegalArgumentException("Arguments to onDeckUpdated cannot be null: rules and valueCounts are required");
+    }
+
+    return cacheFor(rules).prune(valueCounts);
+  }
+
+  /**
+   * Notifies the engine that cards have been dealt from the shoe, pruning the
+   * cache of the engine's default rules.
+   *
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @return The number of cached states removed.
+   * @throws IllegalArgumentException if {@code valueCounts} is {@code null}.
+   */
+  public int onDeckUpdated(int[] valueCounts) {
+    return onDeckUpdated(defaultRules, valueCounts);
+  }
+
+  /**
+   * Notifies the engine that the shoe has been reshuffled, clearing the cache of
+   * the given rules.
+   *
+   * @param rules The rules whose cache namespace is cleared.
+   */
+  public void onReshuffle(GameSettings rules) {
+    cacheFor(rules).clear();
+  }
+
+  /**
+   * Notifies the engine that the shoe has been reshuffled, clearing the cache of
+   * the engine's default rules.
+   */
+  public void onReshuffle() {
+    onReshuffle(defaultRules);
+  }
+
+  /**
+   * Returns the cache used for the given rules, for reading its statistics.
+   *
+   * @param rules The rules whose cache is returned.
+   * @return The cache namespace of the rules.
+   */
+  public EVCache getCache(GameSettings rules) {
+    return cacheFor(rules);
+  }
+
+  /**
+   * Returns the cache used for the engine's default rules, for reading its
+   * statistics.
+   *
+   * @return The engine's default cache.
+   */
+  public EVCache getCache() {
+    return getCache(defaultRules);
+  }
+
+  /**
+   * @return The rules applied when a call does not supply its own.
+   */
+  public GameSettings getDefaultRules() {
+    return defaultRules;
+  }
+
+  /**
+   * Makes the given rules and their cache namespace current for the calculation
+   * about to run.
+   *
+   * @param rules The rules to evaluate under.
+   */
+  private void select(GameSettings rules) {
+    this.rules = rules;
+    this.cache = cacheFor(rules);
+  }
+
+  /**
+   * Returns the cache namespace of the given rules, creating it on first use.
+   *
+   * @param rules The rules whose cache is returned.
+   * @return The cache namespace of the rules.
+   */
+  private EVCache cacheFor(GameSettings rules) {
+    return caches.computeIfAbsent(rules, r -> new EVCache(maxCacheEntries, maxCacheBytes));
+  }
+
   // ------------------------------------------------------------------------
   // Private Recursive Calculation Methods
   // ------------------------------------------------------------------------
@@ -125,14 +350,16 @@ public class EVEngine {
       boolean isSplit) {
     StateKey stateKey = getStateKey(valueCounts, playerHand, dealerHand, isSplit, "stand");
 
-    if (cache.containsKey(stateKey)) {
-      return cache.get(stateKey);
+    Double cached = cache.get(stateKey);
+
+    if (cached != null) {
+      return cached;
     }
 
     int dealerScore = calculateHandScore(dealerHand);
     boolean isSoft = isSoftHand(dealerHand);
 
-    if (dealerScore > 17 || (dealerScore == 17 && (!isSoft || (isSoft && !GameSettings.DEALER_HITS_ON_SOFT_17)))) {
+    if (dealerScore > 17 || (dealerScore == 17 && (!isSoft || (isSoft && !rules.dealerHitsOnSoft17())))) {
       double outcome = evaluateOutcome(playerHand, dealerHand, isSplit);
       cache.put(stateKey, outcome);
 
@@ -144,7 +371,7 @@ public class EVEngine {
 
     for (int i = 0; i < valueCounts.length; i++) {
       if (valueCounts[i] > 0) {
-        if (GameSettings.DEALER_PEAKS_FOR_21 && dealerHand.size() == 1 &&
+        if (rules.dealerPeeksFor21() && dealerHand.size() == 1 &&
             ((dealerHand.get(0) == 10 && i == 0) || (dealerHand.get(0) == 1 && i == 9))) {
           continue;
         }
@@ -185,8 +412,10 @@ public class EVEngine {
       boolean isSplit) {
     StateKey stateKey = getStateKey(valueCounts, playerHand, dealerHand, isSplit, "hit");
 
-    if (cache.containsKey(stateKey)) {
-      return cache.get(stateKey);
+    Double cached = cache.get(stateKey);
+
+    if (cached != null) {
+      return cached;
     }
 
     double totalValue = 0.0;
@@ -236,8 +465,10 @@ public class EVEngine {
       boolean isSplit) {
     StateKey stateKey = getStateKey(valueCounts, playerHand, dealerHand, isSplit, "double");
 
-    if (cache.containsKey(stateKey)) {
-      return cache.get(stateKey);
+    Double cached = cache.get(stateKey);
+
+    if (cached != null) {
+      return cached;
     }
 
     double totalValue = 0.0;
@@ -287,8 +518,10 @@ public class EVEngine {
       boolean isSplit) {
     StateKey stateKey = getStateKey(valueCounts, playerHand, dealerHand, true, "split");
 
-    if (cache.containsKey(stateKey)) {
-      return cache.get(stateKey);
+    Double cached = cache.get(stateKey);
+
+    if (cached != null) {
+      return cached;
     }
 
     int splitCard = playerHand.get(0);
@@ -312,12 +545,12 @@ public class EVEngine {
         double hitEV = Double.NEGATIVE_INFINITY;
         double doubleEV = Double.NEGATIVE_INFINITY;
 
-        if (isAceSplit && GameSettings.HIT_SPLIT_ACES || !isAceSplit) {
+        if (isAceSplit && rules.hitSplitAces() || !isAceSplit) {
           hitEV = calculateHitEV(valueCounts, playerHand, dealerHand, true);
         }
 
-        if (GameSettings.DOUBLE_AFTER_SPLIT
-            && ((isAceSplit && GameSettings.HIT_SPLIT_ACES && GameSettings.DOUBLE_SPLIT_ACES) || !isAceSplit)) {
+        if (rules.doubleAfterSplit()
+            && ((isAceSplit && rules.hitSplitAces() && rules.doubleSplitAces()) || !isAceSplit)) {
           doubleEV = calculateDoubleEV(valueCounts, playerHand, dealerHand, true);
         }
 
@@ -433,13 +666,13 @@ public class EVEngine {
     int dealerHandSize = dealerHand.size();
 
     boolean playerNaturalBlackjack = playerScore == 21 && playerHandSize == 2
-        && (!isSplit || GameSettings.NATURAL_BLACKJACK_SPLITS);
+        && (!isSplit || rules.naturalBlackjackSplits());
     boolean dealerNaturalBlackjack = dealerScore == 21 && dealerHandSize == 2;
 
     if (playerNaturalBlackjack && dealerNaturalBlackjack) {
       return 0.0;
     } else if (playerNaturalBlackjack) {
-      return GameSettings.BLACKJACK_ODDS;
+      return rules.getBlackjackOdds();
     } else if (dealerNaturalBlackjack) {
       return -1.0;
     } else if (playerScore > 21) {
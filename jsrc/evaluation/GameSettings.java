@@ -4,46 +4,150 @@ import java.io.FileInputStream;
 import java.io.IOException;
 import java.io.InputStream;
 import java.util.Map;
+import java.util.Objects;
 
 import org.yaml.snakeyaml.Yaml;
 
+/**
+ * An immutable set of table rules. Each EV calculator is constructed with a
+ * default rule set and can also be handed a rule set per call, so one JVM can
+ * evaluate tables with different rules. Rule sets compare by value and are
+ * used to namespace the calculators' caches.
+ */
 public final class GameSettings {
-  public static final double BLACKJACK_ODDS;
-  public static final boolean CAN_SURRENDER;
-  public static final boolean DEALER_HITS_ON_SOFT_17;
-  public static final boolean DEALER_PEAKS_FOR_21;
-  public static final boolean NATURAL_BLACKJACK_SPLITS;
-  public static final boolean DOUBLE_AFTER_SPLIT;
-  public static final boolean HIT_SPLIT_ACES;
-  public static final boolean DOUBLE_SPLIT_ACES;
-
-  static {
+  private final double blackjackOdds;
+  private final boolean canSurrender;
+  private final boolean dealerHitsOnSoft17;
+  private final boolean dealerPeeksFor21;
+  private final boolean naturalBlackjackSplits;
+  private final boolean doubleAfterSplit;
+  private final boolean hitSplitAces;
+  private final boolean doubleSplitAces;
+
+  /**
+   * Constructs a rule set.
+   *
+   * @param blackjackOdds          Payout multiplier for a natural blackjack.
+   * @param canSurrender           Whether surrender is allowed.
+   * @param dealerHitsOnSoft17     Whether the dealer hits on soft 17.
+   * @param dealerPeeksFor21       Whether the dealer peeks for blackjack.
+   * @param naturalBlackjackSplits Whether a split natural counts as blackjack.
+   * @param doubleAfterSplit       Whether doubling is allowed after splitting.
+   * @param hitSplitAces           Whether split aces may be hit.
+   * @param doubleSplitAces        Whether split aces may be doubled.
+   */
+  public GameSettings(double blackjackOdds, boolean canSurrender, boolean dealerHitsOnSoft17,
+      boolean dealerPeeksFor21, boolean naturalBlackjackSplits, boolean doubleAfterSplit, boolean hitSplitAces,
+      boolean doubleSplitAces) {
+    this.blackjackOdds = blackjackOdds;
+    this.canSurrender = canSurrender;
+    this.dealerHitsOnSoft17 = dealerHitsOnSoft17;
+    this.dealerPeeksFor21 = dealerPeeksFor21;
+    this.naturalBlackjackSplits = naturalBlackjackSplits;
+    this.doubleAfterSplit = doubleAfterSplit;
+    this.hitSplitAces = hitSplitAces;
+    this.doubleSplitAces = doubleSplitAces;
+  }
+
+  /**
+   * Loads a rule set from the {@code game_settings} section of a YAML
+   * configuration file.
+   *
+   * @param path The path of the configuration file.
+   * @return The rule set described by the file.
+   * @throws IllegalArgumentException if the file cannot be read or parsed.
+   */
+  public static GameSettings load(String path) {
     Yaml yaml = new Yaml();
 
-    try (InputStream in = new FileInputStream("config.yaml")) {
+    try (InputStream in = new FileInputStream(path)) {
       Map<String, Object> config = yaml.load(in);
       @SuppressWarnings("unchecked")
       Map<String, Object> gameSettings = (Map<String, Object>) config.get("game_settings");
 
-      BLACKJACK_ODDS = ((Number) gameSettings.get("blackjack_odds")).doubleValue();
-
-      CAN_SURRENDER = (Boolean) gameSettings.get("can_surrender");
-
-      DEALER_HITS_ON_SOFT_17 = (Boolean) gameSettings.get("dealer_hits_on_soft_17");
-      DEALER_PEAKS_FOR_21 = (Boolean) gameSettings.get("dealer_peaks_for_21");
-
-      NATURAL_BLACKJACK_SPLITS = (Boolean) gameSettings.get("natural_blackjack_splits");
-      DOUBLE_AFTER_SPLIT = (Boolean) gameSettings.get("double_after_split");
-      HIT_SPLIT_ACES = (Boolean) gameSettings.get("hit_split_aces");
-      DOUBLE_SPLIT_ACES = (Boolean) gameSettings.get("double_split_aces");
+      return new GameSettings(
+          ((Number) gameSettings.get("blackjack_odds")).doubleValue(),
+          (Boolean) gameSettings.get("can_surrender"),
+          (Boolean) gameSettings.get("dealer_hits_on_soft_17"),
+          (Boolean) gameSettings.get("dealer_peaks_for_21"),
+          (Boolean) gameSettings.get("natural_blackjack_splits"),
+          (Boolean) gameSettings.get("double_after_split"),
+          (Boolean) gameSettings.get("hit_split_aces"),
+          (Boolean) gameSettings.get("double_split_aces"));
     } catch (IOException e) {
-      throw new ExceptionInInitializerError("Failed to load config.yaml: " + e.getMessage());
+      throw new IllegalArgumentException("Failed to load " + path + ": " + e.getMessage(), e);
     } catch (Exception e) {
-      throw new ExceptionInInitializerError("Failed to parse config.yaml: " + e.getMessage());
+      throw new IllegalArgumentException("Failed to parse " + path + ": " + e.getMessage(), e);
     }
   }
 
-  private GameSettings() {
-    throw new UnsupportedOperationException("GameSettings is a utility class and cannot be instantiated");
+  public double getBlackjackOdds() {
+    return blackjackOdds;
+  }
+
+  public boolean canSurrender() {
+    return canSurrender;
+  }
+
+  public boolean dealerHitsOnSoft17() {
+    return dealerHitsOnSoft17;
+  }
+
+  public boolean dealerPeeksFor21() {
+    return dealerPeeksFor21;
+  }
+
+  public boolean naturalBlackjackSplits() {
+    return naturalBlackjackSplits;
+  }
+
+  public boolean doubleAfterSplit() {
+    return doubleAfterSplit;
+  }
+
+  public boolean hitSplitAces() {
+    return hitSplitAces;
+  }
+
+  public boolean doubleSplitAces() {
+    return doubleSplitAces;
+  }
+
+  @Override
+  public boolean equals(Object o) {
+    if (this == o)
+      return true;
+
+    if (!(o instanceof GameSettings))
+      return false;
+
+    GameSettings rules = (GameSettings) o;
+
+    return Double.compare(blackjackOdds, rules.blackjackOdds) == 0 &&
+        canSurrender == rules.canSurrender &&
+        dealerHitsOnSoft17 == rules.dealerHitsOnSoft17 &&
+        dealerPeeksFor21 == rules.dealerPeeksFor21 &&
+        naturalBlackjackSplits == rules.naturalBlackjackSplits &&
+        doubleAfterSplit == rules.doubleAfterSplit &&
+        hitSplitAces == rules.hitSplitAces &&
+        doubleSplitAces == rules.doubleSplitAces;
+  }
+
+  @Override
+  public int hashCode() {
+    return Objects.hash(blackjackOdds, canSurrender, dealerHitsOnSoft17, dealerPeeksFor21, naturalBlackjackSplits,
+        doubleAfterSplit, hitSplitAces, doubleSplitAces);
+  }
+
+  @Override
+  public String toString() {
+    return "GameSettings{blackjackOdds=" + blackjackOdds +
+        ", canSurrender=" + canSurrender +
+        ", dealerHitsOnSoft17=" + dealerHitsOnSoft17 +
+        ", dealerPeeksFor21=" + dealerPeeksFor21 +
+        ", naturalBlackjackSplits=" + naturalBlackjackSplits +
+        ", doubleAfterSplit=" + doubleAfterSplit +
+        ", hitSplitAces=" + hitSplitAces +
+        ", doubleSplitAces=" + doubleSplitAces + "}";
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,871 @@
+package evaluation;
+
+import java.util.HashMap;
+import java.util.List;
+import java.util.Map;
+
+/**
+ * An EV calculator with the same public API as {@link EVEngine}, built for
+ * throughput. Hands are packed into primitive states (hard total, ace flag,
+ * capped card count) and the split pair is carried as a single card value,
+ * so no boxed lists are touched below the public entry points.
+ *
+ * Standing is evaluated bottom-up: for a given composition and dealer hand
+ * the solver computes the distribution of dealer final totals (17-21, bust,
+ * natural) once, and every player total is then scored against it. Hitting
+ * and the dealer's draws are walked with explicit frame stacks rather than
+ * recursion, and intermediate results are memoized in open-addressing tables
+ * keyed by a packed composition. As with {@link EVEngine}, rules are given per
+ * instance and may be overridden per call, with memo tables namespaced by rule
+ * set.
+ */
+public class IterativeEVSolver {
+  public static final int NUM_VALUES = 10;
+
+  /**
+   * Approximate heap footprint of one memo entry at the tables' maximum load:
+   * two slots of packed key plus a dealer distribution record.
+   */
+  public static final long ESTIMATED_ENTRY_BYTES = 2L * (Long.BYTES + Integer.BYTES + 7L * Double.BYTES);
+
+  // ------------------------------------------------------------------------
+  // Packed Encodings
+  // ------------------------------------------------------------------------
+
+  /** Card value drawn for each value index (A, 2-9, 10-valued). */
+  private static final int[] CARD_VALUES = { 1, 2, 3, 4, 5, 6, 7, 8, 9, 10 };
+
+  /** Bit offset of each value's count within a packed composition. */
+  private static final int[] SHIFTS = { 0, 6, 12, 18, 24, 30, 36, 42, 48, 54 };
+
+  /** Largest count each value can hold within a packed composition. */
+  private static final int[] MAX_COUNTS = { 63, 63, 63, 63, 63, 63, 63, 63, 63, 255 };
+
+  /** Amount subtracted from a packed composition when a value is drawn. */
+  private static final long[] UNITS = new long[NUM_VALUES];
+
+  static {
+    for (int i = 0; i < NUM_VALUES; i++) {
+      UNITS[i] = 1L << SHIFTS[i];
+    }
+  }
+
+  private static final int MAX_BASE = 31;
+  private static final int ACE_BIT = 1 << 5;
+  private static final int COUNT_SHIFT = 6;
+  private static final int SPLIT_BIT = 1 << 16;
+
+  /** Indices of the dealer final-outcome distribution. */
+  private static final int OUTCOME_BUST = 5;
+  private static final int OUTCOME_NATURAL = 6;
+  private static final int DIST_WIDTH = 7;
+
+  private static final int MAX_DEPTH = 32;
+
+  // ------------------------------------------------------------------------
+  // State
+  // ------------------------------------------------------------------------
+
+  private final GameSettings defaultRules;
+  private final int tableCapacity;
+  private final Map<GameSettings, Namespace> namespaces = new HashMap<>();
+  private final int[] work = new int[NUM_VALUES];
+
+  // Rules and memo tables of the calculation in progress
+  private GameSettings rules;
+  private SolverTable dealerTable;
+  private SolverTable hitTable;
+
+  // Frame stack for the player's hit tree
+  private final long[] hitComp = new long[MAX_DEPTH];
+  private final int[] hitState = new int[MAX_DEPTH];
+  private final int[] hitNext = new int[MAX_DEPTH];
+  private final int[] hitDrawn = new int[MAX_DEPTH];
+  private final int[] hitWeight = new int[MAX_DEPTH];
+  private final int[] hitCards = new int[MAX_DEPTH];
+  private final double[] hitValue = new double[MAX_DEPTH];
+  private final double[] hitStand = new double[MAX_DEPTH];
+
+  // Frame stack for the dealer's draw tree
+  private final long[] dealerComp = new long[MAX_DEPTH];
+  private final int[] dealerState = new int[MAX_DEPTH];
+  private final int[] dealerNext = new int[MAX_DEPTH];
+  private final int[] dealerDrawn = new int[MAX_DEPTH];
+  private final int[] dealerWeight = new int[MAX_DEPTH];
+  private final int[] dealerCards = new int[MAX_DEPTH];
+  private final double[] dealerAcc = new double[MAX_DEPTH * DIST_WIDTH];
+
+  /**
+   * Constructs a solver using the rules in {@code config.yaml} in the working
+   * directory and the same default cache limits as {@link EVEngine}.
+   */
+  public IterativeEVSolver() {
+    this(GameSettings.load("config.yaml"));
+  }
+
+  /**
+   * Constructs a solver with the given default rules and the same default
+   * cache limits as {@link EVEngine}.
+   *
+   * @param rules The rules applied when a call does not supply its own.
+   */
+  public IterativeEVSolver(GameSettings rules) {
+    this(rules, EVCache.DEFAULT_MAX_ENTRIES, EVCache.DEFAULT_MAX_BYTES);
+  }
+
+  /**
+   * Constructs a solver with the given default rules, whose memo tables are
+   * bounded per rule set by both an entry count and a byte budget; the
+   * tighter of the two limits applies, split evenly between the dealer and hit
+   * tables. A full table is flushed.
+   *
+   * @param rules      The rules applied when a call does not supply its own.
+   * @param maxEntries The maximum number of memoized states per rule set.
+   * @param maxBytes   The approximate maximum heap size of the memo tables per
+   *                   rule set in bytes.
+   * @throws IllegalArgumentException if {@code rules} is {@code null} or either
+   *                                  limit is not positive.
+   */
+  public IterativeEVSolver(GameSettings rules, int maxEntries, long maxBytes) {
+    if (rules == null) {
+      throw new IllegalArgumentException("Argument to IterativeEVSolver cannot be null: rules is required");
+    }
+
+    if (maxEntries <= 0 || maxBytes <= 0) {
+      throw new IllegalArgumentException(
+          "Cache limits must be positive: maxEntries=" + maxEntries + ", maxBytes=" + maxBytes);
+    }
+
+    this.defaultRules = rules;
+    this.tableCapacity = (int) Math.max(1L, Math.min(maxEntries, maxBytes / ESTIMATED_ENTRY_BYTES) / 2);
+    select(rules);
+  }
+
+  // ------------------------------------------------------------------------
+  // Public API Methods
+  // ------------------------------------------------------------------------
+
+  /**
+   * Calculates the expected value when the player chooses to stand, under
+   * the solver's default rules.
+   *
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for standing.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateStandEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
+    return calculateStandEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to stand.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for standing.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateStandEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
+      throw new IllegalArgumentException(
+          "Arguments to calculateStandEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
+    }
+
+    select(rules);
+
+    long comp = load(valueCounts);
+    return standEV(comp, encodeHand(playerHand), encodeHand(dealerHand), false);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to hit, under
+   * the solver's default rules.
+   *
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for hitting.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateHitEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
+    return calculateHitEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to hit.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for hitting.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateHitEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
+      throw new IllegalArgumentException(
+          "Arguments to calculateHitEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
+    }
+
+    select(rules);
+
+    long comp = load(valueCounts);
+    return hitEV(comp, encodeHand(playerHand), encodeHand(dealerHand), false);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to double, under
+   * the solver's default rules.
+   *
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for doubling.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateDoubleEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
+    return calculateDoubleEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to double.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's current hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for doubling.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateDoubleEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
+      throw new IllegalArgumentException(
+          "Arguments to calculateDoubleEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
+    }
+
+    select(rules);
+
+    long comp = load(valueCounts);
+    return doubleEV(comp, encodeHand(playerHand), encodeHand(dealerHand), false);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to split, under
+   * the solver's default rules.
+   *
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for splitting, or negative infinity if the
+   *         hand is not a pair.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateSplitEV(int[] valueCounts, List<Integer> playerHand, List<Integer> dealerHand) {
+    return calculateSplitEV(defaultRules, valueCounts, playerHand, dealerHand);
+  }
+
+  /**
+   * Calculates the expected value when the player chooses to split.
+   *
+   * @param rules       The rules to evaluate under.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @param playerHand  A list of integers representing the player's hand.
+   * @param dealerHand  A list of integers representing the dealer's current hand.
+   * @return The expected value (EV) for splitting, or negative infinity if the
+   *         hand is not a pair.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}
+   *                                  or the composition cannot be packed.
+   */
+  public double calculateSplitEV(GameSettings rules, int[] valueCounts, List<Integer> playerHand,
+      List<Integer> dealerHand) {
+    if (rules == null || valueCounts == null || playerHand == null || dealerHand == null) {
+      throw new IllegalArgumentException(
+          "Arguments to calculateSplitEV cannot be null: rules, valueCounts, playerHand, and dealerHand are required");
+    }
+
+    select(rules);
+
+    if (playerHand.size() != 2 || playerHand.get(0).intValue() != playerHand.get(1).intValue()) {
+      return Double.NEGATIVE_INFINITY;
+    }
+
+    long comp = load(valueCounts);
+    return splitEV(comp, playerHand.get(0), encodeHand(dealerHand));
+  }
+
+  // ------------------------------------------------------------------------
+  // Cache Management Methods
+  // ------------------------------------------------------------------------
+
+  /**
+   * Notifies the solver that cards have been dealt from the shoe, pruning every
+   * state that can no longer be reached from the memo tables of the given
+   * rules.
+   *
+   * @param rules       The rules whose memo tables are pruned.
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @return The number of memoized states removed.
+   * @throws IllegalArgumentException if any of the arguments are {@code null}.
+   */
+  public int onDeckUpdated(GameSettings rules, int[] valueCounts) {
+    if (rules == null || valueCounts == null) {
+      throw new IllegalArgumentException("Arguments to onDeckUpdated cannot be null: rules and valueCounts are required");
+    }
+
+    Namespace namespace = namespaceFor(rules);
+    return namespace.dealerTable.prune(valueCounts) + namespace.hitTable.prune(valueCounts);
+  }
+
+  /**
+   * Notifies the solver that cards have been dealt from the shoe, pruning the
+   * memo tables of the solver's default rules.
+   *
+   * @param valueCounts An array representing the current distribution of card
+   *                    values in the deck.
+   * @return The number of memoized states removed.
+   * @throws IllegalArgumentException if {@code valueCounts} is {@code null}.
+   */
+  public int onDeckUpdated(int[] valueCounts) {
+    return onDeckUpdated(defaultRules, valueCounts);
+  }
+
+  /**
+   * Notifies the solver that the shoe has been reshuffled, clearing the memo
+   * tables of the given rules.
+   *
+   * @param rules The rules whose memo tables are cleared.
+   */
+  public void onReshuffle(GameSettings rules) {
+    Namespace namespace = namespaceFor(rules);
+    namespace.dealerTable.clear();
+    namespace.hitTable.clear();
+  }
+
+  /**
+   * Notifies the solver that the shoe has been reshuffled, clearing the memo
+   * tables of the solver's default rules.
+   */
+  public void onReshuffle() {
+    onReshuffle(defaultRules);
+  }
+
+  /**
+   * Returns the combined statistics of the memo tables of the given rules.
+   *
+   * @param rules The rules whose statistics are returned.
+   * @return The cache statistics of the rules.
+   */
+  public CacheStats getCache(GameSettings rules) {
+    return namespaceFor(rules);
+  }
+
+  /**
+   * Returns the combined statistics of the memo tables of the solver's default
+   * rules.
+   *
+   * @return The solver's default cache statistics.
+   */
+  public CacheStats getCache() {
+    return getCache(defaultRules);
+  }
+
+  /**
+   * @return The rules applied when a call does not supply its own.
+   */
+  public GameSettings getDefaultRules() {
+    return defaultRules;
+  }
+
+  /**
+   * Makes the given rules and their memo tables current for the calculation
+   * about to run.
+   */
+  private void select(GameSettings rules) {
+    Namespace namespace = namespaceFor(rules);
+    this.rules = rules;
+    this.dealerTable = namespace.dealerTable;
+    this.hitTable = namespace.hitTable;
+  }
+
+  /**
+   * Returns the memo tables of the given rules, creating them on first use.
+   */
+  private Namespace namespaceFor(GameSettings rules) {
+    return namespaces.computeIfAbsent(rules, r -> new Namespace());
+  }
+
+  // ------------------------------------------------------------------------
+  // Action Evaluation
+  // ------------------------------------------------------------------------
+
+  /**
+   * Computes the EV of standing by scoring the player's hand against the
+   * distribution of dealer final outcomes.
+   */
+  private double standEV(long comp, int player, int dealer, boolean isSplit) {
+    if (isDealerDone(dealer)) {
+      return outcomeValue(player, dealerOutcome(dealer), isSplit);
+    }
+
+    int slot = dealerTable.find(comp, dealer);
+
+    if (slot < 0) {
+      slot = dealerDistribution(comp, dealer);
+    }
+
+    double[] values = dealerTable.values();
+    int offset = slot * DIST_WIDTH;
+    double ev = 0.0;
+
+    for (int k = 0; k < DIST_WIDTH; k++) {
+      double p = values[offset + k];
+
+      if (p != 0.0) {
+        ev += p * outcomeValue(player, k, isSplit);
+      }
+    }
+
+    return ev;
+  }
+
+  /**
+   * Computes the EV of hitting, taking the better of standing and hitting again
+   * after every card. The hit tree is walked depth-first on an explicit stack;
+   * {@code work} holds the composition of the frame on top.
+   */
+  private double hitEV(long comp, int player, int dealer, boolean isSplit) {
+    int context = (dealer << 8) | (isSplit ? SPLIT_BIT : 0);
+    int slot = hitTable.find(comp, player | context);
+
+    if (slot >= 0) {
+      return hitTable.values()[slot];
+    }
+
+    int depth = 0;
+    pushHitFrame(depth, comp, player, -1, 0, 0.0);
+
+    while (true) {
+      int d = depth;
+      int i = hitNext[d];
+
+      while (i < NUM_VALUES && work[i] == 0) {
+        i++;
+      }
+
+      if (i < NUM_VALUES) {
+        hitNext[d] = i + 1;
+        int count = work[i];
+        int value = CARD_VALUES[i];
+
+        // A hard total over 21 is a bust whatever the aces
+        if (base(hitState[d]) + value > 21) {
+          hitValue[d] -= count;
+          hitCards[d] += count;
+          continue;
+        }
+
+        int child = addCard(hitState[d], value);
+        long childComp = hitComp[d] - UNITS[i];
+        work[i]--;
+
+        double stand = standEV(childComp, child, dealer, isSplit);
+        int childSlot = hitTable.find(childComp, child | context);
+
+        if (childSlot >= 0) {
+          hitValue[d] += Math.max(stand, hitTable.values()[childSlot]) * count;
+          hitCards[d] += count;
+          work[i]++;
+          continue;
+        }
+
+        depth++;
+        pushHitFrame(depth, childComp, child, i, count, stand);
+        continue;
+      }
+
+      // All draws from this frame are resolved; memoize and fold into the parent
+      double ev = hitCards[d] > 0 ? hitValue[d] / hitCards[d] : 0.0;
+      slot = hitTable.insert(hitComp[d], hitState[d] | context);
+      hitTable.values()[slot] = ev;
+
+      if (d == 0) {
+        return ev;
+      }
+
+      depth--;
+      hitValue[depth] += Math.max(hitStand[d], ev) * hitWeight[d];
+      hitCards[depth] += hitWeight[d];
+      work[hitDrawn[d]]++;
+    }
+  }
+
+  /**
+   * Computes the EV of doubling: one card, then stand, for twice the stake.
+   */
+  private double doubleEV(long comp, int player, int dealer, boolean isSplit) {
+    double totalValue = 0.0;
+    int totalCards = 0;
+
+    for (int i = 0; i < NUM_VALUES; i++) {
+      int count = work[i];
+
+      if (count == 0) {
+        continue;
+      }
+
+      if (base(player) + CARD_VALUES[i] > 21) {
+        totalValue -= 2.0 * count;
+      } else {
+        work[i]--;
+        totalValue += 2.0 * standEV(comp - UNITS[i], addCard(player, CARD_VALUES[i]), dealer, isSplit) * count;
+        work[i]++;
+      }
+
+      totalCards += count;
+    }
+
+    return totalCards > 0 ? totalValue / totalCards : 0.0;
+  }
+
+  /**
+   * Computes the EV of splitting a pair: one split hand is played out with the
+   * best allowed action after its second card, and counted twice.
+   */
+  private double splitEV(long comp, int pairValue, int dealer) {
+    boolean isAceSplit = pairValue == 1;
+    boolean canHit = !isAceSplit || rules.hitSplitAces();
+    boolean canDouble = rules.doubleAfterSplit()
+        && (!isAceSplit || (rules.hitSplitAces() && rules.doubleSplitAces()));
+    int single = addCard(0, pairValue);
+
+    double totalValue = 0.0;
+    int totalCards = 0;
+
+    for (int i = 0; i < NUM_VALUES; i++) {
+      int count = work[i];
+
+      if (count == 0) {
+        continue;
+      }
+
+      int hand = addCard(single, CARD_VALUES[i]);
+      long childComp = comp - UNITS[i];
+      work[i]--;
+
+      double standEV = standEV(childComp, hand, dealer, true);
+      double hitEV = canHit ? hitEV(childComp, hand, dealer, true) : Double.NEGATIVE_INFINITY;
+      double doubleEV = canDouble ? doubleEV(childComp, hand, dealer, true) : Double.NEGATIVE_INFINITY;
+
+      totalValue += 2 * Math.max(standEV, Math.max(hitEV, doubleEV)) * count;
+      totalCards += count;
+      work[i]++;
+    }
+
+    return totalCards > 0 ? totalValue / totalCards : 0.0;
+  }
+
+  /**
+   * Computes and memoizes the distribution of dealer final outcomes for a
+   * dealer hand that must still draw, walking the draw tree on an explicit
+   * stack. Returns the slot of the root in {@code dealerTable}.
+   */
+  private int dealerDistribution(long comp, int dealer) {
+    int depth = 0;
+    pushDealerFrame(depth, comp, dealer, -1, 0);
+
+    while (true) {
+      int d = depth;
+      int state = dealerState[d];
+      int i = dealerNext[d];
+
+      while (i < NUM_VALUES && (work[i] == 0 || isPeekedOut(state, i))) {
+        i++;
+      }
+
+      if (i < NUM_VALUES) {
+        dealerNext[d] = i + 1;
+        int count = work[i];
+        int child = addCard(state, CARD_VALUES[i]);
+
+        if (isDealerDone(child)) {
+          dealerAcc[d * DIST_WIDTH + dealerOutcome(child)] += count;
+          dealerCards[d] += count;
+          continue;
+        }
+
+        long childComp = dealerComp[d] - UNITS[i];
+        int childSlot = dealerTable.find(childComp, child);
+
+        if (childSlot >= 0) {
+          double[] values = dealerTable.values();
+
+          for (int k = 0; k < DIST_WIDTH; k++) {
+            dealerAcc[d * DIST_WIDTH + k] += values[childSlot * DIST_WIDTH + k] * count;
+          }
+
+          dealerCards[d] += count;
+          continue;
+        }
+
+        work[i]--;
+        depth++;
+        pushDealerFrame(depth, childComp, child, i, count);
+        continue;
+      }
+
+      // All draws from this frame are resolved; normalize, memoize and fold into the parent
+      int slot = dealerTable.insert(dealerComp[d], state);
+      double[] values = dealerTable.values();
+      int cards = dealerCards[d];
+
+      for (int k = 0; k < DIST_WIDTH; k++) {
+        values[slot * DIST_WIDTH + k] = cards > 0 ? dealerAcc[d * DIST_WIDTH + k] / cards : 0.0;
+      }
+
+      if (d == 0) {
+        return slot;
+      }
+
+      depth--;
+
+      for (int k = 0; k < DIST_WIDTH; k++) {
+        dealerAcc[depth * DIST_WIDTH + k] += values[slot * DIST_WIDTH + k] * dealerWeight[d];
+      }
+
+      dealerCards[depth] += dealerWeight[d];
+      work[dealerDrawn[d]]++;
+    }
+  }
+
+  private void pushHitFrame(int d, long comp, int state, int drawn, int weight, double stand) {
+    hitComp[d] = comp;
+    hitState[d] = state;
+    hitNext[d] = 0;
+    hitDrawn[d] = drawn;
+    hitWeight[d] = weight;
+    hitCards[d] = 0;
+    hitValue[d] = 0.0;
+    hitStand[d] = stand;
+  }
+
+  private void pushDealerFrame(int d, long comp, int state, int drawn, int weight) {
+    dealerComp[d] = comp;
+    dealerState[d] = state;
+    dealerNext[d] = 0;
+    dealerDrawn[d] = drawn;
+    dealerWeight[d] = weight;
+    dealerCards[d] = 0;
+
+    for (int k = 0; k < DIST_WIDTH; k++) {
+      dealerAcc[d * DIST_WIDTH + k] = 0.0;
+    }
+  }
+
+  // ------------------------------------------------------------------------
+  // Outcome Helpers
+  // ------------------------------------------------------------------------
+
+  /**
+   * Whether the dealer stands (or has busted) with this hand.
+   */
+  private boolean isDealerDone(int dealer) {
+    int score = score(dealer);
+    return score > 17 || (score == 17 && (!isSoft(dealer) || !rules.dealerHitsOnSoft17()));
+  }
+
+  /**
+   * Whether the dealer's peek rules out drawing the given value as the hole
+   * card, i.e. the dealer would already have shown a natural.
+   */
+  private boolean isPeekedOut(int dealer, int valueIndex) {
+    if (!rules.dealerPeeksFor21() || count(dealer) != 1) {
+      return false;
+    }
+
+    int upcard = base(dealer);
+    return (upcard == 10 && valueIndex == 0) || (upcard == 1 && valueIndex == 9);
+  }
+
+  /**
+   * Maps a finished dealer hand to its index in the outcome distribution.
+   */
+  private static int dealerOutcome(int dealer) {
+    int score = score(dealer);
+
+    if (score == 21 && count(dealer) == 2) {
+      return OUTCOME_NATURAL;
+    } else if (score > 21) {
+      return OUTCOME_BUST;
+    } else {
+      return score - 17;
+    }
+  }
+
+  /**
+   * Settles the player's hand against one dealer outcome, with the same
+   * precedence as {@link EVEngine}.
+   */
+  private double outcomeValue(int player, int outcome, boolean isSplit) {
+    int playerScore = score(player);
+    boolean playerNatural = playerScore == 21 && count(player) == 2
+        && (!isSplit || rules.naturalBlackjackSplits());
+
+    if (outcome == OUTCOME_NATURAL) {
+      return playerNatural ? 0.0 : -1.0;
+    } else if (playerNatural) {
+      return rules.getBlackjackOdds();
+    } else if (playerScore > 21) {
+      return -1.0;
+    } else if (outcome == OUTCOME_BUST) {
+      return 1.0;
+    }
+
+    int dealerScore = 17 + outcome;
+    return playerScore > dealerScore ? 1.0 : (playerScore < dealerScore ? -1.0 : 0.0);
+  }
+
+  // ------------------------------------------------------------------------
+  // Hand and Composition Encoding
+  // ------------------------------------------------------------------------
+
+  /**
+   * Packs a hand into a state: hard total (aces as 1, capped at 31) in bits
+   * 0-4, an ace flag in bit 5, and the card count capped at 3 in bits 6-7. The
+   * cap is lossless: a capped total is a bust either way, and counts beyond 2
+   * never affect naturals or the dealer's peek.
+   */
+  private static int encodeHand(List<Integer> cards) {
+    int state = 0;
+
+    for (int card : cards) {
+      state = addCard(state, card);
+    }
+
+    return state;
+  }
+
+  private static int addCard(int state, int value) {
+    int base = Math.min(base(state) + value, MAX_BASE);
+    int ace = (value == 1) ? ACE_BIT : (state & ACE_BIT);
+    int count = Math.min(count(state) + 1, 3);
+    return base | ace | (count << COUNT_SHIFT);
+  }
+
+  private static int base(int state) {
+    return state & MAX_BASE;
+  }
+
+  private static int count(int state) {
+    return (state >>> COUNT_SHIFT) & 3;
+  }
+
+  private static boolean isSoft(int state) {
+    return (state & ACE_BIT) != 0 && base(state) + 10 <= 21;
+  }
+
+  private static int score(int state) {
+    return isSoft(state) ? base(state) + 10 : base(state);
+  }
+
+  /**
+   * Copies the caller's counts into the working composition and packs them.
+   */
+  private long load(int[] valueCounts) {
+    if (valueCounts.length != NUM_VALUES) {
+      throw new IllegalArgumentException("Expected " + NUM_VALUES + " value counts, got " + valueCounts.length);
+    }
+
+    long comp = 0L;
+
+    for (int i = 0; i < NUM_VALUES; i++) {
+      if (valueCounts[i] < 0 || valueCounts[i] > MAX_COUNTS[i]) {
+        throw new IllegalArgumentException("Value count out of range at index " + i + ": " + valueCounts[i]);
+      }
+
+      work[i] = valueCounts[i];
+      comp += (long) valueCounts[i] << SHIFTS[i];
+    }
+
+    return comp;
+  }
+
+  /**
+   * Checks whether a packed composition holds no more of any value than the
+   * given deck.
+   */
+  static boolean isReachable(long comp, int[] valueCounts) {
+    for (int i = 0; i < NUM_VALUES; i++) {
+      if (((comp >>> SHIFTS[i]) & MAX_COUNTS[i]) > valueCounts[i]) {
+        return false;
+      }
+    }
+
+    return true;
+  }
+
+  /**
+   * The memo tables of one rule set, reporting their combined statistics.
+   */
+  private final class Namespace implements CacheStats {
+    private final SolverTable dealerTable = new SolverTable(DIST_WIDTH, tableCapacity);
+    private final SolverTable hitTable = new SolverTable(1, tableCapacity);
+
+    @Override
+    public int size() {
+      return dealerTable.size() + hitTable.size();
+    }
+
+    @Override
+    public int getCapacity() {
+      return dealerTable.getCapacity() + hitTable.getCapacity();
+    }
+
+    @Override
+    public long getEstimatedBytes() {
+      return dealerTable.getEstimatedBytes() + hitTable.getEstimatedBytes();
+    }
+
+    @Override
+    public long getHits() {
+      return dealerTable.getHits() + hitTable.getHits();
+    }
+
+    @Override
+    public long getMisses() {
+      return dealerTable.getMisses() + hitTable.getMisses();
+    }
+
+    @Override
+    public long getEvictions() {
+      return dealerTable.getEvictions() + hitTable.getEvictions();
+    }
+
+    @Override
+    public long getPruned() {
+      return dealerTable.getPruned() + hitTable.getPruned();
+    }
+  }
+}
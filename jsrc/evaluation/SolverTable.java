@@ -0,0 +1,207 @@
+package evaluation;
+
+import java.util.Arrays;
+
+/**
+ * An open-addressing hash table used by {@link IterativeEVSolver} for
+ * memoization. Keys are a packed deck composition ({@code long}) and a packed
+ * hand state ({@code int}); each entry holds a fixed-width record of
+ * {@code double} values stored inline, so lookups neither allocate nor box.
+ * When the configured capacity is reached the table is flushed.
+ */
+final class SolverTable implements CacheStats {
+  private static final int EMPTY = -1;
+  private static final int INITIAL_SLOTS = 1 << 12;
+
+  private final int width;
+  private final int capacity;
+
+  private long[] compositions;
+  private int[] states;
+  private double[] values;
+  private int mask;
+  private int size;
+
+  private long hits;
+  private long misses;
+  private long evictions;
+  private long pruned;
+
+  /**
+   * Constructs an empty table.
+   *
+   * @param width    The number of {@code double} values stored per entry.
+   * @param capacity The maximum number of entries before the table is flushed.
+   */
+  SolverTable(int width, int capacity) {
+    this.width = width;
+    this.capacity = capacity;
+    allocate(INITIAL_SLOTS);
+  }
+
+  /**
+   * Finds the slot holding the given key and records the hit or miss.
+   *
+   * @param composition The packed deck composition.
+   * @param state       The packed hand state (non-negative).
+   * @return The slot index, or {@code -1} if the key is not present.
+   */
+  int find(long composition, int state) {
+    int slot = probe(composition, state);
+
+    if (states[slot] == EMPTY) {
+      misses++;
+      return -1;
+    }
+
+    hits++;
+    return slot;
+  }
+
+  /**
+   * Inserts a key, or returns its existing slot. The caller writes the record
+   * into {@link #values()} at {@code slot * width}. Slot indices are only
+   * valid until the next insertion.
+   *
+   * @param composition The packed deck composition.
+   * @param state       The packed hand state (non-negative).
+   * @return The slot index of the key.
+   */
+  int insert(long composition, int state) {
+    int slot = probe(composition, state);
+
+    if (states[slot] != EMPTY) {
+      return slot;
+    }
+
+    if (size >= capacity) {
+      evictions += size;
+      allocate(INITIAL_SLOTS);
+      slot = probe(composition, state);
+    } else if ((size + 1) * 2 > states.length) {
+      rehash(states.length * 2);
+      slot = probe(composition, state);
+    }
+
+    compositions[slot] = composition;
+    states[slot] = state;
+    size++;
+    return slot;
+  }
+
+  /**
+   * @return The inline record storage; entry {@code slot} starts at
+   *         {@code slot * width}.
+   */
+  double[] values() {
+    return values;
+  }
+
+  /**
+   * Removes every entry whose composition holds more of some value than the
+   * given deck.
+   *
+   * @param valueCounts The current distribution of card values in the deck.
+   * @return The number of entries removed.
+   */
+  int prune(int[] valueCounts) {
+    long[] oldCompositions = compositions;
+    int[] oldStates = states;
+    double[] oldValues = values;
+    int before = size;
+
+    allocate(oldStates.length);
+
+    for (int i = 0; i < oldStates.length; i++) {
+      if (oldStates[i] != EMPTY && IterativeEVSolver.isReachable(oldCompositions[i], valueCounts)) {
+        int slot = insert(oldCompositions[i], oldStates[i]);
+        System.arraycopy(oldValues, i * width, values, slot * width, width);
+      }
+    }
+
+    int removed = before - size;
+    pruned += removed;
+    return removed;
+  }
+
+  /**
+   * Removes every entry.
+   */
+  void clear() {
+    pruned += size;
+    allocate(INITIAL_SLOTS);
+  }
+
+  @Override
+  public int size() {
+    return size;
+  }
+
+  @Override
+  public int getCapacity() {
+    return capacity;
+  }
+
+  @Override
+  public long getEstimatedBytes() {
+    return (long) states.length * (Long.BYTES + Integer.BYTES + (long) width * Double.BYTES);
+  }
+
+  @Override
+  public long getHits() {
+    return hits;
+  }
+
+  @Override
+  public long getMisses() {
+    return misses;
+  }
+
+  @Override
+  public long getEvictions() {
+    return evictions;
+  }
+
+  @Override
+  public long getPruned() {
+    return pruned;
+  }
+
+  private int probe(long composition, int state) {
+    long h = composition * 0x9E3779B97F4A7C15L + state * 0xC2B2AE3D27D4EB4FL;
+    int slot = (int) (h ^ (h >>> 29)) & mask;
+
+    while (states[slot] != EMPTY && (states[slot] != state || compositions[slot] != composition)) {
+      slot = (slot + 1) & mask;
+    }
+
+    return slot;
+  }
+
+  private void allocate(int slots) {
+    compositions = new long[slots];
+    states = new int[slots];
+    values = new double[slots * width];
+    Arrays.fill(states, EMPTY);
+    mask = slots - 1;
+    size = 0;
+  }
+
+  private void rehash(int slots) {
+    long[] oldCompositions = compositions;
+    int[] oldStates = states;
+    double[] oldValues = values;
+
+    allocate(slots);
+
+    for (int i = 0; i < oldStates.length; i++) {
+      if (oldStates[i] != EMPTY) {
+        int slot = probe(oldCompositions[i], oldStates[i]);
+        compositions[slot] = oldCompositions[i];
+        states[slot] = oldStates[i];
+        System.arraycopy(oldValues, i * width, values, slot * width, width);
+        size++;
+      }
+    }
+  }
+}
@@ -29,6 +29,24 @@ public final class StateKey {
     this.hash = h;
   }
 
+  /**
+   * Checks whether this state can still occur given the current deck. Cards are
+   * only removed within a shoe, so a state is reachable only if it holds no
+   * more of any value than the deck does.
+   *
+   * @param deckCounts The current distribution of card values in the deck.
+   * @return {@code true} if every count in this state is within the deck's.
+   */
+  public boolean isReachableFrom(int[] deckCounts) {
+    for (int i = 0; i < valueCounts.length; i++) {
+      if (valueCounts[i] > deckCounts[i]) {
+        return false;
+      }
+    }
+
+    return true;
+  }
+
   @Override
   public boolean equals(Object o) {
     if (this == o)
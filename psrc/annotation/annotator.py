@@ -8,12 +8,14 @@ visualization helps in real-time monitoring of detection and scoring performance
 
 import cv2
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from evaluation.card_codes import card_label
 
 def annotate_frame_with_scores(
   frame: np.ndarray, boxes: List[List[float]], 
-  hands_dict: Dict[str, Any], labels: List[str],
-  hand_totals: Dict[Any, int]
+  hands_dict: Dict[str, Any], labels: List[int],
+  hand_totals: Dict[Any, int],
+  recommendations: Optional[Dict[int, str]] = None
 ) -> np.ndarray:
   """
   Annotates the given frame with bounding boxes and labels, taking into account the new grouping format.
@@ -23,19 +25,22 @@ def annotate_frame_with_scores(
     - "dealer_hand": A list of indices for the dealer hand (or None).
   
   For each detected card, a bounding box is drawn along with a label. If the detection belongs to a player hand,
-  the label is formatted as "card (HAND X, total)". If it belongs to the dealer hand (merged singleton group),
+  the label is formatted as "card (HAND X, total)", or "card (HAND X, total, action)" when an action is
+  recommended for the hand. If it belongs to the dealer hand (merged singleton group),
   it is labeled as "card (DEALER, total)".
   
   Parameters:
     frame (numpy.ndarray): The image frame to annotate.
     boxes (list): List of bounding boxes in the format [x1, y1, x2, y2].
     hands_dict (dict): Dictionary with keys "player_hands" and "dealer_hand" from the grouping function.
-    labels (list): List of card labels corresponding to each bounding box.
+    labels (list): List of card codes corresponding to each bounding box; converted to display labels here.
     hand_totals (dict): Dictionary mapping hand number (or "dealer") to its total score.
+    recommendations (dict, optional): Dictionary mapping hand number to its recommended action.
   
   Returns:
     numpy.ndarray: The annotated frame.
   """
+  recommendations = recommendations or {}
   colors = [(255, 255, 255)]  # Color palette for the hands
   box_to_hand = {}  # Map each box index to its hand number
 
@@ -55,7 +60,7 @@ def annotate_frame_with_scores(
   # Draw bounding boxes and overlay labels
   for idx, box in enumerate(boxes):
     assigned_hand = box_to_hand.get(idx, None)
-    card = labels[idx] if idx < len(labels) else ""
+    card = card_label(labels[idx]) if idx < len(labels) else ""
 
     if assigned_hand is not None:
       if assigned_hand == 0:
@@ -63,7 +68,8 @@ def annotate_frame_with_scores(
         text = f"{card} (DEALER, {total})"
       else:
         total = hand_totals.get(assigned_hand, 0)
-        text = f"{card} (HAND {assigned_hand}, {total})"
+        action = recommendations.get(assigned_hand)
+        text = f"{card} (HAND {assigned_hand}, {total}, {action})" if action else f"{card} (HAND {assigned_hand}, {total})"
     else:
       text = card
 
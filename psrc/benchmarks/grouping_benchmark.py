@@ -0,0 +1,131 @@
+"""
+Scaling benchmark and cross-check for hand grouping.
+
+This module times group_cards against the previous all-pairs implementation on synthetic frames of increasing
+size, where cards are laid out in overlapping hands spread over the frame, and checks that both return identical
+groups.
+
+Usage (from the project root):
+  PYTHONPATH=psrc python -m benchmarks.grouping_benchmark [sizes...]
+"""
+
+import sys
+import time
+import numpy as np
+from typing import Callable, Dict, List, Optional
+from detection.detection_utils import compute_overlap, group_cards
+
+REPETITIONS = 5
+CARD_WIDTH = 60.0
+CARD_HEIGHT = 90.0
+
+def reference_group_cards(boxes: List[List[float]], overlap_threshold: float = 0.1) -> Dict[str, Optional[List[List[int]]]]:
+  """
+  The previous implementation of group_cards, which tests every pair of boxes.
+
+  Parameters:
+    boxes (list): A list of bounding boxes.
+    overlap_threshold (float, optional): Minimum overlap ratio to connect two boxes. Defaults to 0.1.
+
+  Returns:
+    dict: The player hands and dealer hand, as returned by group_cards.
+  """
+  n = len(boxes)
+  graph = {i: [] for i in range(n)}
+
+  for i in range(n):
+    for j in range(i + 1, n):
+      if compute_overlap(boxes[i], boxes[j]) >= overlap_threshold:
+        graph[i].append(j)
+        graph[j].append(i)
+
+  visited = [False] * n
+  groups = []
+
+  for i in range(n):
+    if not visited[i]:
+      stack = [i]
+      group = []
+
+      while stack:
+        node = stack.pop()
+
+        if not visited[node]:
+          visited[node] = True
+          group.append(node)
+          stack.extend(graph[node])
+
+      groups.append(group)
+
+  player_hands = [group for group in groups if len(group) > 1]
+  dealer_hand = [group[0] for group in groups if len(group) == 1] or None
+  return {"player_hands": player_hands, "dealer_hand": dealer_hand}
+
+def make_frame(num_cards: int, rng: np.random.Generator) -> List[List[float]]:
+  """
+  Lay out cards in hands of one to five overlapping cards, spread over a frame sized so density stays constant.
+
+  Parameters:
+    num_cards (int): The number of cards in the frame.
+    rng (numpy.random.Generator): The random generator.
+
+  Returns:
+    list: Boxes as [x1, y1, x2, y2], in random order.
+  """
+  side = 400.0 * np.sqrt(num_cards)
+  boxes = []
+
+  while len(boxes) < num_cards:
+    x, y = rng.uniform(0, side, size=2)
+    for k in range(min(int(rng.integers(1, 6)), num_cards - len(boxes))):
+      x1, y1 = x + 18.0 * k, y - 12.0 * k
+      boxes.append([x1, y1, x1 + CARD_WIDTH, y1 + CARD_HEIGHT])
+
+  order = rng.permutation(len(boxes))
+  return [boxes[i] for i in order]
+
+def best_time(function: Callable, boxes: List[List[float]], repetitions: int) -> float:
+  """
+  Parameters:
+    function (callable): The grouping function.
+    boxes (list): The boxes to group.
+    repetitions (int): The number of timed runs.
+
+  Returns:
+    float: The fastest run, in seconds.
+  """
+  best = float("inf")
+
+  for _ in range(repetitions):
+    start = time.perf_counter()
+    function(boxes, overlap_threshold=0.1)
+    best = min(best, time.perf_counter() - start)
+
+  return best
+
+def main() -> None:
+  """
+  Time both implementations for each frame size and exit with status 1 if any grouping differs.
+  """
+  sizes = [int(arg) for arg in sys.argv[1:]] or [10, 50, 200, 1000, 3000]
+  rng = np.random.default_rng(0)
+  mismatch = False
+
+  print(f"{'cards':>6} {'sweep ms':>10} {'all-pairs ms':>13} {'speedup':>8}")
+
+  for n in sizes:
+    boxes = make_frame(n, rng)
+
+    if group_cards(boxes) != reference_group_cards(boxes):
+      mismatch = True
+      print(f"MISMATCH for {n} cards")
+
+    sweep = best_time(group_cards, boxes, REPETITIONS)
+    pairwise = best_time(reference_group_cards, boxes, 1 if n > 1000 else REPETITIONS)
+    print(f"{n:>6} {sweep * 1e3:>10.3f} {pairwise * 1e3:>13.3f} {pairwise / sweep:>7.1f}x")
+
+  if mismatch:
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
@@ -1,6 +1,6 @@
 import os
 import yaml
-from typing import Tuple
+from typing import Optional, Tuple
 
 class DetectionSettings:
   yolo_path: str
@@ -15,7 +15,48 @@ class DetectionSettings:
   confirmation_frames: int
   disappear_frames: int
   deck_size: int
+  shoe_journal_path: Optional[str]
+  shoe_journal_fsync_interval: float
+  shoe_journal_snapshot_every: int
   display_frame_size: Tuple[int, int]
+  pipeline_processes: bool
+  pipeline_ring_slots: int
+  record_detections_path: Optional[str]
+  round_history_dir: Optional[str]
+  record_video: bool
+  record_video_dir: str
+  record_video_codec: str
+  record_video_fps: float
+  record_video_frame_size: Tuple[int, int]
+  record_video_keep_every: int
+  record_video_segment_seconds: float
+  record_video_queue_size: int
+  server_host: str
+  server_port: int
+  server_max_batch: int
+  server_max_wait_ms: float
+  server_max_frame_bytes: int
+  profile_slow_frames_ms: Optional[float]
+  profile_dir: str
+  profile_sample_interval_ms: float
+  profile_max_captures: int
+  ev_engine_class: str
+  ev_cache_max_entries: int
+  ev_cache_max_bytes: int
+  ev_service_socket: Optional[str]
+  ev_service_pool_size: int
+  ev_speculation_enabled: bool
+  ev_speculation_max_results: int
+  ev_speculation_max_ms: float
+  ev_decision_budget: Optional[float]
+  blackjack_odds: float
+  can_surrender: bool
+  dealer_hits_on_soft_17: bool
+  dealer_peaks_for_21: bool
+  natural_blackjack_splits: bool
+  double_after_split: bool
+  hit_split_aces: bool
+  double_split_aces: bool
 
   def __init__(self, config_file: str = "config.yaml") -> None:
     if not os.path.isfile(config_file):
@@ -24,6 +65,7 @@ class DetectionSettings:
       config_data = yaml.safe_load(f)
     
     detection = config_data["detection_settings"]
+    game = config_data["game_settings"]
 
     self.yolo_path = detection["yolo_path"]
     self.video_path = detection["video_path"]
@@ -42,4 +84,54 @@ class DetectionSettings:
     self.disappear_frames = detection["disappear_frames"]
 
     self.deck_size = detection["deck_size"]
-    self.display_frame_size = tuple(detection["display_frame_size"])
\ No newline at end of file
+    self.shoe_journal_path = detection["shoe_journal_path"]
+    self.shoe_journal_fsync_interval = detection["shoe_journal_fsync_interval"]
+    self.shoe_journal_snapshot_every = detection["shoe_journal_snapshot_every"]
+    self.display_frame_size = tuple(detection["display_frame_size"])
+
+    self.pipeline_processes = detection["pipeline_processes"]
+    self.pipeline_ring_slots = detection["pipeline_ring_slots"]
+
+    self.record_detections_path = detection["record_detections_path"]
+    self.round_history_dir = detection["round_history_dir"]
+
+    self.record_video = detection["record_video"]
+    self.record_video_dir = detection["record_video_dir"]
+    self.record_video_codec = detection["record_video_codec"]
+    self.record_video_fps = detection["record_video_fps"]
+    self.record_video_frame_size = tuple(detection["record_video_frame_size"])
+    self.record_video_keep_every = detection["record_video_keep_every"]
+    self.record_video_segment_seconds = detection["record_video_segment_seconds"]
+    self.record_video_queue_size = detection["record_video_queue_size"]
+
+    self.server_host = detection["server_host"]
+    self.server_port = detection["server_port"]
+    self.server_max_batch = detection["server_max_batch"]
+    self.server_max_wait_ms = detection["server_max_wait_ms"]
+    self.server_max_frame_bytes = detection["server_max_frame_bytes"]
+
+    self.profile_slow_frames_ms = detection["profile_slow_frames_ms"]
+    self.profile_dir = detection["profile_dir"]
+    self.profile_sample_interval_ms = detection["profile_sample_interval_ms"]
+    self.profile_max_captures = detection["profile_max_captures"]
+
+    self.ev_engine_class = detection["ev_engine_class"]
+    self.ev_cache_max_entries = detection["ev_cache_max_entries"]
+    self.ev_cache_max_bytes = detection["ev_cache_max_bytes"]
+    self.ev_service_socket = detection["ev_service_socket"]
+    self.ev_service_pool_size = detection["ev_service_pool_size"]
+    self.ev_speculation_enabled = detection["ev_speculation_enabled"]
+    self.ev_speculation_max_results = detection["ev_speculation_max_results"]
+    self.ev_speculation_max_ms = detection["ev_speculation_max_ms"]
+    self.ev_decision_budget = detection["ev_decision_budget"]
+
+    self.blackjack_odds = game["blackjack_odds"]
+    self.can_surrender = game["can_surrender"]
+
+    self.dealer_hits_on_soft_17 = game["dealer_hits_on_soft_17"]
+    self.dealer_peaks_for_21 = game["dealer_peaks_for_21"]
+
+    self.natural_blackjack_splits = game["natural_blackjack_splits"]
+    self.double_after_split = game["double_after_split"]
+    self.hit_split_aces = game["hit_split_aces"]
+    self.double_split_aces = game["double_split_aces"]
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""
+Module for profiling frames that exceed a latency threshold.
+
+This module defines the FrameProfiler class. While enabled, a background thread samples the Python stack of the
+frame loop at a fixed interval, and the profiler times each EV call and reads the JVM garbage collector counters
+around every frame. Since a frame is only known to be slow once it has finished, everything is collected for every
+frame and discarded unless the frame took longer than the threshold. A slow frame is saved as a JSON capture
+holding the phase timings, the sampled stacks (collapsed, as used by flame graph tools), the EV calls, the JVM GC
+activity, and the frame's detections, hands and evaluations. Only the most recent captures are kept.
+
+Stack sampling is used rather than cProfile because cProfile would have to trace every frame to cover the slow
+ones, whereas sampling costs one stack walk per interval.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+from debugging.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_MAX_STACK_DEPTH = 64
+
+class FrameProfiler:
+  """
+  A class to capture a profile of every frame that exceeds a latency threshold.
+  """
+
+  def __init__(
+    self, output_dir: str, threshold_ms: float,
+    sample_interval_ms: float = 5.0, max_captures: int = 100
+  ) -> None:
+    """
+    Initialize the FrameProfiler instance and start the stack sampler. The calling thread is the one profiled.
+
+    Parameters:
+      output_dir (str): The directory captures are written to; created if missing.
+      threshold_ms (float): Frames taking longer than this, in milliseconds, are captured.
+      sample_interval_ms (float): The interval between stack samples, in milliseconds.
+      max_captures (int): The number of captures kept; the oldest are deleted first.
+    """
+    self.output_dir = output_dir
+    self.threshold = threshold_ms / 1000.0
+    self.sample_interval = sample_interval_ms / 1000.0
+    self.max_captures = max(int(max_captures), 1)
+
+    self.frames = 0
+    self.captured = 0
+
+    self._thread_id = threading.get_ident()
+    self._active = False
+    self._start = 0.0
+    self._marks: List[Tuple[str, float]] = []
+    self._samples: List[Tuple[float, Tuple[str, ...]]] = []
+    self._ev_calls: List[Dict[str, Any]] = []
+    self._context: Dict[str, Any] = {}
+    self._gc_start: Optional[Dict[str, Tuple[int, int]]] = None
+
+    os.makedirs(output_dir, exist_ok=True)
+    existing = [os.path.join(output_dir, name) for name in os.listdir(output_dir) if name.startswith("frame_") and name.endswith(".json")]
+    self._captures = deque(sorted(existing, key=os.path.getmtime))  # Captures of earlier runs are rotated out first
+
+    self._closed = threading.Event()
+    self._sampler = threading.Thread(target=self._sample, name="frame-profiler", daemon=True)
+    self._sampler.start()
+    logger.info("Profiling frames slower than %.1f ms into %s", threshold_ms, output_dir)
+
+  def instrument(self, evaluator: Any) -> None:
+    """
+    Time the EV calls an evaluator makes during profiled frames, from any thread.
+
+    Parameters:
+      evaluator: An object with calculate_ev(action, deck, player_hand, dealer_hand), such as EVEngineWrapper or
+        EVServiceClient; its calculate_ev is wrapped in place.
+    """
+    calculate_ev = evaluator.calculate_ev
+
+    def timed_calculate_ev(action: str, deck: Any, player_hand: List[int], dealer_hand: List[int]) -> float:
+      if not self._active:
+        return calculate_ev(action, deck, player_hand, dealer_hand)
+
+      started = time.perf_counter()
+      try:
+        return calculate_ev(action, deck, player_hand, dealer_hand)
+      finally:
+        self._ev_calls.append({
+          "action": action,
+          "player_hand": list(player_hand),
+          "dealer_hand": list(dealer_hand),
+          "thread": threading.current_thread().name,
+          "start_ms": (started - self._start) * 1e3,
+          "ms": (time.perf_counter() - started) * 1e3
+        })
+
+    evaluator.calculate_ev = timed_calculate_ev
+
+  def begin(self) -> None:
+    """
+    Start profiling a frame.
+    """
+    self._marks = []
+    self._samples = []
+    self._ev_calls = []
+    self._context = {}
+    self._gc_start = _jvm_gc_counters()
+    self._start = time.perf_counter()
+    self._active = True
+
+  def mark(self, phase: str) -> None:
+    """
+    Record the end of a phase of the current frame.
+
+    Parameters:
+      phase (str): The phase name (e.g., "read", "inference", "display").
+    """
+    if self._active:
+      self._marks.append((phase, time.perf_counter()))
+
+  def note(self, **context: Any) -> None:
+    """
+    Attach context to the current frame, saved with its capture if the frame turns out slow.
+
+    Parameters:
+      **context: JSON-serializable values (NumPy scalars and arrays are converted).
+    """
+    if self._active:
+      self._context.update(context)
+
+  def end(self) -> Optional[str]:
+    """
+    Finish the current frame and save its capture if it exceeded the threshold.
+
+    Returns:
+      str or None: The path of the capture, or None if the frame was fast enough.
+    """
+    if not self._active:
+      return None
+
+    elapsed = time.perf_counter() - self._start
+    self._active = False
+    self.frames += 1
+
+    if elapsed <= self.threshold:
+      return None
+
+    return self._save(elapsed, _jvm_gc_counters())
+
+  def _sample(self) -> None:
+    """
+    Sampler loop: while a frame is being profiled, record the profiled thread's stack every interval.
+    """
+    while not self._closed.wait(self.sample_interval):
+      if not self._active:
+        continue
+
+      frame = sys._current_frames().get(self._thread_id)
+      stack = []
+      while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+      del frame
+
+      self._samples.append((time.perf_counter() - self._start, tuple(reversed(stack))))
+
+  def _save(self, elapsed: float, gc_end: Optional[Dict[str, Tuple[int, int]]]) -> str:
+    """
+    Write the capture of the frame just finished and drop the oldest captures beyond the limit.
+
+    Parameters:
+      elapsed (float): The frame time in seconds.
+      gc_end (dict or None): The JVM GC counters at the end of the frame.
+
+    Returns:
+      str: The path of the capture.
+    """
+    phases = {}
+    previous = self._start
+    for phase, at in self._marks:
+      phases[phase] = phases.get(phase, 0.0) + (at - previous) * 1e3
+      previous = at
+
+    samples = list(self._samples)
+    stacks = Counter(";".join(stack) for _, stack in samples)
+    leaves = Counter(stack[-1] for _, stack in samples if stack)
+
+    gc = None
+    if self._gc_start is not None and gc_end is not None:
+      gc = {
+        name: {"collections": count - self._gc_start[name][0], "ms": millis - self._gc_start[name][1]}
+        for name, (count, millis) in gc_end.items() if name in self._gc_start
+      }
+
+    capture = {
+      "timestamp": time.time(),
+      "elapsed_ms": elapsed * 1e3,
+      "threshold_ms": self.threshold * 1e3,
+      "phases_ms": phases,
+      "sample_interval_ms": self.sample_interval * 1e3,
+      "samples": len(samples),
+      "top_functions": leaves.most_common(20),
+      "stacks": dict(stacks.most_common()),
+      "ev_calls": list(self._ev_calls),
+      "jvm_gc": gc,
+      "context": self._context
+    }
+
+    frame_index = self._context.get("frame_index", self.frames)
+    path = os.path.join(self.output_dir, f"frame_{int(frame_index):08d}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w") as f:
+      json.dump(capture, f, default=_to_json)
+
+    self._captures.append(path)
+    while len(self._captures) > self.max_captures:
+      oldest = self._captures.popleft()
+      try:
+        os.remove(oldest)
+      except FileNotFoundError:
+        pass
+
+    self.captured += 1
+    logger.warning("Slow frame %s: %.1f ms (%s); profile saved to %s", frame_index, elapsed * 1e3,
+                   ", ".join(f"{phase} {ms:.1f}" for phase, ms in phases.items()), path)
+    return path
+
+  def stats(self) -> Dict[str, int]:
+    """
+    Returns:
+      dict: The number of frames profiled and the number captured.
+    """
+    return {"frames": self.frames, "captured": self.captured}
+
+  def close(self) -> None:
+    """
+    Stop the sampler.
+    """
+    self._active = False
+    self._closed.set()
+    self._sampler.join()
+    logger.info("Frame profiler stopped: %s", self.stats())
+
+def _jvm_gc_counters() -> Optional[Dict[str, Tuple[int, int]]]:
+  """
+  Read the collection count and accumulated time of every JVM garbage collector, if a JVM runs in this process.
+
+  Returns:
+    dict or None: (collections, milliseconds) per collector name, or None without an in-process JVM.
+  """
+  try:
+    import jpype
+  except ImportError:
+    return None
+
+  if not jpype.isJVMStarted():
+    return None
+
+  beans = jpype.JClass("java.lang.management.ManagementFactory").getGarbageCollectorMXBeans()
+  return {str(bean.getName()): (int(bean.getCollectionCount()), int(bean.getCollectionTime())) for bean in beans}
+
+def _to_json(value: Any) -> Any:
+  """
+  Convert values json cannot serialize, such as NumPy scalars and arrays.
+
+  Parameters:
+    value: The value.
+
+  Returns:
+    A JSON-serializable equivalent.
+  """
+  if hasattr(value, "tolist"):
+    return value.tolist()
+  return str(value)
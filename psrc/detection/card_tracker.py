@@ -21,7 +21,7 @@ class CardTracker:
   def __init__(
     self, confirmation_frames: int, 
     disappear_frames: int, confidence_threshold: float, 
-    overlap_threshold: float, on_lock_callback: Optional[Callable[[str], None]] = None
+    overlap_threshold: float, on_lock_callback: Optional[Callable[[int], None]] = None
   ) -> None:
     """
     Initialize the CardTracker instance.
@@ -31,7 +31,7 @@ class CardTracker:
       disappear_frames (int): Number of frames allowed for a card to not be detected before it is removed.
       confidence_threshold (float): The minimum confidence required to start tracking a new card.
       overlap_threshold (float): The minimum overlap ratio between boxes to consider them as the same card.
-      on_lock_callback (callable, optional): A function to be called when a card becomes locked.
+      on_lock_callback (callable, optional): A function to be called with the card code when a card becomes locked.
     """
     self.confirmation_frames = confirmation_frames
     self.disappear_frames = disappear_frames
@@ -42,8 +42,8 @@ class CardTracker:
 
   def update(
     self, boxes: List[List[float]],
-    labels: List[str], confidences: List[float]
-  ) -> List[str]:
+    labels: List[int], confidences: List[float]
+  ) -> List[int]:
     """
     Update the tracked cards based on new detection boxes.
 
@@ -52,11 +52,11 @@ class CardTracker:
 
     Parameters:
       boxes (list): List of bounding boxes for detected cards.
-      labels (list): List of corresponding labels for each box.
+      labels (list): List of corresponding card codes for each box.
       confidences (list): List of detection confidence scores.
 
     Returns:
-      list: A list of labels to be displayed for the current frame.
+      list: A list of card codes to be displayed for the current frame.
     """
     new_tracked = {}
     displayed_labels = []
@@ -116,4 +116,15 @@ class CardTracker:
       if not found:
         displayed_labels.append(labels[boxes.index(box)])
 
-    return displayed_labels
\ No newline at end of file
+    return displayed_labels
+
+  def pending_labels(self) -> List[int]:
+    """
+    Retrieve the card codes of tracked cards that have been seen with sufficient confidence but not locked yet.
+
+    These are the cards expected to be removed from the deck once they are confirmed.
+
+    Returns:
+      list: Card codes of the pending tracks.
+    """
+    return [info["label"] for info in self.tracked_cards.values() if info["frame_count"] > 0 and not info["locked"]]
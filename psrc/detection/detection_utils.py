@@ -5,7 +5,8 @@ This module provides helper functions for card detection tasks, including comput
 bounding boxes and grouping detected cards into hands based on spatial relationships.
 """
 
-from typing import List, Dict, Optional
+import numpy as np
+from typing import List, Dict, Optional, Tuple
 
 def compute_overlap(boxA: List[float], boxB: List[float]) -> float:
   """
@@ -42,13 +43,64 @@ def compute_overlap(boxA: List[float], boxB: List[float]) -> float:
 
   return intersection_area / min_area
 
+def _overlapping_pairs(boxes: np.ndarray, overlap_threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  Finds every pair of boxes whose overlap (as computed by compute_overlap) is at least the threshold.
+
+  Candidate pairs are found by sort-and-sweep on the x-intervals: after sorting boxes by x1, the boxes whose
+  x-interval can intersect that of box i are exactly the following boxes with x1 <= x2 of box i, found by binary
+  search. Only these candidates are tested, with the same arithmetic as compute_overlap, so the result is
+  identical to testing every pair. A threshold of zero or less connects boxes that do not touch at all, in which
+  case every pair is a candidate.
+
+  Parameters:
+    boxes (numpy.ndarray): An (n, 4) float64 array of boxes as [x1, y1, x2, y2].
+    overlap_threshold (float): Minimum overlap ratio to connect two boxes.
+
+  Returns:
+    tuple: Arrays (first, second) of box indices with first < second for each connected pair.
+  """
+  n = len(boxes)
+
+  if overlap_threshold <= 0:
+    first, second = np.triu_indices(n, k=1)
+  else:
+    order = np.argsort(boxes[:, 0], kind="stable")
+    x1_sorted = boxes[order, 0]
+    ends = np.searchsorted(x1_sorted, boxes[order, 2], side="right")
+    counts = np.maximum(ends - np.arange(1, n + 1), 0)  # Boxes after position p whose x1 <= x2 of the box at p
+
+    # Expand each position p into the candidate positions p + 1 .. p + counts[p]
+    starts = np.repeat(np.arange(n), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    first, second = order[starts], order[starts + 1 + offsets]
+
+  a, b = boxes[first], boxes[second]
+  x_left = np.maximum(a[:, 0], b[:, 0])
+  y_top = np.maximum(a[:, 1], b[:, 1])
+  x_right = np.minimum(a[:, 2], b[:, 2])
+  y_bottom = np.minimum(a[:, 3], b[:, 3])
+
+  intersection_area = (x_right - x_left) * (y_bottom - y_top)
+  min_area = np.minimum((a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]), (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]))
+
+  with np.errstate(divide="ignore", invalid="ignore"):
+    ratio = np.where(
+      (x_right < x_left) | (y_bottom < y_top) | (min_area == 0), 0.0, intersection_area / min_area
+    )
+
+  connected = ratio >= overlap_threshold
+  first, second = first[connected], second[connected]
+  return np.minimum(first, second), np.maximum(first, second)
+
 def group_cards(boxes: List[List[float]], overlap_threshold: float = 0.1) -> Dict[str, Optional[List[List[int]]]]:
   """
   Groups bounding boxes into hands based on their overlap.
   
   Each bounding box (expressed as [x1, y1, x2, y2]) is treated as a node in a graph. An edge is added between two
-  nodes if their overlap (computed via compute_overlap) is at least the overlap threshold. A depth-first search
-  (DFS) is then used to find connected components, where each component represents a hand.
+  nodes if their overlap (computed as in compute_overlap) is at least the overlap threshold; edges are found with
+  a sort-and-sweep over the boxes' x-intervals rather than by testing every pair. A depth-first search (DFS) is
+  then used to find connected components, where each component represents a hand.
   
   Parameters:
     boxes (list): A list of bounding boxes.
@@ -58,14 +110,14 @@ def group_cards(boxes: List[List[float]], overlap_threshold: float = 0.1) -> Dic
     list: A list of groups, where each group is a list of indices corresponding to bounding boxes that form a hand.
   """
   n = len(boxes)
-  graph = {i: [] for i in range(n)}
-  
-  # Add edges between boxes with sufficient overlap
-  for i in range(n):
-    for j in range(i + 1, n):
-      if compute_overlap(boxes[i], boxes[j]) >= overlap_threshold:
-        graph[i].append(j)
-        graph[j].append(i)
+  first, second = _overlapping_pairs(np.asarray(boxes, dtype=np.float64).reshape(n, 4), overlap_threshold)
+
+  # Build sorted adjacency lists (CSR layout), so the DFS below visits boxes in the same order as before
+  nodes = np.concatenate([first, second])
+  neighbors = np.concatenate([second, first])
+  order = np.lexsort((neighbors, nodes))
+  neighbors = neighbors[order].tolist()
+  bounds = np.concatenate([[0], np.cumsum(np.bincount(nodes, minlength=n))]).tolist()
   
   visited = [False] * n
   groups = []
@@ -82,7 +134,7 @@ def group_cards(boxes: List[List[float]], overlap_threshold: float = 0.1) -> Dic
         if not visited[node]:
           visited[node] = True
           group.append(node)
-          stack.extend(graph[node])
+          stack.extend(neighbors[bounds[node]:bounds[node + 1]])
 
       groups.append(group)
 
@@ -99,4 +151,4 @@ def group_cards(boxes: List[List[float]], overlap_threshold: float = 0.1) -> Dic
   if not dealer_hand:
     dealer_hand = None
 
-  return {"player_hands": player_hands, "dealer_hand": dealer_hand}
\ No newline at end of file
+  return {"player_hands": player_hands, "dealer_hand": dealer_hand}
@@ -7,13 +7,14 @@ out overlapping detections based on a specified overlap threshold.
 
 import numpy as np
 from ultralytics import YOLO
-from typing import List, Tuple
+from typing import Any, List, Tuple
 from detection.detection_utils import compute_overlap
+from evaluation.card_codes import NUM_CARDS
 from debugging.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-def run_inference(frame: np.ndarray, model: YOLO, overlap_threshold: float = 0.9) -> Tuple[List[List[float]], List[str], List[float]]:
+def run_inference(frame: np.ndarray, model: YOLO, overlap_threshold: float = 0.9) -> Tuple[List[List[float]], List[int], List[float]]:
   """
   Runs YOLO inference on the given frame, applies NMS, and returns filtered detections.
   
@@ -23,41 +24,84 @@ def run_inference(frame: np.ndarray, model: YOLO, overlap_threshold: float = 0.9
     overlap_threshold (float, optional): Overlap threshold for NMS. Defaults to 0.9.
   
   Returns:
-    tuple: (filtered_boxes, filtered_labels, filtered_confidences)
+    tuple: (filtered_boxes, filtered_labels, filtered_confidences), where labels are card codes
+    (see evaluation.card_codes.Card).
   """
   results = model(frame, show=False)  # Run inference on the frame
-  last_results = results[0]  # Get the latest results
+  boxes, labels, confidences = extract_detections(results[0])  # Get the latest results
+  
+  filtered_boxes, filtered_labels, filtered_confidences = apply_nms(boxes, labels, confidences, overlap_threshold)  # Apply NMS to filter detections
+  return filtered_boxes, filtered_labels, filtered_confidences
+
+def run_inference_batch(
+  frames: List[np.ndarray], model: YOLO,
+  overlap_threshold: float = 0.9
+) -> List[Tuple[List[List[float]], List[int], List[float]]]:
+  """
+  Runs YOLO inference on several frames in a single model call, applies NMS to each, and returns the filtered
+  detections per frame.
+
+  Parameters:
+    frames (list of numpy.ndarray): The input image frames; all must have the same size.
+    model (YOLO): A YOLO model instance configured for card detection.
+    overlap_threshold (float, optional): Overlap threshold for NMS. Defaults to 0.9.
+
+  Returns:
+    list: One (filtered_boxes, filtered_labels, filtered_confidences) tuple per frame, in input order.
+  """
+  if not frames:
+    return []
+
+  results = model(frames, show=False)  # One forward pass over the whole batch
+  detections = []
+
+  for result in results:
+    boxes, labels, confidences = extract_detections(result)
+    detections.append(apply_nms(boxes, labels, confidences, overlap_threshold))
+
+  return detections
+
+def extract_detections(result: Any) -> Tuple[List[List[float]], List[int], List[float]]:
+  """
+  Extracts boxes, card codes, and confidences from the YOLO result of one frame, before NMS.
+
+  Parameters:
+    result (ultralytics.engine.results.Results or None): The result of one frame.
+
+  Returns:
+    tuple: (boxes, labels, confidences), with detections of unknown classes dropped.
+  """
   boxes, labels, confidences = [], [], []  # Initialize lists for boxes, labels, and confidences
   
   # Extract boxes, labels, and confidences from the results
-  if last_results is not None and last_results.boxes is not None:
-    boxes = last_results.boxes.xyxy.cpu().numpy().tolist()
-    confidences = last_results.boxes.conf.cpu().numpy().tolist()
+  if result is not None and result.boxes is not None:
+    boxes_np = result.boxes.xyxy.cpu().numpy()
+    confidences_np = result.boxes.conf.cpu().numpy()
 
-    # Map class indices to card labels
-    if hasattr(last_results.boxes, 'cls'):
-      class_indices = last_results.boxes.cls.cpu().numpy().tolist()
+    # Class indices are the card codes; drop any detection outside the known classes
+    if hasattr(result.boxes, 'cls'):
+      class_indices = result.boxes.cls.cpu().numpy().astype(np.int32)
+      known = (class_indices >= 0) & (class_indices < NUM_CARDS)
 
-      card_map = {
-        0: "A", 1: "2", 2: "3", 3: "4", 4: "5", 5: "6",
-        6: "7", 7: "8", 8: "9", 9: "10", 10: "J", 11: "Q", 12: "K"
-      }
+      if not known.all():
+        logger.warning("Dropping %d detection(s) with unknown class", int((~known).sum()))
 
-      labels = [card_map.get(int(idx), "?") for idx in class_indices]
-  
-  filtered_boxes, filtered_labels, filtered_confidences = apply_nms(boxes, labels, confidences, overlap_threshold)  # Apply NMS to filter detections
-  return filtered_boxes, filtered_labels, filtered_confidences
+      boxes = boxes_np[known].tolist()
+      confidences = confidences_np[known].tolist()
+      labels = class_indices[known].tolist()
+
+  return boxes, labels, confidences
 
 def apply_nms(
-  boxes: List[List[float]], labels: List[str],
+  boxes: List[List[float]], labels: List[int],
   confidences: List[float], overlap_threshold: float
-) -> Tuple[List[List[float]], List[str], List[float]]:
+) -> Tuple[List[List[float]], List[int], List[float]]:
   """
   Applies Non-Maximum Suppression (NMS) to remove overlapping bounding boxes.
   
   Parameters:
     boxes (list): List of bounding boxes in the format [x1, y1, x2, y2].
-    labels (list): List of labels corresponding to the boxes.
+    labels (list): List of card codes corresponding to the boxes.
     confidences (list): List of confidence scores for each bounding box.
     overlap_threshold (float): Overlap threshold above which a box is suppressed.
   
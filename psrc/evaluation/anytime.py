@@ -0,0 +1,279 @@
+"""
+Module for deadline-bounded (anytime) EV evaluation.
+
+This module provides the AnytimeEVEvaluator class. Given a deadline, it starts the exact EV calculation on a
+background thread and, while that runs, refines a Monte Carlo estimate of every action by sampling the rest of the
+shoe and playing it out with basic strategy (see simulation.simulator). When the exact value arrives in time it is
+returned and flagged as exact; otherwise the estimate is returned with a 95% confidence interval. An exact
+calculation that misses its deadline keeps running and its result is kept, so the same state is answered exactly
+on a later frame. Exact calculations still queued for states the table has moved on from are cancelled (see
+retain), so a run of slow states never builds a backlog.
+
+Estimates are available for hands against a single dealer card; splitting is only estimated for pairs. Hit and
+split estimates continue with basic strategy after the first action, so they slightly understate the EV of optimal
+play.
+"""
+
+import math
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Dict, List, Optional
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+from evaluation.card_codes import VALUE_INDEX, card_labels
+from evaluation.speculation import ACTIONS, memo_key
+from simulation.simulator import ShoeBatch, ShoeSimulator
+from simulation.strategies import DOUBLE, HIT, basic_strategy
+
+logger = setup_logger(__name__)
+
+Z_95 = 1.959964  # Two-sided 95% normal quantile
+
+_FIRST_BATCH = 256  # Samples in the first estimate; each later batch doubles, up to _MAX_BATCH
+_MAX_BATCH = 8192
+_MIN_BATCH = 32  # Refinement stops when less than this fits before the deadline
+_MIN_SAMPLED_CARDS = 26  # Smaller shoes are left to the exact calculation, which is fast on them
+
+class AnytimeEVEvaluator:
+  """
+  A class to evaluate blackjack actions within a deadline, from an exact calculation when it finishes in time and
+  from a progressively refined Monte Carlo estimate otherwise.
+  """
+
+  def __init__(
+    self, evaluator: Any, settings: DetectionSettings,
+    max_results: int = 10000, seed: Optional[int] = None
+  ) -> None:
+    """
+    Initialize the AnytimeEVEvaluator instance.
+
+    Parameters:
+      evaluator: An object with calculate_ev(action, deck, player_hand, dealer_hand), such as EVEngineWrapper or
+        SpeculativeEVPrecomputer, used for the exact values.
+      settings (DetectionSettings): Settings providing the table rules for the estimates.
+      max_results (int): The maximum number of exact calculations (finished or running) remembered.
+      seed (int, optional): Seed for the sampler.
+    """
+    self.evaluator = evaluator
+    self.settings = settings
+    self.max_results = max_results
+    self.simulator = ShoeSimulator(settings, basic_strategy())
+    self.rng = np.random.default_rng(seed)
+
+    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ev-exact")  # Exact calls run one at a time
+    self._exact: "OrderedDict[Any, Future]" = OrderedDict()
+
+  def evaluate(
+    self, actions: List[str], deck: np.ndarray,
+    player_hand: List[int], dealer_hand: List[int],
+    deadline: float
+  ) -> Dict[str, Dict[str, Any]]:
+    """
+    Evaluate several actions of one hand by the given deadline.
+
+    Parameters:
+      actions (list of str): The actions to evaluate ("stand", "hit", "double", "split").
+      deck (numpy.ndarray): The deck composition in engine value order, as returned by CardDeck.get_counts.
+      player_hand (list of int): The player's hand as card codes.
+      dealer_hand (list of int): The dealer's hand as card codes.
+      deadline (float): The time.monotonic() value by which to answer.
+
+    Returns:
+      dict: For each action that could be answered, a dict with the EV ("ev"), whether it is exact ("exact"), the
+      bounds of its 95% confidence interval ("low", "high"; equal to ev when exact) and the number of samples
+      behind an estimate ("samples"). Actions with neither an exact value nor an estimate by the deadline, and
+      actions whose exact calculation failed without an estimate to fall back on, are left out.
+    """
+    deck = np.array(deck, dtype=np.int32)  # Copied, since the caller's deck may change while the exact call runs
+    futures = {action: self._submit(action, deck, player_hand, dealer_hand) for action in actions}
+    estimates = {action: [0, 0.0, 0.0] for action in actions if self._can_estimate(action, deck, player_hand, dealer_hand)}
+    batch_size = _FIRST_BATCH
+
+    # Refine the estimates until every exact value is in or the deadline passes, always taking at least one batch
+    while estimates:
+      pending = [action for action in estimates if not futures[action].done()]
+      if not pending:
+        break
+
+      started = time.monotonic()
+
+      for action in pending:
+        results = self._sample(action, deck, player_hand, dealer_hand, batch_size)
+        estimate = estimates[action]
+        estimate[0] += results.size
+        estimate[1] += float(results.sum())
+        estimate[2] += float(np.dot(results, results))
+
+      # Grow the next batch, but only as far as fits in the time left
+      now = time.monotonic()
+      seconds_per_sample = (now - started) / (batch_size * len(pending))
+      batch_size = int(min(batch_size * 2, _MAX_BATCH, (deadline - now) / (seconds_per_sample * len(pending))))
+      if batch_size < _MIN_BATCH:
+        break
+
+    # Give the exact calculations of actions without an estimate the rest of the budget
+    responses = {}
+
+    for action in actions:
+      future = futures[action]
+
+      if action not in estimates:
+        future_timeout = max(deadline - time.monotonic(), 0.0)
+        try:
+          responses[action] = self._exact_response(future.result(timeout=future_timeout))
+        except TimeoutError:
+          logger.debug("No EV for '%s' by the deadline", action)
+        except Exception as e:
+          logger.error("Error evaluating action '%s' (%s): %s", action, card_labels(player_hand), e)
+        continue
+
+      if future.done() and future.exception() is None:
+        responses[action] = self._exact_response(future.result())
+      else:
+        responses[action] = self._estimate_response(*estimates[action])
+
+    return responses
+
+  def retain(self, deck: np.ndarray, player_hands: List[List[int]], dealer_hand: List[int]) -> None:
+    """
+    Cancel the queued exact calculations of every state but the current ones. A calculation already running is
+    left to finish, and its result is kept.
+
+    Parameters:
+      deck (numpy.ndarray): The current deck composition.
+      player_hands (list of lists): The current player hands as card codes.
+      dealer_hand (list of int): The current dealer hand as card codes.
+    """
+    current = {memo_key(action, deck, hand, dealer_hand) for hand in player_hands for action in ACTIONS}
+    cancelled = [key for key, future in self._exact.items() if key not in current and future.cancel()]
+
+    for key in cancelled:
+      del self._exact[key]
+
+    if cancelled:
+      logger.debug("Cancelled %d queued exact EV calculation(s) of earlier states", len(cancelled))
+
+  def _submit(self, action: str, deck: np.ndarray, player_hand: List[int], dealer_hand: List[int]) -> Future:
+    """
+    Start the exact calculation of a state, or return the one already started for it.
+
+    Parameters:
+      action (str): The action to evaluate.
+      deck (numpy.ndarray): The deck composition.
+      player_hand (list of int): The player's hand as card codes.
+      dealer_hand (list of int): The dealer's hand as card codes.
+
+    Returns:
+      concurrent.futures.Future: The exact calculation.
+    """
+    key = memo_key(action, deck, player_hand, dealer_hand)
+    future = self._exact.get(key)
+
+    if future is None:
+      future = self._executor.submit(self.evaluator.calculate_ev, action, deck, list(player_hand), list(dealer_hand))
+      self._exact[key] = future
+      if len(self._exact) > self.max_results:
+        self._exact.popitem(last=False)[1].cancel()  # Has no effect once the calculation has started
+    else:
+      self._exact.move_to_end(key)
+
+    return future
+
+  def _can_estimate(self, action: str, deck: np.ndarray, player_hand: List[int], dealer_hand: List[int]) -> bool:
+    """
+    Whether the sampler supports a state.
+
+    Parameters:
+      action (str): The action to evaluate.
+      deck (numpy.ndarray): The deck composition.
+      player_hand (list of int): The player's hand as card codes.
+      dealer_hand (list of int): The dealer's hand as card codes.
+
+    Returns:
+      bool: True if an estimate can be sampled.
+    """
+    if len(dealer_hand) != 1 or not player_hand or deck.sum() < _MIN_SAMPLED_CARDS:
+      return False
+    if action == "split":
+      return len(player_hand) == 2 and VALUE_INDEX[player_hand[0]] == VALUE_INDEX[player_hand[1]]
+    return action in ("stand", "hit", "double")
+
+  def _sample(
+    self, action: str, deck: np.ndarray,
+    player_hand: List[int], dealer_hand: List[int],
+    num_samples: int
+  ) -> np.ndarray:
+    """
+    Play an action out over random orderings of the remaining cards.
+
+    Parameters:
+      action (str): The action to evaluate.
+      deck (numpy.ndarray): The deck composition.
+      player_hand (list of int): The player's hand as card codes.
+      dealer_hand (list of int): The dealer's single card as a card code.
+      num_samples (int): The number of orderings to play.
+
+    Returns:
+      numpy.ndarray: The result of each sample, in units of the initial bet. Samples in which a peeking dealer
+      would have a natural are dropped, since the player only acts once the dealer has none.
+    """
+    batch = ShoeBatch(num_samples, 0, 1.0, self.rng, composition=deck)
+    rows = np.arange(num_samples)
+    values = VALUE_INDEX[list(player_hand)]
+
+    batch.hands[:, 0, :values.size] = values
+    batch.num_cards[:, 0] = values.size
+    batch.base[:, 0] = int(values.sum()) + values.size  # Value indices are one less than blackjack values
+    batch.has_ace[:, 0] = bool(np.any(values == 0))
+    batch.bets[:, 0] = 1.0
+    batch.upcard[:] = VALUE_INDEX[dealer_hand[0]]
+    batch.hole[:] = batch.draw(rows)
+
+    if action == "split":
+      self.simulator.play_split(batch, rows)
+    elif action != "stand":
+      self.simulator.play_hand(batch, rows, 0, np.full(num_samples, DOUBLE if action == "double" else HIT))
+    self.simulator.settle(batch, rows)
+
+    results = batch.results
+    if self.settings.dealer_peaks_for_21:
+      dealer_natural = (batch.upcard + batch.hole == 9) & ((batch.upcard == 0) | (batch.hole == 0))
+      results = results[~dealer_natural]
+
+    return results
+
+  @staticmethod
+  def _exact_response(ev: float) -> Dict[str, Any]:
+    """
+    Parameters:
+      ev (float): An exact EV.
+
+    Returns:
+      dict: The response for an exact value.
+    """
+    ev = float(ev)
+    return {"ev": ev, "exact": True, "low": ev, "high": ev, "samples": 0}
+
+  @staticmethod
+  def _estimate_response(n: int, total: float, total_sq: float) -> Dict[str, Any]:
+    """
+    Parameters:
+      n (int): The number of samples.
+      total (float): The sum of the sampled results.
+      total_sq (float): The sum of the squared sampled results.
+
+    Returns:
+      dict: The response for an estimate, with a normal 95% confidence interval.
+    """
+    mean = total / n if n else 0.0
+    variance = max(total_sq - n * mean * mean, 0.0) / (n - 1) if n > 1 else math.inf
+    half_width = Z_95 * math.sqrt(variance / n) if n else math.inf
+    return {"ev": mean, "exact": False, "low": mean - half_width, "high": mean + half_width, "samples": n}
+
+  def shutdown(self) -> None:
+    """
+    Stop accepting exact calculations. A calculation already running is left to finish.
+    """
+    self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,95 @@
+"""
+Module for integer card codes.
+
+This module defines the Card enumeration, whose values match the YOLO model's class indices, along with NumPy
+lookup tables indexed by card code for the rank label, blackjack value, EV engine value index, and Hi-Lo weight.
+Tables indexed by value index (the EV engine's value order: A, 2-9, 10-valued) are defined here as well, for the
+deck compositions kept in that order. Cards travel through the pipeline as these codes; string labels are produced
+only for annotation and logging.
+"""
+
+import numpy as np
+from enum import IntEnum
+from typing import Iterable, List
+
+class Card(IntEnum):
+  """
+  Integer codes for the thirteen card ranks, in the order of the detection model's classes.
+  """
+  ACE = 0
+  TWO = 1
+  THREE = 2
+  FOUR = 3
+  FIVE = 4
+  SIX = 5
+  SEVEN = 6
+  EIGHT = 7
+  NINE = 8
+  TEN = 9
+  JACK = 10
+  QUEEN = 11
+  KING = 12
+
+NUM_CARDS = len(Card)
+
+RANK_LABELS = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]  # Display label per card code
+
+BLACKJACK_VALUES = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10], dtype=np.int32)  # Aces counted as 1
+
+VALUE_INDEX = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9, 9], dtype=np.intp)  # Slot in the engine's value order
+
+HI_LO_WEIGHTS = np.array([-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1], dtype=np.int32)
+
+NUM_VALUES = 10  # Number of distinct card values tracked by the EV engine (A, 2-9, 10-valued)
+
+# Value indices 0-9 coincide with the card codes of A through 10, so the value tables are prefixes of the card tables
+VALUE_LABELS = RANK_LABELS[:NUM_VALUES]  # Display label per value index
+VALUE_BLACKJACK_VALUES = BLACKJACK_VALUES[:NUM_VALUES]  # Blackjack value per value index
+VALUE_HI_LO_WEIGHTS = HI_LO_WEIGHTS[:NUM_VALUES]  # Hi-Lo weight per value index
+CARDS_PER_DECK = 4 * np.bincount(VALUE_INDEX, minlength=NUM_VALUES).astype(np.int32)  # Copies of each value in one deck
+
+_LABEL_CODES = {label: code for code, label in enumerate(RANK_LABELS)}
+
+def card_label(code: int) -> str:
+  """
+  Convert a card code into its display label.
+
+  Parameters:
+    code (int): A card code (0-12).
+
+  Returns:
+    str: The rank label (e.g., "A", "10", "K"), or "?" for an unknown code.
+  """
+  return RANK_LABELS[code] if 0 <= code < NUM_CARDS else "?"
+
+def card_labels(codes: Iterable[int]) -> List[str]:
+  """
+  Convert a sequence of card codes into display labels.
+
+  Parameters:
+    codes (iterable of int): Card codes.
+
+  Returns:
+    list of str: The rank label for each code.
+  """
+  return [card_label(int(code)) for code in codes]
+
+def card_code(label: str) -> int:
+  """
+  Convert a display label into its card code.
+
+  Parameters:
+    label (str): A rank label (e.g., "A", "10", "K"); case-insensitive.
+
+  Returns:
+    int: The card code.
+
+  Raises:
+    ValueError: If the label is not a known rank.
+  """
+  code = _LABEL_CODES.get(label.upper())
+
+  if code is None:
+    raise ValueError(f"Unknown card label: {label}")
+
+  return code
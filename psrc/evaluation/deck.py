@@ -1,108 +1,242 @@
 """
 Module for managing a deck of playing cards.
 
-This module provides a CardDeck class that tracks the count of each card in a standard deck. Each card 
-(A, 2-10, J, Q, K) is initialized with 4 copies (scaled by deck size). The class maintains a running count using
-the Hi-Lo system and offers methods for removing a card, retrieving the current counts of cards, and getting both
-the running and true counts.
+This module provides a CardDeck class that tracks the count of each card value in a shoe. Counts are held in a
+NumPy int32 array in the EV engine's value order (A, 2-9, 10-valued), so the composition can be handed to the
+engine as a single buffer. The class maintains the running count (Hi-Lo) and the number of remaining cards
+incrementally, and offers methods for removing single cards, adding or removing cards in bulk, resetting the
+shoe, and retrieving the counts and the running and true counts. Every change can be reported to a journal (see
+replay.shoe_journal), from which the shoe is restored after a restart.
 """
 
+import numpy as np
 from typing import Dict
 from debugging.logger import setup_logger
+from evaluation.card_codes import (
+  CARDS_PER_DECK, NUM_CARDS, NUM_VALUES, VALUE_HI_LO_WEIGHTS, VALUE_INDEX, VALUE_LABELS, card_label
+)
 
 logger = setup_logger(__name__)
 
-_CARD_LABELS = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
-
-_HI_LO_VALUES = {
-  "2": 1,
-  "3": 1,
-  "4": 1,
-  "5": 1,
-  "6": 1,
-  "7": 0,
-  "8": 0,
-  "9": 0,
-  "10": -1,
-  "J": -1,
-  "Q": -1,
-  "K": -1,
-  "A": -1
-}
-
 class CardDeck:
   def __init__(self, size: int) -> None:
     """
-    Initializes a new CardDeck with a standard count for each card.
+    Initializes a new CardDeck with a standard count for each card value.
 
     Parameters:
       size (int): The number of decks combined (each deck has 52 cards).
-    
+
     Attributes:
       size (int): The number of decks combined (each deck has 52 cards).
-      cards (dict): A dictionary mapping card labels (e.g., "A", "2", ..., "K") to their counts.
       running_count (int): The current running count, updated incrementally on each card removal.
+      remaining (int): The number of cards left in the shoe, updated incrementally on each card removal.
+      version (int): Incremented on every change to the counts, so consumers can detect that the deck advanced.
+      shoe (int): Incremented on every reset, so consumers can detect a reshuffle.
+      journal (ShoeJournal or None): Notified of every change after construction, when set.
     """
     self.size = size
-    self.cards = {label: 4 * size for label in _CARD_LABELS}
+    self._counts = np.empty(NUM_VALUES, dtype=np.int32)
+    self._view = self._counts.view()
+    self._view.flags.writeable = False
     self.running_count = 0
+    self.remaining = 0
+    self.version = 0
+    self.shoe = -1
+    self.journal = None
+    self._refill()
     logger.info("Initialized CardDeck with %d deck(s)", size)
 
-  def remove_card(self, card_label: str) -> bool:
+  def reset(self) -> None:
+    """
+    Restores the deck to a full shoe and clears the running count.
+
+    The counts are rewritten in place, so views previously returned by get_counts remain valid.
+    """
+    self._refill()
+    logger.info("Reset CardDeck to %d card(s)", self.remaining)
+
+    if self.journal is not None:
+      self.journal.reshuffled()
+
+  def _refill(self) -> None:
+    """
+    Fills the shoe, clears the running count, and starts the next shoe number.
+    """
+    np.multiply(CARDS_PER_DECK, self.size, out=self._counts)
+    self.running_count = 0
+    self.remaining = int(self._counts.sum())
+    self.version += 1
+    self.shoe += 1
+
+  def restore(self, counts: np.ndarray, shoe: int) -> None:
+    """
+    Restores a shoe in progress, e.g. from a journal after a restart. The running count and the number of
+    remaining cards are derived from the counts. The change is not reported to the journal.
+
+    Parameters:
+      counts (array-like of int): The per-value counts in engine value order (length NUM_VALUES).
+      shoe (int): The shoe number.
+
+    Raises:
+      ValueError: If counts has the wrong shape, contains negative values, or exceeds a full shoe.
+    """
+    counts = self._validate_delta(counts)
+    full = CARDS_PER_DECK * self.size
+
+    if np.any(counts > full):
+      raise ValueError(f"Cannot restore counts {counts.tolist()} in a {self.size}-deck shoe")
+
+    self._counts[:] = counts
+    self.running_count = int(np.dot(VALUE_HI_LO_WEIGHTS, full - counts))
+    self.remaining = int(counts.sum())
+    self.version += 1
+    self.shoe = int(shoe)
+    logger.info("Restored CardDeck to %d card(s) in shoe %d (running count %d)", self.remaining, self.shoe, self.running_count)
+
+  def remove_card(self, card: int) -> bool:
     """
     Removes one instance of the specified card from the deck and updates the running count.
-    
+
     If the card is available (i.e., count > 0), its count is decremented by one and the running count is updated
     using the Hi-Lo system. If the card is not available, no changes are made.
-    
+
     Parameters:
-      card_label (str): The label of the card to remove (e.g., "A", "10", "K").
-      
+      card (int): The code of the card to remove (see evaluation.card_codes.Card).
+
     Returns:
       bool: True if a card was successfully removed, False otherwise.
     """
     # Check if the card is available in the deck
-    if card_label in self.cards and self.cards[card_label] > 0:
-      self.cards[card_label] -= 1  # Decrement the card count by one
-      self.running_count += _HI_LO_VALUES.get(card_label, 0)  # Update the running count
-      logger.info("Removed card: %s", card_label)
+    if 0 <= card < NUM_CARDS and self._counts[VALUE_INDEX[card]] > 0:
+      value = VALUE_INDEX[card]
+      self._counts[value] -= 1  # Decrement the card count by one
+      self.remaining -= 1
+      self.version += 1
+      self.running_count += int(VALUE_HI_LO_WEIGHTS[value])  # Update the running count
+      logger.info("Removed card: %s", card_label(card))
+
+      if self.journal is not None:
+        self.journal.card_removed(card)
       return True
     else:
-      logger.warning("Failed to remove card: %s (card not available)", card_label)
+      logger.warning("Failed to remove card: %s (card not available)", card_label(card))
       return False
-  
-  def get_counts(self) -> Dict[str, int]:
+
+  def remove_cards(self, counts: np.ndarray) -> None:
+    """
+    Removes several cards at once, given as per-value counts in engine value order.
+
+    Parameters:
+      counts (array-like of int): Number of cards to remove for each value index (length NUM_VALUES).
+
+    Raises:
+      ValueError: If counts has the wrong shape, contains negative values, or exceeds the cards available.
+    """
+    delta = self._validate_delta(counts)
+
+    if np.any(delta > self._counts):
+      raise ValueError(f"Cannot remove {delta.tolist()} from deck with counts {self._counts.tolist()}")
+
+    self._counts -= delta
+    self.remaining -= int(delta.sum())
+    self.version += 1
+    self.running_count += int(np.dot(VALUE_HI_LO_WEIGHTS, delta))
+    logger.info("Removed %d card(s) in bulk", int(delta.sum()))
+
+    if self.journal is not None:
+      self.journal.cards_removed(delta)
+
+  def add_cards(self, counts: np.ndarray) -> None:
     """
-    Retrieves a copy of the current card counts in the deck.
-    
+    Returns several cards to the deck at once, given as per-value counts in engine value order.
+
+    This is intended for correcting misdetections; the running count is reverted accordingly.
+
+    Parameters:
+      counts (array-like of int): Number of cards to add for each value index (length NUM_VALUES).
+
+    Raises:
+      ValueError: If counts has the wrong shape, contains negative values, or would exceed a full shoe.
+    """
+    delta = self._validate_delta(counts)
+
+    if np.any(self._counts + delta > CARDS_PER_DECK * self.size):
+      raise ValueError(f"Cannot add {delta.tolist()} to deck with counts {self._counts.tolist()}")
+
+    self._counts += delta
+    self.remaining += int(delta.sum())
+    self.version += 1
+    self.running_count -= int(np.dot(VALUE_HI_LO_WEIGHTS, delta))
+    logger.info("Added %d card(s) in bulk", int(delta.sum()))
+
+    if self.journal is not None:
+      self.journal.cards_added(delta)
+
+  def get_counts(self) -> np.ndarray:
+    """
+    Retrieves a read-only view of the current card counts in the deck.
+
+    The view shares memory with the deck, so it reflects later removals without being fetched again.
+
+    Returns:
+      numpy.ndarray: An int32 array of length NUM_VALUES in engine value order (A, 2-9, 10-valued).
+    """
+    return self._view
+
+  def get_labeled_counts(self) -> Dict[str, int]:
+    """
+    Retrieves the current card counts keyed by value label, for logging and display.
+
     Returns:
-      dict: A dictionary containing the card counts, with card labels as keys.
+      dict: A dictionary mapping value labels ("A", "2", ..., "10") to their counts.
     """
-    return self.cards.copy()
-  
+    return dict(zip(VALUE_LABELS, self._counts.tolist()))
+
   def get_running_count(self) -> int:
     """
     Retrieves the current running count of the deck.
-    
+
     Returns:
       int: The current running count, updated using the Hi-Lo system.
     """
     return self.running_count
-  
+
   def get_true_count(self) -> float:
     """
     Calculates the true count of the deck.
-    
+
     The true count is defined as the running count divided by the number of decks remaining. The number of decks
     remaining is computed as the total remaining cards divided by 52.
-    
+
     Returns:
       float: The true count if decks remain, otherwise the running count.
     """
-    remaining_cards = sum(self.cards.values())
-    decks_remaining = remaining_cards / 52.0
+    decks_remaining = self.remaining / 52.0
 
     if decks_remaining > 0:
       return self.running_count / decks_remaining
     else:
-      return self.running_count
\ No newline at end of file
+      return self.running_count
+
+  def _validate_delta(self, counts: np.ndarray) -> np.ndarray:
+    """
+    Converts a bulk update to an int32 array and checks its shape and sign.
+
+    Parameters:
+      counts (array-like of int): Per-value counts in engine value order.
+
+    Returns:
+      numpy.ndarray: The counts as an int32 array.
+
+    Raises:
+      ValueError: If counts has the wrong shape or contains negative values.
+    """
+    delta = np.asarray(counts, dtype=np.int32)
+
+    if delta.shape != (NUM_VALUES,):
+      raise ValueError(f"Expected {NUM_VALUES} per-value counts, got shape {delta.shape}")
+
+    if np.any(delta < 0):
+      raise ValueError(f"Per-value counts cannot be negative: {delta.tolist()}")
+
+    return delta
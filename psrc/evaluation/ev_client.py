@@ -0,0 +1,231 @@
+"""
+Module for calculating EVs through the local EV service.
+
+This module provides the EVServiceClient class, a drop-in replacement for EVEngineWrapper that sends requests to
+an evaluation.ev_service process over its Unix socket instead of embedding a JVM. Connections are pooled and
+shared by threads, and batches of requests are pipelined over one connection, so a batch costs one round trip
+rather than one per request.
+"""
+
+import itertools
+import queue
+import socket
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+from evaluation import ev_protocol
+from evaluation.deck import CardDeck
+
+logger = setup_logger(__name__)
+
+class EVServiceClient:
+  """
+  A client for the EV service with the interface of EVEngineWrapper.
+  """
+
+  def __init__(
+    self, settings: DetectionSettings, socket_path: str,
+    pool_size: int = 4, timeout: float = 30.0
+  ) -> None:
+    """
+    Initialize the EVServiceClient instance. Connections are opened on first use.
+
+    Parameters:
+      settings (DetectionSettings): Settings providing the table rules sent with every request.
+      socket_path (str): The path of the service's Unix socket.
+      pool_size (int): The maximum number of open connections; further callers wait for a free one.
+      timeout (float): Seconds to wait for a response before the connection is dropped.
+    """
+    self.settings = settings
+    self.socket_path = socket_path
+    self.pool_size = max(int(pool_size), 1)
+    self.timeout = timeout
+    self.rules = ev_protocol.encode_rules(settings)
+
+    self._idle: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()  # Most recently used first, so spare connections idle out together
+    self._slots = threading.BoundedSemaphore(self.pool_size)
+    self._ids = itertools.count(1)
+    self._closed = False
+
+  @contextmanager
+  def _connection(self) -> Iterator[socket.socket]:
+    """
+    Check out a pooled connection, opening one if none is idle. A connection that fails during use is closed
+    instead of being returned to the pool.
+
+    Yields:
+      socket.socket: A connected socket.
+    """
+    self._slots.acquire()
+    sock = None
+    try:
+      try:
+        sock = self._idle.get_nowait()
+      except queue.Empty:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+
+      yield sock
+
+      self._idle.put(sock)
+      sock = None
+    finally:
+      if sock is not None:
+        sock.close()
+      self._slots.release()
+
+  def _next_id(self) -> int:
+    """
+    Returns:
+      int: A new request id, wrapped to the uint32 range of the protocol.
+    """
+    return next(self._ids) & 0xFFFFFFFF
+
+  def _exchange(self, requests: List[Tuple[int, int, bytes]]) -> List[Any]:
+    """
+    Send requests pipelined over one connection and read their responses, retrying once on a fresh connection if
+    a pooled connection turns out to be closed. Every response must echo the id of the request it is matched with;
+    otherwise the stream is out of sync and the connection is dropped rather than results being misassigned.
+
+    Parameters:
+      requests (list): The operation, request id and encoded message of each request.
+
+    Returns:
+      list: The decoded result of each request, in order.
+
+    Raises:
+      ConnectionError: If the service cannot be reached or its responses do not match the requests.
+      RuntimeError: If the service reported an error for any request.
+    """
+    if self._closed:
+      raise RuntimeError("EV service client is shut down")
+
+    for attempt in range(2):
+      try:
+        with self._connection() as sock:
+          sock.sendall(b"".join(message for _, _, message in requests))
+          payloads = []
+          for _, request_id, _ in requests:
+            payload = ev_protocol.read_message(sock)
+            if payload is None:
+              raise ConnectionError("EV service closed the connection")
+            try:
+              answered = ev_protocol.response_id(payload)
+            except ValueError as e:
+              raise ConnectionError(str(e)) from e
+            if answered != request_id:
+              raise ConnectionError(f"EV service answered request {answered} in place of {request_id}")
+            payloads.append(payload)
+        break
+      except (ConnectionError, socket.timeout, OSError) as e:
+        if attempt:
+          raise ConnectionError(f"EV service unavailable at {self.socket_path}: {e}") from e
+        logger.warning("Reconnecting to EV service: %s", e)
+
+    return [ev_protocol.decode_response(payload, op)[1] for (op, _, _), payload in zip(requests, payloads)]
+
+  def calculate_ev(
+    self, action: str,
+    deck: np.ndarray, player_hand: List[int],
+    dealer_hand: List[int]
+  ) -> float:
+    """
+    Calculate the expected value (EV) of one action through the service.
+
+    Parameters:
+      action (str): The game action for which to calculate EV (e.g., "stand", "hit", "double", "split").
+      deck (numpy.ndarray): The deck composition in engine value order, as returned by CardDeck.get_counts.
+      player_hand (list of int): The player's hand represented as a list of card codes.
+      dealer_hand (list of int): The dealer's hand represented as a list of card codes.
+
+    Returns:
+      float: The expected value.
+
+    Raises:
+      ValueError: If the action is not one of the supported actions.
+    """
+    return self.calculate_evs([action], deck, player_hand, dealer_hand)[action]
+
+  def calculate_evs(
+    self, actions: Sequence[str],
+    deck: np.ndarray, player_hand: List[int],
+    dealer_hand: List[int]
+  ) -> Dict[str, float]:
+    """
+    Calculate the EVs of several actions of one hand in a single request.
+
+    Parameters:
+      actions (sequence of str): The actions to evaluate.
+      deck (numpy.ndarray): The deck composition in engine value order.
+      player_hand (list of int): The player's hand as card codes.
+      dealer_hand (list of int): The dealer's hand as card codes.
+
+    Returns:
+      dict: The EV per action.
+
+    Raises:
+      ValueError: If an action is not one of the supported actions.
+    """
+    return self.calculate_batch([(actions, deck, player_hand, dealer_hand)])[0]
+
+  def calculate_batch(
+    self, requests: Sequence[Tuple[Sequence[str], np.ndarray, List[int], List[int]]]
+  ) -> List[Dict[str, float]]:
+    """
+    Calculate the EVs of several hands, pipelined over one connection.
+
+    Parameters:
+      requests (sequence): (actions, deck, player_hand, dealer_hand) per hand.
+
+    Returns:
+      list of dict: The EV per action of each hand, in order.
+
+    Raises:
+      ValueError: If an action is not one of the supported actions.
+    """
+    if not requests:
+      return []
+
+    messages = []
+    for actions, deck, player_hand, dealer_hand in requests:
+      request_id = self._next_id()
+      messages.append((
+        ev_protocol.OP_EV, request_id,
+        ev_protocol.encode_ev_request(request_id, self.rules, actions, deck, player_hand, dealer_hand)
+      ))
+    return self._exchange(messages)
+
+  def sync_deck(self, deck: CardDeck) -> None:
+    """
+    Kept for compatibility with EVEngineWrapper. The service cache is shared by tables at different points of
+    their shoes, so it is not cleared or pruned for any one of them.
+
+    Parameters:
+      deck (CardDeck): The deck being evaluated against.
+    """
+
+  def cache_stats(self) -> Dict[str, Any]:
+    """
+    Retrieve statistics about the service's cache namespace of this client's rules.
+
+    Returns:
+      dict: The statistics returned by EVEngineWrapper.cache_stats in the service.
+    """
+    request_id = self._next_id()
+    message = ev_protocol.encode_stats_request(request_id, self.rules)
+    return self._exchange([(ev_protocol.OP_STATS, request_id, message)])[0]
+
+  def shutdown(self) -> None:
+    """
+    Close the pooled connections. The service and its cache keep running.
+    """
+    self._closed = True
+    while True:
+      try:
+        self._idle.get_nowait().close()
+      except queue.Empty:
+        break
@@ -3,38 +3,56 @@ Module for interfacing with a Java-based EV (Expected Value) Engine using JPype.
 
 This module provides the EVEngineWrapper class, which manages the Java Virtual Machine (JVM) lifecycle, loads the
 EV engine from a specified JAR file, and calculates expected values for various blackjack actions (e.g., stand,
-hit, double, split).
+hit, double, split). Each wrapper carries its own table rules, while engine instances are shared per process, so
+tables with different rules are served by one warm JVM and engine. Calls into a shared engine are serialized by a
+lock kept alongside it, since the engine is not thread-safe and tables may be served from different threads.
 """
 
+import threading
 import jpype
-from typing import Dict, List
+import numpy as np
+from typing import Any, Dict, List, Tuple
+from config.detection_settings import DetectionSettings
 from debugging.logger import setup_logger
-from evaluation.jpype_utils import deck_to_java_array, hand_to_java_array_list
+from evaluation.deck import NUM_VALUES, CardDeck
+from evaluation.jpype_utils import fill_java_array, hand_to_java_array_list
 
 logger = setup_logger(__name__)
 
+_ENGINE_POOL: Dict[Tuple[str, int, int], Any] = {}  # Shared engine instances keyed by class and cache limits
+_ENGINE_LOCKS: Dict[Tuple[str, int, int], threading.Lock] = {}  # One lock per shared engine, keyed like the pool
+
 class EVEngineWrapper:
   """
   A wrapper class for interacting with the Java-based EV Engine.
 
   This class manages the lifecycle of the Java Virtual Machine (JVM), loads the EV engine
   from the specified JAR file, and exposes a method to calculate the expected value for different
-  game actions (stand, hit, double, split).
+  game actions (stand, hit, double, split). It also keeps the engine's cache in step with the shoe.
   """
   def __init__(
-    self, jar_path: str = "java/build/EVEngine.jar",
-    java_class: str = "evaluation.EVEngine"
+    self, settings: DetectionSettings,
+    jar_path: str = "java/build/EVEngine.jar",
+    shared_cache: bool = False
   ) -> None:
     """
     Initialize the EVEngineWrapper instance.
 
     Parameters:
+      settings (DetectionSettings): Settings providing the table rules, the Java EV calculator class
+        (ev_engine_class, e.g. "evaluation.EVEngine" or "evaluation.IterativeEVSolver") and its cache limits.
       jar_path (str): The path to the JAR file containing the EV engine.
-      java_class (str): The fully qualified Java class name of the EV engine.
+      shared_cache (bool): Whether the cache namespace of these rules is shared with other tables in this process,
+        e.g. the tables of a frame server. A shared namespace is never cleared or pruned by sync_deck, since the
+        tables are at different points of their shoes; it is bounded by the cache size limits instead.
     """
+    self.settings = settings
     self.jar_path = jar_path
-    self.java_class = java_class
+    self.shared_cache = shared_cache
+    self.java_class = settings.ev_engine_class
     self.started = False
+    self._synced_shoe = None
+    self._synced_version = None
     self._start_jvm()
 
   def _start_jvm(self) -> None:
@@ -42,7 +60,8 @@ class EVEngineWrapper:
     Start the Java Virtual Machine (JVM) and initialize the EV engine.
 
     Checks if the JVM is already started; if not, it starts the JVM using the provided classpath. After the JVM
-    is running, the EV engine Java class is loaded, and an instance is created.
+    is running, the table rules are built from the settings, and an engine instance is taken from the shared pool,
+    or created with these rules as its defaults if none exists yet for the class and cache limits.
     """
     # Check if the JVM is already started to avoid multiple initializations
     if not jpype.isJVMStarted():
@@ -51,14 +70,29 @@ class EVEngineWrapper:
     else:
       logger.info("JVM already started")
 
-    self.EVEngineClass = jpype.JClass(self.java_class)  # Load the EV engine Java class using its fully qualified name
-    self.ev_engine = self.EVEngineClass()
+    self.rules = build_java_rules(self.settings)
+    pool_key = (self.java_class, self.settings.ev_cache_max_entries, self.settings.ev_cache_max_bytes)
+
+    # Reuse a warm engine when one exists; rules are passed on every call and caches are namespaced by rules
+    if pool_key not in _ENGINE_POOL:
+      EVEngineClass = jpype.JClass(self.java_class)  # Load the EV engine Java class using its fully qualified name
+      _ENGINE_POOL[pool_key] = EVEngineClass(
+        self.rules, jpype.JInt(self.settings.ev_cache_max_entries), jpype.JLong(self.settings.ev_cache_max_bytes)
+      )
+      _ENGINE_LOCKS[pool_key] = threading.Lock()
+      logger.info("Created %s engine", self.java_class)
+    else:
+      logger.info("Reusing %s engine", self.java_class)
+
+    self.ev_engine = _ENGINE_POOL[pool_key]
+    self._engine_lock = _ENGINE_LOCKS[pool_key]
+    self._value_counts_java = jpype.JArray(jpype.JInt)(NUM_VALUES)  # Reused for every call; the engine restores it after recursing
     self.started = True
 
   def calculate_ev(
     self, action: str,
-    deck: Dict[str, int], player_hand: List[str],
-    dealer_hand: List[str]
+    deck: np.ndarray, player_hand: List[int],
+    dealer_hand: List[int]
   ) -> float:
     """
     Calculate the expected value (EV) for a given game action using the EV engine.
@@ -68,9 +102,9 @@ class EVEngineWrapper:
 
     Parameters:
       action (str): The game action for which to calculate EV (e.g., "stand", "hit", "double", "split").
-      deck (dict): A dictionary representing the deck composition.
-      player_hand (list of str): The player's hand represented as a list of card strings.
-      dealer_hand (list of str): The dealer's hand represented as a list of card strings.
+      deck (numpy.ndarray): The deck composition in engine value order, as returned by CardDeck.get_counts.
+      player_hand (list of int): The player's hand represented as a list of card codes.
+      dealer_hand (list of int): The dealer's hand represented as a list of card codes.
 
     Returns:
       The expected value calculated by the EV engine.
@@ -89,19 +123,92 @@ class EVEngineWrapper:
     if action not in method_mapping:
       raise ValueError(f"Unknown action: {action}")
 
-    value_counts_java = deck_to_java_array(deck)
     player_hand_java = hand_to_java_array_list(player_hand)
     dealer_hand_java = hand_to_java_array_list(dealer_hand)
 
-    ev = method_mapping[action](value_counts_java, player_hand_java, dealer_hand_java)  # Retrieve the appropriate EV calculation method based on the action and execute it
+    with self._engine_lock:
+      value_counts_java = fill_java_array(self._value_counts_java, deck)
+      ev = method_mapping[action](self.rules, value_counts_java, player_hand_java, dealer_hand_java)  # Retrieve the appropriate EV calculation method based on the action and execute it
     return ev
 
+  def sync_deck(self, deck: CardDeck) -> None:
+    """
+    Bring the engine cache in step with the deck before evaluating.
+
+    Only the cache namespace of this wrapper's rules is touched. A new shoe clears the cache. Otherwise, if cards have been dealt since the last sync, every cached state that
+    holds more of some value than the deck is pruned, since cards are only removed within a shoe. Syncing once per
+    evaluation batches the pruning of all cards locked since the previous one. Nothing is done for a shared cache.
+
+    Parameters:
+      deck (CardDeck): The deck being evaluated against.
+    """
+    if self.shared_cache:
+      return
+
+    if deck.shoe != self._synced_shoe:
+      with self._engine_lock:
+        self.ev_engine.onReshuffle(self.rules)
+      logger.info("EV cache cleared for shoe %d", deck.shoe)
+    elif deck.version != self._synced_version:
+      with self._engine_lock:
+        removed = self.ev_engine.onDeckUpdated(self.rules, fill_java_array(self._value_counts_java, deck.get_counts()))
+      logger.debug("EV cache pruned %d unreachable state(s)", removed)
+
+    self._synced_shoe = deck.shoe
+    self._synced_version = deck.version
+
+  def cache_stats(self) -> Dict[str, Any]:
+    """
+    Retrieve statistics about the engine cache namespace of this wrapper's rules.
+
+    Returns:
+      dict: The number of cached entries, the effective capacity, the estimated size in bytes, hit and miss
+      counts, the hit rate, and the number of states evicted by the size limits or pruned as the shoe advanced.
+    """
+    with self._engine_lock:
+      cache = self.ev_engine.getCache(self.rules)
+      return {
+        "entries": int(cache.size()),
+        "capacity": int(cache.getCapacity()),
+        "estimated_bytes": int(cache.getEstimatedBytes()),
+        "hits": int(cache.getHits()),
+        "misses": int(cache.getMisses()),
+        "hit_rate": float(cache.getHitRate()),
+        "evictions": int(cache.getEvictions()),
+        "pruned": int(cache.getPruned())
+      }
+
   def shutdown(self) -> None:
     """
     Shutdown the Java Virtual Machine (JVM).
 
-    Safely shuts down the JVM if it is running, ensuring that all resources are properly released.
+    Safely shuts down the JVM if it is running, ensuring that all resources are properly released. The JVM cannot
+    be restarted in-process, so this should only be called once every table in the process is done.
     """
     if jpype.isJVMStarted():
+      _ENGINE_POOL.clear()
+      _ENGINE_LOCKS.clear()
       jpype.shutdownJVM()
       logger.info("JVM shutdown")
+
+def build_java_rules(settings: DetectionSettings) -> Any:
+  """
+  Build a Java GameSettings rule set from the game settings of a configuration.
+
+  Parameters:
+    settings (DetectionSettings): Settings holding the table rules.
+
+  Returns:
+    evaluation.GameSettings: An immutable Java rule set, comparable by value.
+  """
+  GameSettings = jpype.JClass("evaluation.GameSettings")
+  return GameSettings(
+    jpype.JDouble(settings.blackjack_odds),
+    settings.can_surrender,
+    settings.dealer_hits_on_soft_17,
+    settings.dealer_peaks_for_21,
+    settings.natural_blackjack_splits,
+    settings.double_after_split,
+    settings.hit_split_aces,
+    settings.double_split_aces
+  )
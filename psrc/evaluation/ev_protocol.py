@@ -0,0 +1,290 @@
+"""
+Module for the binary message format of the EV service.
+
+Messages are length-prefixed: a little-endian uint32 byte count followed by the payload. Every request payload
+starts with a uint32 request id and a uint8 operation, and every response payload with the request id it answers
+and a uint8 status. Responses on a connection come back in request order, so clients may pipeline requests.
+
+An EV request (OP_EV) carries the table rules, the deck composition as NUM_VALUES uint16 counts in engine value
+order, the player and dealer hands as length-prefixed uint8 card codes, and a uint8 bit mask of the actions to
+evaluate (bit i for ACTIONS[i]). A successful response holds the mask followed by one float64 EV per set bit, in
+action order. A stats request (OP_STATS) carries the rules and is answered with the cache statistics as UTF-8
+JSON. Failed requests are answered with STATUS_ERROR and a UTF-8 message.
+
+Rules are encoded as the float64 blackjack payout followed by a uint8 with one bit per rule flag of RULE_FLAGS.
+"""
+
+import json
+import socket
+import struct
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from config.detection_settings import DetectionSettings
+from evaluation.deck import NUM_VALUES
+
+ACTIONS = ["stand", "hit", "double", "split"]
+ACTION_BITS = {action: 1 << i for i, action in enumerate(ACTIONS)}
+
+RULE_FLAGS = [
+  "can_surrender",
+  "dealer_hits_on_soft_17",
+  "dealer_peaks_for_21",
+  "natural_blackjack_splits",
+  "double_after_split",
+  "hit_split_aces",
+  "double_split_aces"
+]
+
+OP_EV = 1
+OP_STATS = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+MAX_MESSAGE_BYTES = 1 << 20  # Larger length prefixes are treated as a corrupt stream
+
+_LENGTH = struct.Struct("<I")
+_HEADER = struct.Struct("<IB")  # Request id, operation or status
+_RULES = struct.Struct("<dB")  # Blackjack payout, rule flag bits
+_DECK = struct.Struct(f"<{NUM_VALUES}H")
+
+Rules = Tuple[float, int]
+
+def encode_rules(settings: DetectionSettings) -> Rules:
+  """
+  Parameters:
+    settings (DetectionSettings): Settings holding the table rules.
+
+  Returns:
+    tuple: The blackjack payout and the rule flag bits.
+  """
+  flags = sum(1 << i for i, name in enumerate(RULE_FLAGS) if getattr(settings, name))
+  return float(settings.blackjack_odds), flags
+
+def apply_rules(settings: DetectionSettings, rules: Rules) -> None:
+  """
+  Set the table rules of a settings object from their encoded form.
+
+  Parameters:
+    settings (DetectionSettings): The settings to update.
+    rules (tuple): The blackjack payout and the rule flag bits.
+  """
+  settings.blackjack_odds, flags = rules
+  for i, name in enumerate(RULE_FLAGS):
+    setattr(settings, name, bool(flags >> i & 1))
+
+def encode_ev_request(
+  request_id: int, rules: Rules,
+  actions: Sequence[str], deck: np.ndarray,
+  player_hand: Sequence[int], dealer_hand: Sequence[int]
+) -> bytes:
+  """
+  Encode an EV request as a length-prefixed message.
+
+  Parameters:
+    request_id (int): The id echoed by the response.
+    rules (tuple): The encoded table rules.
+    actions (sequence of str): The actions to evaluate.
+    deck (numpy.ndarray): The deck composition in engine value order.
+    player_hand (sequence of int): The player's card codes.
+    dealer_hand (sequence of int): The dealer's card codes.
+
+  Returns:
+    bytes: The message.
+
+  Raises:
+    ValueError: If an action is unknown.
+  """
+  mask = 0
+  for action in actions:
+    if action not in ACTION_BITS:
+      raise ValueError(f"Unknown action: {action}")
+    mask |= ACTION_BITS[action]
+
+  payload = b"".join([
+    _HEADER.pack(request_id, OP_EV),
+    _RULES.pack(*rules),
+    _DECK.pack(*(int(count) for count in deck)),
+    bytes([len(player_hand), *player_hand]),
+    bytes([len(dealer_hand), *dealer_hand]),
+    bytes([mask])
+  ])
+  return _LENGTH.pack(len(payload)) + payload
+
+def encode_stats_request(request_id: int, rules: Rules) -> bytes:
+  """
+  Parameters:
+    request_id (int): The id echoed by the response.
+    rules (tuple): The encoded table rules.
+
+  Returns:
+    bytes: The length-prefixed stats request.
+  """
+  payload = _HEADER.pack(request_id, OP_STATS) + _RULES.pack(*rules)
+  return _LENGTH.pack(len(payload)) + payload
+
+def decode_request(payload: bytes) -> Tuple[int, int, Rules, Optional[Tuple[List[str], np.ndarray, List[int], List[int]]]]:
+  """
+  Decode a request payload.
+
+  Parameters:
+    payload (bytes): The payload, without its length prefix.
+
+  Returns:
+    tuple: The request id, the operation, the rules, and for EV requests the actions, deck, player hand and
+    dealer hand (None for other operations).
+
+  Raises:
+    ValueError: If the payload is malformed.
+  """
+  try:
+    request_id, op = _HEADER.unpack_from(payload, 0)
+    offset = _HEADER.size
+    rules = _RULES.unpack_from(payload, offset)
+    offset += _RULES.size
+
+    if op != OP_EV:
+      return request_id, op, rules, None
+
+    deck = np.array(_DECK.unpack_from(payload, offset), dtype=np.int32)
+    offset += _DECK.size
+    player_hand = list(payload[offset + 1:offset + 1 + payload[offset]])
+    offset += 1 + payload[offset]
+    dealer_hand = list(payload[offset + 1:offset + 1 + payload[offset]])
+    offset += 1 + payload[offset]
+    mask = payload[offset]
+  except (struct.error, IndexError) as e:
+    raise ValueError(f"Malformed request: {e}") from e
+
+  actions = [action for action in ACTIONS if mask & ACTION_BITS[action]]
+  return request_id, op, rules, (actions, deck, player_hand, dealer_hand)
+
+def encode_ev_response(request_id: int, evs: Dict[str, float]) -> bytes:
+  """
+  Parameters:
+    request_id (int): The id of the request answered.
+    evs (dict): The EV per evaluated action.
+
+  Returns:
+    bytes: The length-prefixed response.
+  """
+  actions = [action for action in ACTIONS if action in evs]
+  mask = sum(ACTION_BITS[action] for action in actions)
+  payload = _HEADER.pack(request_id, STATUS_OK) + bytes([mask]) + struct.pack(f"<{len(actions)}d", *(evs[action] for action in actions))
+  return _LENGTH.pack(len(payload)) + payload
+
+def encode_stats_response(request_id: int, stats: Dict[str, Any]) -> bytes:
+  """
+  Parameters:
+    request_id (int): The id of the request answered.
+    stats (dict): The cache statistics.
+
+  Returns:
+    bytes: The length-prefixed response.
+  """
+  payload = _HEADER.pack(request_id, STATUS_OK) + json.dumps(stats).encode("utf-8")
+  return _LENGTH.pack(len(payload)) + payload
+
+def encode_error_response(request_id: int, message: str) -> bytes:
+  """
+  Parameters:
+    request_id (int): The id of the request answered.
+    message (str): The error message.
+
+  Returns:
+    bytes: The length-prefixed response.
+  """
+  payload = _HEADER.pack(request_id, STATUS_ERROR) + message.encode("utf-8")
+  return _LENGTH.pack(len(payload)) + payload
+
+def decode_response(payload: bytes, op: int) -> Tuple[int, Any]:
+  """
+  Decode a response payload.
+
+  Parameters:
+    payload (bytes): The payload, without its length prefix.
+    op (int): The operation of the request answered.
+
+  Returns:
+    tuple: The request id and the result: the EV per action for OP_EV, the statistics for OP_STATS.
+
+  Raises:
+    RuntimeError: If the service reported an error.
+  """
+  request_id, status = _HEADER.unpack_from(payload, 0)
+  body = payload[_HEADER.size:]
+
+  if status != STATUS_OK:
+    raise RuntimeError(f"EV service error: {body.decode('utf-8', 'replace')}")
+
+  if op == OP_STATS:
+    return request_id, json.loads(body)
+
+  actions = [action for action in ACTIONS if body[0] & ACTION_BITS[action]]
+  values = struct.unpack_from(f"<{len(actions)}d", body, 1)
+  return request_id, dict(zip(actions, values))
+
+def response_id(payload: bytes) -> int:
+  """
+  Parameters:
+    payload (bytes): A response payload, without its length prefix.
+
+  Returns:
+    int: The id of the request the response answers.
+
+  Raises:
+    ValueError: If the payload is too short to hold a response header.
+  """
+  if len(payload) < _HEADER.size:
+    raise ValueError(f"Response of {len(payload)} bytes is shorter than its header")
+  return _HEADER.unpack_from(payload, 0)[0]
+
+def read_message(sock: socket.socket) -> Optional[bytes]:
+  """
+  Read one length-prefixed message.
+
+  Parameters:
+    sock (socket.socket): A connected stream socket.
+
+  Returns:
+    bytes or None: The payload, or None if the peer closed the connection before a new message.
+
+  Raises:
+    ConnectionError: If the connection closes in the middle of a message or the length prefix is implausible.
+  """
+  header = _read_exact(sock, _LENGTH.size)
+  if header is None:
+    return None
+
+  (length,) = _LENGTH.unpack(header)
+  if length > MAX_MESSAGE_BYTES:
+    raise ConnectionError(f"Message of {length} bytes exceeds the limit")
+
+  payload = _read_exact(sock, length)
+  if payload is None:
+    raise ConnectionError("Connection closed in the middle of a message")
+  return payload
+
+def _read_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+  """
+  Parameters:
+    sock (socket.socket): A connected stream socket.
+    size (int): The number of bytes to read.
+
+  Returns:
+    bytes or None: Exactly size bytes, or None if the connection closed before the first byte.
+
+  Raises:
+    ConnectionError: If the connection closes after some but not all of the bytes.
+  """
+  buffer = bytearray()
+
+  while len(buffer) < size:
+    chunk = sock.recv(size - len(buffer))
+    if not chunk:
+      if buffer:
+        raise ConnectionError("Connection closed in the middle of a message")
+      return None
+    buffer += chunk
+
+  return bytes(buffer)
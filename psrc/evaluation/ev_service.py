@@ -0,0 +1,167 @@
+"""
+Module for running the EV engine as a long-lived local service.
+
+This module hosts the Java EV engine in its own process and serves it over a Unix domain socket using the binary
+format of evaluation.ev_protocol. Analyzer processes connect with evaluation.ev_client.EVServiceClient instead of
+starting a JVM each, so they share one warm engine and cache, and restarting an analyzer keeps the cache. Requests
+carry their table rules, so tables with different rules share the service; each rule set gets its own cache
+namespace, as with in-process engines.
+
+Each connection is served by its own thread and answered in request order; engine calls are serialized by the
+engine's lock. Since the cache is shared by tables at different points of their shoes, it is not cleared or
+pruned as any one table's shoe advances and is bounded by its size limits instead.
+
+Usage (from the project root):
+  PYTHONPATH=psrc python -m evaluation.ev_service [--config config.yaml] [--socket /tmp/bj-ev.sock]
+"""
+
+import argparse
+import copy
+import os
+import socketserver
+import threading
+from typing import Dict
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+from evaluation.ev_engine import EVEngineWrapper
+from evaluation import ev_protocol
+from evaluation.ev_protocol import Rules
+
+logger = setup_logger(__name__)
+
+class EVService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  """
+  A Unix socket server answering EV requests from one shared engine.
+  """
+  daemon_threads = True
+
+  def __init__(self, socket_path: str, settings: DetectionSettings, jar_path: str) -> None:
+    """
+    Initialize the EVService instance, start the JVM, and bind the socket.
+
+    Parameters:
+      socket_path (str): The path of the Unix socket; a stale socket file left by a previous run is replaced.
+      settings (DetectionSettings): Settings providing the engine class, its cache limits, and the default rules.
+      jar_path (str): The path to the JAR file containing the EV engine.
+    """
+    self.settings = settings
+    self.jar_path = jar_path
+    self.socket_path = socket_path
+    self.requests = 0
+    self._wrappers: Dict[Rules, EVEngineWrapper] = {}
+    self._wrappers_lock = threading.Lock()
+
+    self.wrapper(ev_protocol.encode_rules(settings))  # Start the JVM and engine before accepting connections
+
+    if os.path.exists(socket_path):
+      os.unlink(socket_path)
+    super().__init__(socket_path, EVRequestHandler)
+    logger.info("EV service listening on %s", socket_path)
+
+  def wrapper(self, rules: Rules) -> EVEngineWrapper:
+    """
+    Retrieve the engine wrapper of a rule set, creating it on first use.
+
+    Parameters:
+      rules (tuple): The encoded table rules.
+
+    Returns:
+      EVEngineWrapper: A wrapper over the shared engine carrying these rules.
+    """
+    with self._wrappers_lock:
+      wrapper = self._wrappers.get(rules)
+      if wrapper is None:
+        settings = copy.copy(self.settings)
+        ev_protocol.apply_rules(settings, rules)
+        wrapper = EVEngineWrapper(settings, jar_path=self.jar_path)
+        self._wrappers[rules] = wrapper
+      return wrapper
+
+  def count_request(self) -> None:
+    """
+    Count a request; called from the handler threads of every connection.
+    """
+    with self._wrappers_lock:
+      self.requests += 1
+
+  def server_close(self) -> None:
+    """
+    Close the socket, remove its file, and shut down the JVM.
+    """
+    super().server_close()
+    if os.path.exists(self.socket_path):
+      os.unlink(self.socket_path)
+    with self._wrappers_lock:
+      wrappers = list(self._wrappers.values())
+    if wrappers:
+      wrappers[0].shutdown()
+
+class EVRequestHandler(socketserver.BaseRequestHandler):
+  """
+  Serves the requests of one client connection until it closes.
+  """
+
+  def handle(self) -> None:
+    while True:
+      try:
+        payload = ev_protocol.read_message(self.request)
+      except (ConnectionError, OSError) as e:
+        logger.warning("Dropping EV client connection: %s", e)
+        return
+      if payload is None:
+        return
+
+      self.request.sendall(self._answer(payload))
+
+  def _answer(self, payload: bytes) -> bytes:
+    """
+    Parameters:
+      payload (bytes): A request payload.
+
+    Returns:
+      bytes: The length-prefixed response.
+    """
+    request_id = 0
+    try:
+      request_id, op, rules, ev_request = ev_protocol.decode_request(payload)
+      wrapper = self.server.wrapper(rules)
+      self.server.count_request()
+
+      if op == ev_protocol.OP_STATS:
+        return ev_protocol.encode_stats_response(request_id, wrapper.cache_stats())
+      if op != ev_protocol.OP_EV:
+        return ev_protocol.encode_error_response(request_id, f"Unknown operation: {op}")
+
+      actions, deck, player_hand, dealer_hand = ev_request
+      evs = {action: float(wrapper.calculate_ev(action, deck, player_hand, dealer_hand)) for action in actions}
+      return ev_protocol.encode_ev_response(request_id, evs)
+    except Exception as e:
+      logger.error("Error answering EV request %d: %s", request_id, e)
+      return ev_protocol.encode_error_response(request_id, str(e))
+
+def main() -> None:
+  """
+  Parse command-line arguments and serve EV requests until interrupted.
+  """
+  parser = argparse.ArgumentParser(description="Serve EV calculations to local analyzers over a Unix socket.")
+  parser.add_argument("--config", default="config.yaml", help="Configuration file (default: config.yaml)")
+  parser.add_argument("--socket", help="Unix socket path (default: ev_service_socket from the configuration)")
+  parser.add_argument("--jar", default="target/blackjack-cv-ev-analyzer-1.0.0.jar", help="EV engine JAR")
+  args = parser.parse_args()
+
+  settings = DetectionSettings(args.config)
+  socket_path = args.socket or settings.ev_service_socket
+  if not socket_path:
+    parser.error("no socket path given and ev_service_socket is not configured")
+
+  service = EVService(socket_path, settings, args.jar)
+  try:
+    service.serve_forever()
+  except KeyboardInterrupt:
+    logger.info("Interrupted; shutting down")
+  finally:
+    service.server_close()
+    logger.info("EV service stopped after %d request(s)", service.requests)
+
+if __name__ == "__main__":
+  main()
@@ -1,40 +1,64 @@
 """
 Module for hand evaluation utilities.
 
-This module provides helper functions for evaluating blackjack hands. It includes functionality for calculating
-the total score of a hand, correctly handling the flexible value of Aces and the fixed value of face cards.
+This module provides helper functions for evaluating blackjack hands given as integer card codes. It includes
+functionality for calculating the total score of a hand, correctly handling the flexible value of Aces and the
+fixed value of face cards, along with a vectorized variant that scores many hands at once.
 """
 
-from typing import List
+import numpy as np
+from typing import Sequence, Tuple
+from evaluation.card_codes import BLACKJACK_VALUES, Card
 
-def calculate_hand_score(cards: List[str]) -> int:
+def calculate_hand_score(cards: Sequence[int]) -> int:
   """
   Calculate the total score of a blackjack hand.
 
-  This function computes the hand's score by iterating through each card and adding its value. Face cards
-  (non-digit and non-Ace cards) are assigned a value of 10, while numeric cards are converted directly to their
-  integer value. Aces are initially counted as 1, then adjusted to 11 if it does not cause the score to exceed 21.
+  This function sums the blackjack value of each card code, counting Aces as 1 and face cards as 10. At most one
+  Ace can be promoted to 11 without busting, so a single adjustment is applied when it keeps the score at or
+  under 21.
 
   Parameters:
-    cards (list of str): The hand of cards, where each card is represented as a string (e.g., "A", "4", "J").
+    cards (sequence of int): The hand of cards as card codes (see evaluation.card_codes.Card).
 
   Returns:
     int: The total score of the hand according to blackjack rules.
   """
-  base_score = 0
-  ace_count = 0
-
-  # Loop through each card in the hand to calculate the base score
-  for card in cards:
-    if card == "A":
-      ace_count += 1
-      base_score += 1
-    else:
-      base_score += int(card) if card.isdigit() else 10
+  codes = np.asarray(cards, dtype=np.intp)
+  base_score = int(BLACKJACK_VALUES[codes].sum())
 
   # Adjust for Aces
-  while ace_count > 0 and base_score + 10 <= 21:
+  if np.any(codes == Card.ACE) and base_score + 10 <= 21:
     base_score += 10
-    ace_count -= 1
 
-  return base_score
\ No newline at end of file
+  return base_score
+
+def calculate_hand_scores(
+  codes: np.ndarray, hand_ids: np.ndarray,
+  num_hands: int
+) -> Tuple[np.ndarray, np.ndarray]:
+  """
+  Calculate the total score and soft flag of many blackjack hands at once.
+
+  The cards of all hands are passed as one flat array of card codes, with a parallel array assigning each card to
+  a hand. Base totals and ace counts are accumulated per hand with bincount, then each hand holding an Ace that
+  can be counted as 11 without busting is promoted and flagged as soft.
+
+  Parameters:
+    codes (numpy.ndarray): Flat array of card codes for every card in every hand.
+    hand_ids (numpy.ndarray): Hand index (0 to num_hands - 1) of each card in codes.
+    num_hands (int): The number of hands.
+
+  Returns:
+    tuple: (totals, soft) where totals is an int32 array of hand scores and soft is a boolean array marking hands
+    whose score counts an Ace as 11.
+  """
+  codes = np.asarray(codes, dtype=np.intp)
+  hand_ids = np.asarray(hand_ids, dtype=np.intp)
+
+  base = np.bincount(hand_ids, weights=BLACKJACK_VALUES[codes], minlength=num_hands).astype(np.int32)
+  aces = np.bincount(hand_ids, weights=(codes == Card.ACE), minlength=num_hands)
+
+  soft = (aces > 0) & (base + 10 <= 21)
+  totals = base + 10 * soft.astype(np.int32)
+  return totals, soft
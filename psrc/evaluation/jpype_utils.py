@@ -5,57 +5,45 @@ This module provides helper functions to convert Python data structures into Jav
 required by the EV engine.
 """
 
-from jpype import JInt, JArray, JClass
-from typing import Dict, List, Any
+import numpy as np
+from jpype import JInt, JClass
+from typing import List, Any
+from evaluation.card_codes import BLACKJACK_VALUES
 
-def deck_to_java_array(deck: Dict[str, int]) -> Any:
+def fill_java_array(java_array: Any, counts: np.ndarray) -> Any:
   """
-  Convert a Python dictionary representing a deck into a Java integer array.
+  Copy a deck composition into an existing Java integer array.
 
-  The deck dictionary maps card identifiers to their counts. The conversion logic is as follows:
-    - The first element is the count for aces ("A").
-    - The next eight elements are counts for cards "2" through "9".
-    - The final element aggregates counts for "10", "J", "Q", and "K".
+  Reusing one Java array across calls avoids allocating a new one for every EV request. The slice assignment is
+  performed as a bulk buffer copy by JPype.
 
   Parameters:
-    deck (dict): Dictionary with keys as card values ("A", "2", ..., "K") and integer counts as values.
+    java_array (JArray(JInt)): A Java int array with the same length as counts.
+    counts (numpy.ndarray): An int32 array of per-value counts in engine value order.
 
   Returns:
-    JArray(JInt): A Java array of integers containing the deck counts in the expected order.
+    JArray(JInt): The same Java array, now holding the given counts.
   """
-  ace_count = deck.get("A", 0)  # Retrieve the count for aces
-  digit_counts = [deck.get(str(i), 0) for i in range(2, 10)]  # Retrieve counts for cards 2 to 9
-  ten_count = deck.get("10", 0) + deck.get("J", 0) + deck.get("Q", 0) + deck.get("K", 0)  # Aggregate counts for 10, J, Q, K into a single count
-  deck_values = [ace_count] + digit_counts + [ten_count]  # Combine the counts into one list
-  return JArray(JInt)([JInt(val) for val in deck_values])  # Convert each integer to a JInt and return as a Java int array
+  java_array[:] = np.ascontiguousarray(counts, dtype=np.int32)
+  return java_array
 
-def hand_to_java_array_list(hand: List[str]) -> Any:
+def hand_to_java_array_list(hand: List[int]) -> Any:
   """
-  Convert a Python list representing a hand of cards into a Java ArrayList of integers.
+  Convert a hand of card codes into a Java ArrayList of integers.
 
-  Each card in the hand is processed:
-    - 'A' is converted to the value 1.
-    - Numeric strings are converted to their integer value.
-    - Face cards (or any non-numeric card other than "A") are assigned a value of 10.
+  Each card code is mapped to its blackjack value through the BLACKJACK_VALUES lookup table: Aces become 1,
+  numeric cards keep their value, and face cards become 10.
 
   Parameters:
-    hand (list of str): A list of card representations (e.g., ["A", "7", "K"]).
+    hand (list of int): A list of card codes (see evaluation.card_codes.Card).
 
   Returns:
     java.util.ArrayList: A Java ArrayList with the integer values corresponding to each card.
   """
   ArrayList = JClass("java.util.ArrayList")  # Retrieve the Java ArrayList class using JPype
-  java_values = ArrayList()  # Create an instance of Java ArrayList to hold card values
-
-  # Process each card in the hand and determine its numerical value
-  for card in hand:
-    if card.upper() == "A":
-      value = 1
-    elif card.isdigit():
-      value = int(card)
-    else:
-      value = 10
+  java_values = ArrayList(len(hand))  # Create an instance of Java ArrayList sized for the hand
 
+  for value in BLACKJACK_VALUES[np.asarray(hand, dtype=np.intp)].tolist():
     java_values.add(JInt(value))  # Add the converted value to the Java ArrayList
 
-  return java_values
\ No newline at end of file
+  return java_values
@@ -0,0 +1,374 @@
+"""
+Module for speculative EV precomputation.
+
+This module provides the SpeculativeEVPrecomputer class, which sits between the analyzer and an EVEngineWrapper.
+While the analyzer waits for inference ticks and for CardTracker to confirm cards, a background thread evaluates
+the states the next real request is likely to ask for: the current hands against the deck as it will be once the
+pending tracks lock, then each hand with every possible next card. Results are kept in a small memo keyed by
+action, deck composition and hand values, so a real request whose state was speculated returns immediately.
+
+Real requests always take priority: speculation pauses while one is waiting and a real request waits for at most
+the single speculative evaluation in flight. Every new game state cancels the speculation queued for the previous
+one. The engine is only ever called by one thread at a time.
+
+An engine call cannot be interrupted, so only cheap states are speculated: an action is speculated only while its
+last few evaluations, real or speculative, each took no longer than max_seconds. A real request therefore waits
+for at most about max_seconds behind speculation, and by more only when a state costs more than the recent ones of
+its action did; such an evaluation raises the action's recent cost, which pauses its speculation until cheaper
+evaluations are seen again.
+"""
+
+import itertools
+import queue
+import threading
+import time
+import numpy as np
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from debugging.logger import setup_logger
+from evaluation.card_codes import BLACKJACK_VALUES, VALUE_INDEX
+from evaluation.deck import NUM_VALUES, CardDeck
+from evaluation.ev_engine import EVEngineWrapper
+
+logger = setup_logger(__name__)
+
+ACTIONS = ["stand", "hit", "double", "split"]
+
+_CURRENT_PRIORITY = 0  # Current hands against the deck after pending tracks lock
+_NEXT_CARD_PRIORITY = 1  # Each hand with one more card, most likely cards first
+
+_COST_WINDOW = 16  # Evaluations per action whose durations decide whether the action is cheap
+
+MemoKey = Tuple[str, bytes, Tuple[int, ...], Tuple[int, ...]]
+
+def memo_key(action: str, deck: np.ndarray, player_hand: Sequence[int], dealer_hand: Sequence[int]) -> MemoKey:
+  """
+  Build the memo key of an EV request.
+
+  Hands are keyed by their sorted blackjack values, since the EV of a hand depends only on which values it holds.
+
+  Parameters:
+    action (str): The action evaluated.
+    deck (numpy.ndarray): The deck composition in engine value order.
+    player_hand (sequence of int): The player's card codes.
+    dealer_hand (sequence of int): The dealer's card codes.
+
+  Returns:
+    tuple: The memo key.
+  """
+  return (
+    action,
+    np.ascontiguousarray(deck, dtype=np.int32).tobytes(),
+    tuple(sorted(BLACKJACK_VALUES[list(player_hand)].tolist())),
+    tuple(sorted(BLACKJACK_VALUES[list(dealer_hand)].tolist()))
+  )
+
+class SpeculativeEVPrecomputer:
+  """
+  A class to precompute likely EV requests on a background thread and serve them to real requests.
+
+  calculate_ev and sync_deck are drop-in replacements for the EVEngineWrapper methods of the same name; speculate
+  is called with the latest game state whenever the analyzer has one.
+  """
+
+  def __init__(
+    self, evaluator: EVEngineWrapper, enabled: bool = True,
+    max_results: int = 10000, max_seconds: float = 0.02
+  ) -> None:
+    """
+    Initialize the SpeculativeEVPrecomputer instance and start its worker thread if enabled.
+
+    Parameters:
+      evaluator (EVEngineWrapper): The wrapper used for both speculative and real evaluations.
+      enabled (bool): Whether to speculate; when False, requests are passed straight to the evaluator.
+      max_results (int): The maximum number of speculated results kept; the oldest are dropped first.
+      max_seconds (float): The longest recent evaluation time of an action for it to be speculated, which bounds
+        how long a real request waits behind speculation.
+    """
+    self.evaluator = evaluator
+    self.enabled = enabled
+    self.max_results = max_results
+    self.max_seconds = max_seconds
+
+    self._engine_lock = threading.Lock()  # Serializes every call into the engine
+    self._state_lock = threading.Lock()  # Guards the memo, counters and generation
+    self._idle = threading.Event()  # Set while no real request is waiting
+    self._idle.set()
+    self._waiting = 0
+
+    self._results: "OrderedDict[MemoKey, float]" = OrderedDict()
+    self._costs: Dict[str, deque] = {action: deque(maxlen=_COST_WINDOW) for action in ACTIONS}
+    self._queue: "queue.PriorityQueue[Tuple[int, int, int, Any]]" = queue.PriorityQueue()
+    self._sequence = itertools.count()
+    self._generation = 0
+    self._signature = None
+    self._shoe = None
+    self._pending_sync: Optional[CardDeck] = None
+    self._stopped = False
+
+    self.requests = 0
+    self.hits = 0
+    self.speculated = 0
+    self.cancelled = 0
+    self.skipped = 0
+
+    self._thread = None
+    if enabled:
+      self._thread = threading.Thread(target=self._run, name="ev-speculation", daemon=True)
+      self._thread.start()
+      logger.info("Started speculative EV precomputation")
+
+  @contextmanager
+  def _real_request(self) -> Iterator[None]:
+    """
+    Hold the engine for a real request, pausing speculation until the request is done.
+    """
+    with self._state_lock:
+      self._waiting += 1
+      self._idle.clear()
+
+    try:
+      with self._engine_lock:
+        yield
+    finally:
+      with self._state_lock:
+        self._waiting -= 1
+        if self._waiting == 0:
+          self._idle.set()
+
+  def calculate_ev(
+    self, action: str,
+    deck: np.ndarray, player_hand: List[int],
+    dealer_hand: List[int]
+  ) -> float:
+    """
+    Calculate the expected value of an action, from the speculated results when available.
+
+    Parameters:
+      action (str): The game action for which to calculate EV (e.g., "stand", "hit", "double", "split").
+      deck (numpy.ndarray): The deck composition in engine value order, as returned by CardDeck.get_counts.
+      player_hand (list of int): The player's hand represented as a list of card codes.
+      dealer_hand (list of int): The dealer's hand represented as a list of card codes.
+
+    Returns:
+      The expected value calculated by the EV engine.
+    """
+    key = memo_key(action, deck, player_hand, dealer_hand)
+
+    with self._state_lock:
+      self.requests += 1
+      ev = self._results.get(key)
+      if ev is not None:
+        self.hits += 1
+        return ev
+
+    with self._real_request():
+      self._apply_sync()
+      started = time.perf_counter()
+      ev = self.evaluator.calculate_ev(action, deck, player_hand, dealer_hand)
+      self._observe(action, time.perf_counter() - started)
+      return ev
+
+  def _observe(self, action: str, seconds: float) -> None:
+    """
+    Record how long an evaluation of an action took.
+
+    Parameters:
+      action (str): The action evaluated.
+      seconds (float): The duration of the engine call.
+    """
+    costs = self._costs.get(action)
+    if costs is not None:
+      with self._state_lock:
+        costs.append(seconds)
+
+  def _is_cheap(self, action: str) -> bool:
+    """
+    Whether an action may be speculated: it has been evaluated recently, and no recent evaluation took longer than
+    max_seconds.
+
+    Parameters:
+      action (str): The action.
+
+    Returns:
+      bool: True if the action is cheap enough to speculate.
+    """
+    with self._state_lock:
+      costs = self._costs.get(action)
+      return bool(costs) and max(costs) <= self.max_seconds
+
+  def sync_deck(self, deck: CardDeck) -> None:
+    """
+    Bring the engine cache in step with the deck, dropping the speculated results of a previous shoe.
+
+    This never waits for the engine: when an evaluation is running, e.g. an exact calculation that missed its
+    deadline, the sync is left to the next engine call. Cached states stay correct for their own compositions, so
+    evaluating before the sync only costs cache space.
+
+    Parameters:
+      deck (CardDeck): The deck being evaluated against.
+    """
+    if deck.shoe != self._shoe:
+      if self._shoe is not None:
+        with self._state_lock:
+          self._results.clear()
+      self._shoe = deck.shoe
+
+    self._pending_sync = deck
+    if self._engine_lock.acquire(blocking=False):
+      try:
+        self._apply_sync()
+      finally:
+        self._engine_lock.release()
+    else:
+      logger.debug("EV engine busy; deferring the cache sync to the next evaluation")
+
+  def _apply_sync(self) -> None:
+    """
+    Run the pending cache sync, if any. The caller holds the engine lock.
+    """
+    deck, self._pending_sync = self._pending_sync, None
+    if deck is not None:
+      self.evaluator.sync_deck(deck)
+
+  def speculate(
+    self, player_hands: List[List[int]], dealer_hand: List[int],
+    deck: np.ndarray, pending_cards: Sequence[int]
+  ) -> None:
+    """
+    Queue speculative evaluations for the latest game state, cancelling those queued for an earlier one.
+
+    Calling this again with an unchanged state does nothing, so it can be called on every processed frame.
+
+    Parameters:
+      player_hands (list of lists): Each sublist contains card codes for a player's hand.
+      dealer_hand (list): Card codes of the dealer's hand.
+      deck (numpy.ndarray): The current deck composition in engine value order.
+      pending_cards (sequence of int): Codes of tracked cards that have not been locked (removed from the deck) yet.
+    """
+    if not self.enabled or not player_hands or not dealer_hand:
+      return
+
+    pending = np.bincount(VALUE_INDEX[list(pending_cards)], minlength=NUM_VALUES).astype(np.int32)
+    next_deck = np.asarray(deck, dtype=np.int32) - np.minimum(pending, deck)
+
+    signature = (next_deck.tobytes(), tuple(map(tuple, player_hands)), tuple(dealer_hand))
+    if signature == self._signature:
+      return
+
+    with self._state_lock:
+      self._signature = signature
+      self._generation += 1
+      generation = self._generation
+      self.cancelled += self._queue.qsize()
+
+    # Drop tasks of earlier states; any the worker has already taken are skipped by their generation
+    while True:
+      try:
+        self._queue.get_nowait()
+      except queue.Empty:
+        break
+
+    for hand in player_hands:
+      self._put(_CURRENT_PRIORITY, generation, (next_deck, list(hand), list(dealer_hand)))
+
+    for value in np.argsort(-next_deck, kind="stable"):
+      if next_deck[value] == 0:
+        break
+
+      after_card = next_deck.copy()
+      after_card[value] -= 1
+
+      for hand in player_hands:
+        self._put(_NEXT_CARD_PRIORITY, generation, (after_card, list(hand) + [int(value)], list(dealer_hand)))
+
+  def _put(self, priority: int, generation: int, state: Tuple[np.ndarray, List[int], List[int]]) -> None:
+    """
+    Queue every action of one state at the given priority.
+
+    Parameters:
+      priority (int): Lower values are evaluated first.
+      generation (int): The generation of the game state the task belongs to.
+      state (tuple): (deck, player_hand, dealer_hand) to evaluate.
+    """
+    for action in ACTIONS:
+      self._queue.put((priority, next(self._sequence), generation, (action,) + state))
+
+  def _run(self) -> None:
+    """
+    Worker loop: evaluate queued states while no real request is waiting.
+    """
+    while True:
+      _, _, generation, task = self._queue.get()
+
+      if self._stopped:
+        return
+
+      action, deck, player_hand, dealer_hand = task
+      key = memo_key(action, deck, player_hand, dealer_hand)
+
+      with self._state_lock:
+        if generation != self._generation or key in self._results:
+          continue
+
+      # Leave states of actions that have been slow lately to the real request, which would otherwise wait on them
+      if not self._is_cheap(action):
+        self.skipped += 1
+        continue
+
+      self._idle.wait()
+
+      with self._engine_lock:
+        if generation != self._generation:
+          continue
+        try:
+          self._apply_sync()
+          started = time.perf_counter()
+          ev = self.evaluator.calculate_ev(action, deck, player_hand, dealer_hand)
+          self._observe(action, time.perf_counter() - started)
+        except Exception as e:
+          logger.debug("Speculative evaluation of '%s' failed: %s", action, e)
+          continue
+
+      with self._state_lock:
+        self._results[key] = ev
+        if len(self._results) > self.max_results:
+          self._results.popitem(last=False)
+        self.speculated += 1
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Retrieve statistics about speculation.
+
+    Returns:
+      dict: The number of real requests, how many were served from speculated results and the resulting hit
+      rate, the number of speculative evaluations completed, the number cancelled before running, the number
+      skipped because their action was too slow lately, and the number of results currently held.
+    """
+    with self._state_lock:
+      return {
+        "requests": self.requests,
+        "hits": self.hits,
+        "hit_rate": self.hits / self.requests if self.requests else 0.0,
+        "speculated": self.speculated,
+        "cancelled": self.cancelled,
+        "skipped": self.skipped,
+        "results": len(self._results)
+      }
+
+  def shutdown(self, timeout: Optional[float] = None) -> None:
+    """
+    Stop the worker thread. The evaluator itself is left running.
+
+    Parameters:
+      timeout (float, optional): Seconds to wait for an in-flight evaluation to finish.
+    """
+    if self._thread is None:
+      return
+
+    self._stopped = True
+    self._queue.put((-1, -1, -1, None))  # Wake the worker so it sees the stop flag
+    self._thread.join(timeout)
+    self._thread = None
+    logger.info("Stopped speculative EV precomputation: %s", self.stats())
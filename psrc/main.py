@@ -9,17 +9,28 @@ results.
 
 import cv2
 import time
+import numpy as np
 from ultralytics import YOLO
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from config.detection_settings import DetectionSettings
 from annotation.annotator import annotate_frame_with_scores
+from debugging.frame_profiler import FrameProfiler
 from debugging.logger import setup_logger
 from detection.card_tracker import CardTracker
 from detection.detection_utils import group_cards
 from detection.inference import run_inference
+from evaluation.anytime import AnytimeEVEvaluator
+from evaluation.card_codes import card_labels
 from evaluation.deck import CardDeck
+from evaluation.ev_client import EVServiceClient
 from evaluation.ev_engine import EVEngineWrapper
-from evaluation.hand_utils import calculate_hand_score
+from evaluation.hand_utils import calculate_hand_scores
+from evaluation.speculation import SpeculativeEVPrecomputer
+from replay.detection_log import DetectionRecorder
+from replay.round_history import ACTIONS as HISTORY_ACTIONS, RoundHistoryWriter
+from replay.shoe_journal import ShoeJournal
+from video.frame_pipeline import run_pipeline
+from video.video_recorder import VideoRecorder
 from video.video_stream import VideoStreamReader
 
 logger = setup_logger(__name__)
@@ -35,46 +46,98 @@ class BlackjackVisionAnalyzer:
   for player hands. It also processes video frames by annotating them with detection and evaluation data.
   """
 
-  def __init__(self, config: DetectionSettings) -> None:
+  def __init__(
+    self, config: DetectionSettings, load_detector: bool = True, open_source: bool = True,
+    shared_ev_cache: bool = False
+  ) -> None:
     """
     Initializes the BlackjackVisionAnalyzer with the provided configuration.
 
     Parameters:
       config (DetectionSettings): Application settings such as video source, model path, deck size, inference
       intervals, and thresholds.
+      load_detector (bool): Whether to open the video source and load the YOLO model. Replay drivers that feed
+      recorded detections through process_detections pass False.
+      open_source (bool): Whether to open the video source and video recorder along with the model. The
+      multi-process pipeline (see video.frame_pipeline) passes False, since it captures and renders in other
+      processes.
+      shared_ev_cache (bool): Whether other analyzers in this process evaluate with the same engine and rules, as
+      the tables of server.frame_server do. The shared cache is then left to its size limits rather than cleared
+      or pruned as this analyzer's shoe advances.
 
     The initialization process includes:
       - Setting up video capture based on whether a webcam or video file is used.
       - Loading the YOLO model for card detection.
       - Initializing a CardDeck to manage available cards.
       - Defining and initializing a CardTracker with custom callback for when a card is locked.
-      - Setting up the EVEngineWrapper for evaluating blackjack hands.
+      - Setting up the EVEngineWrapper, or an EVServiceClient, for evaluating blackjack hands.
     """
     self.config = config
     logger.info("Initializing BlackjackVisionAnalyzer with config: %s", config.__dict__)
     
-    # Initialize video capture from webcam or video file
-    if config.use_webcam:
-      self.cap = VideoStreamReader(config.webcam_index)
-    else:
-      self.cap = VideoStreamReader(config.video_path)
-
-    # Load the YOLO model with the specified weights
-    try:
-      self.model = YOLO(config.yolo_path)
-    except Exception as e:
-      raise FileNotFoundError(f"YOLO model file not found or invalid: {config.yolo_path}") from e
+    self.cap = None
+    self.model = None
+    self.closed = False
+
+    if load_detector:
+      # Initialize video capture from webcam or video file, unless frames are captured in another process
+      if open_source:
+        if config.use_webcam:
+          self.cap = VideoStreamReader(config.webcam_index)
+        else:
+          self.cap = VideoStreamReader(config.video_path)
+
+      # Load the YOLO model with the specified weights
+      try:
+        self.model = YOLO(config.yolo_path)
+      except Exception as e:
+        raise FileNotFoundError(f"YOLO model file not found or invalid: {config.yolo_path}") from e
         
     # Initialize variables for frame processing
     self.last_update = 0.0
     self.annotated_frame = None
+    self.frame_index = -1
+
+    # Record annotated display frames in the background if enabled
+    self.video_recorder = None
+    if load_detector and open_source and config.record_video:
+      self.video_recorder = VideoRecorder(
+        config.record_video_dir,
+        codec=config.record_video_codec,
+        fps=config.record_video_fps,
+        frame_size=config.record_video_frame_size,
+        keep_every=config.record_video_keep_every,
+        segment_seconds=config.record_video_segment_seconds,
+        queue_size=config.record_video_queue_size
+      )
+
+    # Record inference outputs for model-free replay if a detection log path is configured
+    self.recorder = DetectionRecorder(config.record_detections_path) if config.record_detections_path else None
 
     # Initialize the deck of cards with the specified deck size
     self.deck = CardDeck(config.deck_size)
+
+    # Record every decision to a columnar round history for analysis, if a history directory is configured
+    self.history = RoundHistoryWriter(config.round_history_dir) if config.round_history_dir else None
+    self._recorded_states: Dict[int, Any] = {}
+
+    # Restore the shoe in progress from the journal, if one is configured, and journal every change from now on
+    self.journal = None
+    if config.shoe_journal_path:
+      self.journal = ShoeJournal(
+        config.shoe_journal_path, config.deck_size,
+        fsync_interval=config.shoe_journal_fsync_interval,
+        snapshot_every=config.shoe_journal_snapshot_every
+      )
+      self.journal.restore(self.deck)
     
+    # Cards locked while analyzing the current frame, reported with its results
+    self.locked_cards: List[int] = []
+
     # Define a callback function to remove a card from the deck when it is locked
-    def on_card_locked(card_label: str) -> None:
-      self.deck.remove_card(card_label)
+    def on_card_locked(card: int) -> None:
+      self.deck.remove_card(card)
+      self.locked_cards.append(card)
     
     # Initialize the CardTracker with thresholds and callback settings
     self.tracker = CardTracker(
@@ -85,48 +148,151 @@ class BlackjackVisionAnalyzer:
       on_lock_callback=on_card_locked
     )
 
-    # Initialize the EV engine for blackjack hand evaluation
-    self.evaluator = EVEngineWrapper(jar_path="target/blackjack-cv-ev-analyzer-1.0.0.jar", java_class="evaluation.EVEngine")
+    # Initialize the EV engine for blackjack hand evaluation, or connect to a shared EV service if one is configured
+    if config.ev_service_socket:
+      self.evaluator = EVServiceClient(config, config.ev_service_socket, pool_size=config.ev_service_pool_size)
+    else:
+      self.evaluator = EVEngineWrapper(
+        config, jar_path="target/blackjack-cv-ev-analyzer-1.0.0.jar", shared_cache=shared_ev_cache
+      )
+
+    # Precompute likely EV requests while the engine would otherwise sit idle
+    self.speculator = SpeculativeEVPrecomputer(
+      self.evaluator, enabled=config.ev_speculation_enabled, max_results=config.ev_speculation_max_results,
+      max_seconds=config.ev_speculation_max_ms / 1000.0
+    )
+
+    # Answer within the decision window from an estimate when the exact calculation runs late
+    self.anytime = AnytimeEVEvaluator(self.speculator, config) if config.ev_decision_budget is not None else None
+
+    # Capture a profile of every frame slower than the threshold, if one is configured; the profiled frame loop must
+    # run on the thread constructing the analyzer
+    self.profiler = None
+    if config.profile_slow_frames_ms is not None:
+      self.profiler = FrameProfiler(
+        config.profile_dir, config.profile_slow_frames_ms,
+        sample_interval_ms=config.profile_sample_interval_ms,
+        max_captures=config.profile_max_captures
+      )
+      self.profiler.instrument(self.evaluator)
 
   def evaluate_hands(
-    self, player_hands: List[List[str]],
-    dealer_hand: List[str]
-  ) -> None:
+    self, player_hands: List[List[int]],
+    dealer_hand: List[int]
+  ) -> Dict[int, Dict[str, Any]]:
     """
     Evaluates the expected value (EV) of different actions for each player hand against the dealer's hand.
 
     The method iterates over each player hand and calculates EV for standard blackjack actions:
-    'stand', 'hit', 'double', and 'split'. It logs the EVs and determines the best action for each hand.
+    'stand', 'hit', 'double', and 'split'. It logs the EVs and determines the best action for each hand. With a
+    decision budget configured, the whole evaluation is bounded by it: each hand gets an equal share of what is
+    left, and actions whose exact EV is late are answered from an estimate.
 
     Parameters:
-      player_hands (list of lists): Each sublist contains card labels for a player's hand.
-      dealer_hand (list): List of card labels representing the dealer's hand.
+      player_hands (list of lists): Each sublist contains card codes for a player's hand.
+      dealer_hand (list): List of card codes representing the dealer's hand.
+
+    Returns:
+      dict: Per hand number, the EV of each evaluated action ("evs"), whether all of them are exact ("exact"), the
+      recommended action ("recommendation"), suffixed with "~" when it rests on an estimate, and the time taken to
+      evaluate the hand ("seconds"). Hands without any valid evaluation are left out.
     """
     actions = ["stand", "hit", "double", "split"]
+    deck_counts = self.deck.get_counts()  # Read-only view shared with the deck; no copy per call
+    evaluations = {}
+
+    if self.anytime is not None:
+      window_end = time.monotonic() + self.config.ev_decision_budget
+      self.anytime.retain(deck_counts, player_hands, dealer_hand)  # Drop queued exact calculations of earlier states
+
+    self.speculator.sync_deck(self.deck)  # Drop cached states made unreachable by cards locked since the last evaluation
 
     for i, p_hand in enumerate(player_hands, start=1):
       evs = {}
+      exact = True
+      started = time.perf_counter()
+
+      if self.anytime is not None:
+        # Share what is left of the decision window evenly among the hands still to evaluate
+        now = time.monotonic()
+        deadline = now + max(window_end - now, 0.0) / (len(player_hands) - i + 1)
+        responses = self.anytime.evaluate(actions, deck_counts, p_hand, dealer_hand, deadline)
+        evs = {action: response["ev"] for action, response in responses.items()}
+        exact = all(response["exact"] for response in responses.values())
+        formatted_evs = {}
+        for action, response in responses.items():
+          formatted_evs[action] = f"{response['ev'] * 100:.2f}%"
+          if not response["exact"]:
+            formatted_evs[action] += f" [{response['low'] * 100:.2f}, {response['high'] * 100:.2f}]"
+      else:
+        for action in actions:
+          try:
+            # Calculate EV for the given action
+            ev = self.speculator.calculate_ev(action, deck_counts, p_hand, dealer_hand)
+            evs[action] = ev
+          except Exception as e:
+            # Log any errors encountered during EV calculation
+            logger.error("Error evaluating action '%s' for hand %d (%s): %s", action, i, card_labels(p_hand), e)
+        formatted_evs = {action: f"{ev * 100:.2f}%" for action, ev in evs.items()}
 
-      for action in actions:
-        try:
-          # Calculate EV for the given action
-          ev = self.evaluator.calculate_ev(action, self.deck.get_counts(), p_hand, dealer_hand)
-          evs[action] = ev
-        except Exception as e:
-          # Log any errors encountered during EV calculation
-          logger.error("Error evaluating action '%s' for hand %d (%s): %s", action, i, p_hand, e)
       if evs:
         # Determine the best action based on the highest EV
         best_action = max(evs, key=evs.get)
-        formatted_evs = {action: f"{ev * 100:.2f}%" for action, ev in evs.items()}
-        logger.info("Hand %d: %s | %s", i, formatted_evs, best_action)
+        recommendation = best_action.upper() + ("" if exact else "~")
+        evaluations[i] = {"evs": evs, "exact": exact, "recommendation": recommendation, "seconds": time.perf_counter() - started}
+        logger.info("Hand %d: %s | %s", i, formatted_evs, recommendation)
       else:
         logger.warning("No valid evaluation for hand %d", i)
 
+    logger.debug("EV cache stats: %s", self.evaluator.cache_stats())
+    logger.debug("EV speculation stats: %s", self.speculator.stats())
+    return evaluations
+
+  def record_decisions(
+    self, player_hands: List[List[int]], dealer_hand: List[int],
+    hand_totals: Dict[Any, int], evaluations: Dict[int, Dict[str, Any]]
+  ) -> None:
+    """
+    Appends a row to the round history for every hand whose cards changed since it was last recorded, so a
+    decision is stored once rather than on every frame it stays on the table.
+
+    Parameters:
+      player_hands (list of lists): Each sublist contains card codes for a player's hand.
+      dealer_hand (list): List of card codes representing the dealer's hand.
+      hand_totals (dict): The score per hand number and "dealer".
+      evaluations (dict): The evaluations returned by evaluate_hands.
+    """
+    for i, evaluation in evaluations.items():
+      p_hand = player_hands[i - 1]
+      state = (tuple(sorted(p_hand)), tuple(dealer_hand))
+      if self._recorded_states.get(i) == state:
+        continue
+      self._recorded_states[i] = state
+
+      evs = np.array([evaluation["evs"].get(action, np.nan) for action in HISTORY_ACTIONS], dtype=np.float32)
+      ranked = np.sort(evs[~np.isnan(evs)])[::-1]
+      self.history.append(
+        timestamp=time.time(),
+        frame_index=self.frame_index,
+        shoe=self.deck.shoe,
+        hand=i,
+        num_cards=len(p_hand),
+        player_total=hand_totals.get(i, 0),
+        dealer_card=dealer_hand[0],
+        running_count=self.deck.get_running_count(),
+        true_count=self.deck.get_true_count(),
+        remaining=self.deck.remaining,
+        ev=evs,
+        recommended=HISTORY_ACTIONS.index(evaluation["recommendation"].rstrip("~").lower()),
+        exact=int(evaluation["exact"]),
+        ev_margin=ranked[0] - ranked[1] if ranked.size > 1 else np.nan,
+        latency_ms=evaluation["seconds"] * 1e3
+      )
+
   def process_frame(self, frame: Any) -> Any:
     """
-    Processes a single video frame: runs card detection inference, tracks and groups cards,
-    calculates hand scores, evaluates EV for blackjack decisions, and annotates the frame.
+    Processes a single video frame: runs card detection inference with detect and passes the detections to
+    process_detections.
 
     Parameters:
       frame (numpy.ndarray): The video frame to process.
@@ -134,11 +300,80 @@ class BlackjackVisionAnalyzer:
     Returns:
       annotated (numpy.ndarray): The frame with annotations for detected cards and evaluated scores.
     """
+    boxes, labels, confidences = self.detect(frame)
+    return self.process_detections(frame, boxes, labels, confidences)
+
+  def detect(self, frame: Any) -> Tuple[List[List[float]], List[int], List[float]]:
+    """
+    Runs card detection inference on a frame and records the detections if recording is enabled.
+
+    Parameters:
+      frame (numpy.ndarray): The video frame at the inference resolution.
+
+    Returns:
+      tuple: (boxes, labels, confidences) as returned by run_inference.
+    """
     # Run card detection inference using the YOLO model
     boxes, labels, confidences = run_inference(
       frame, self.model, overlap_threshold=self.config.inference_overlap_threshold
     )
 
+    if self.recorder is not None:
+      self.recorder.record(self.frame_index, time.time(), boxes, labels, confidences)
+
+    return boxes, labels, confidences
+
+  def process_detections(
+    self, frame: Optional[Any],
+    boxes: List[List[float]], labels: List[int],
+    confidences: List[float]
+  ) -> Optional[Any]:
+    """
+    Runs everything after inference for one frame: analyzes the detections with analyze_detections and annotates
+    the frame with the results.
+
+    Parameters:
+      frame (numpy.ndarray or None): The processed video frame, or None when replaying recorded detections.
+      boxes (list): Bounding boxes in the format [x1, y1, x2, y2].
+      labels (list): Card codes corresponding to each box.
+      confidences (list): Confidence scores corresponding to each box.
+
+    Returns:
+      annotated (numpy.ndarray or None): The annotated frame, or None if no frame was given.
+    """
+    analysis = self.analyze_detections(boxes, labels, confidences)
+
+    if frame is None:
+      return None
+
+    # Annotate the frame with detection boxes, grouped hands, labels, hand scores, and recommended actions
+    recommendations = {i: evaluation["recommendation"] for i, evaluation in analysis["evaluations"].items()}
+    annotated = annotate_frame_with_scores(
+      frame.copy(), boxes, analysis["grouped_hands"], analysis["stable_labels"], analysis["hand_totals"], recommendations
+    )
+    return annotated
+
+  def analyze_detections(
+    self, boxes: List[List[float]], labels: List[int],
+    confidences: List[float]
+  ) -> Dict[str, Any]:
+    """
+    Tracks and groups the detected cards of one frame, calculates hand scores, and evaluates EV for blackjack
+    decisions.
+
+    Parameters:
+      boxes (list): Bounding boxes in the format [x1, y1, x2, y2].
+      labels (list): Card codes corresponding to each box.
+      confidences (list): Confidence scores corresponding to each box.
+
+    Returns:
+      dict: The stable label of each box ("stable_labels"), the grouped box indices as returned by group_cards
+      ("grouped_hands"), the player hands and dealer hand as card codes ("player_hands", "dealer_hand"), the score
+      per hand number and "dealer" ("hand_totals"), the evaluations returned by evaluate_hands ("evaluations"),
+      and the cards locked during this frame ("locked_cards").
+    """
+    self.locked_cards = []
+
     # Update the card tracker with the current detections and obtain stable labels
     stable_labels = self.tracker.update(boxes, labels, confidences) if boxes else []
 
@@ -151,7 +386,10 @@ class BlackjackVisionAnalyzer:
         ],
         "dealer_hand": [stable_labels[i] for i in grouped_hands["dealer_hand"] if i < len(stable_labels)] if grouped_hands.get("dealer_hand") is not None else None
     }
-    logger.info("Hands: %s", grouped_hands_labels)
+    logger.info("Hands: %s", {
+      "player_hands": [card_labels(hand) for hand in grouped_hands_labels["player_hands"]],
+      "dealer_hand": card_labels(grouped_hands_labels["dealer_hand"]) if grouped_hands_labels["dealer_hand"] is not None else None
+    })
 
     # Process player hands based on grouped indices and stable labels
     player_hands = grouped_hands_labels.get("player_hands", [])
@@ -159,73 +397,161 @@ class BlackjackVisionAnalyzer:
     # Process dealer hand if available
     dealer_hand = grouped_hands_labels.get("dealer_hand")
     
-    # Calculate the blackjack score for each hand
-    hand_totals = {}
-    for i, hand in enumerate(player_hands, start=1):
-      hand_totals[i] = calculate_hand_score(hand)
-    if dealer_hand is not None:
-      hand_totals["dealer"] = calculate_hand_score(dealer_hand)
+    # Calculate the blackjack score for every hand in one vectorized pass
+    scored_hands = player_hands + ([dealer_hand] if dealer_hand is not None else [])
+    hand_keys = list(range(1, len(player_hands) + 1)) + (["dealer"] if dealer_hand is not None else [])
+    codes = np.fromiter((card for hand in scored_hands for card in hand), dtype=np.intp)
+    hand_ids = np.repeat(np.arange(len(scored_hands)), [len(hand) for hand in scored_hands])
+    totals, _ = calculate_hand_scores(codes, hand_ids, len(scored_hands))
+    hand_totals = dict(zip(hand_keys, totals.tolist()))
 
     # Evaluate EV for player hands if both player and dealer hands are available
+    evaluations = {}
     if player_hands and dealer_hand:
-      self.evaluate_hands(player_hands, dealer_hand)
+      evaluations = self.evaluate_hands(player_hands, dealer_hand)
+
+      # Queue speculative evaluation of the states likely to follow, to run until the next frame is processed
+      self.speculator.speculate(player_hands, dealer_hand, self.deck.get_counts(), self.tracker.pending_labels())
+
+      if self.history is not None:
+        self.record_decisions(player_hands, dealer_hand, hand_totals, evaluations)
     else:
       logger.info("Insufficient hands for EV evaluation")
+      self._recorded_states.clear()  # The round is over; the next hands are new decisions even if they look the same
 
     # Log current deck composition for debugging purposes
-    logger.info("Current deck composition: %s", self.deck.get_counts())
+    logger.info("Current deck composition: %s", self.deck.get_labeled_counts())
+
+    # Keep the frame's detections and hands with its profile, in case the frame turns out slow
+    if self.profiler is not None:
+      self.profiler.note(
+        frame_index=self.frame_index, boxes=boxes, labels=labels, confidences=confidences,
+        stable_labels=stable_labels, player_hands=player_hands, dealer_hand=dealer_hand,
+        hand_totals=hand_totals, evaluations=evaluations, locked_cards=self.locked_cards,
+        deck=self.deck.get_counts()
+      )
+
+    return {
+      "stable_labels": stable_labels,
+      "grouped_hands": grouped_hands,
+      "player_hands": player_hands,
+      "dealer_hand": dealer_hand,
+      "hand_totals": hand_totals,
+      "evaluations": evaluations,
+      "locked_cards": list(self.locked_cards)
+    }
 
-    # Annotate the frame with detection boxes, grouped hands, labels, and hand scores
-    annotated = annotate_frame_with_scores(frame.copy(), boxes, grouped_hands, stable_labels, hand_totals)
-    return annotated
+  def reshuffle(self) -> None:
+    """
+    Starts a new shoe: the deck is reset to its full composition, which is journaled when a shoe journal is
+    configured, and the EV caches of the previous shoe are dropped at the next evaluation.
+    """
+    self.deck.reset()
+    logger.info("Reshuffle requested; starting shoe %d", self.deck.shoe)
 
   def run(self) -> None:
     """
     Starts the main loop of the application.
 
     The main loop continuously reads frames from the video source, processes them at defined intervals,
-    displays the annotated frames, and listens for a quit signal ('q'). It ensures proper release of resources
-    after the loop ends.
+    displays the annotated frames, and listens for a reshuffle signal ('r') and a quit signal ('q'). It ensures
+    proper release of resources after the loop ends.
     """
     logger.info("Starting main loop")
     
-    while True:
-      # Read a frame from the video capture source
-      frame = self.cap.read_frame()
-      if frame is None:
-        logger.info("No frame received; exiting main loop")
-        break
-
-      # Resize frame for inference processing
-      inference_frame = cv2.resize(frame, self.config.inference_frame_size)
-      current_time = time.time()
-
-      # Process frame only if the inference interval has elapsed
-      if current_time - self.last_update >= self.config.inference_interval:
-        annotated_frame = self.process_frame(inference_frame)
-        self.last_update = current_time
-      else:
-        # Use the previously annotated frame if available, otherwise fallback to current inference frame
-        annotated_frame = self.annotated_frame if self.annotated_frame is not None else inference_frame
-
-      # Store the current annotated frame and resize for display
-      self.annotated_frame = annotated_frame
-      display_frame = cv2.resize(annotated_frame, self.config.display_frame_size)
-      cv2.imshow("rain-vision-v1", display_frame)
-
-      # Exit loop if 'q' key is pressed
-      if cv2.waitKey(1) & 0xFF == ord("q"):
-        logger.info("Quit signal received; exiting")
-        break
-
-    # Release video capture, JVM, and close display windows
-    self.cap.release()
-    self.evaluator.shutdown()
-    cv2.destroyAllWindows()
-    logger.info("Resources released; application terminated")
-    
+    try:
+      while True:
+        if self.profiler is not None:
+          self.profiler.begin()
+
+        # Read a frame from the video capture source
+        frame = self.cap.read_frame()
+        if frame is None:
+          logger.info("No frame received; exiting main loop")
+          break
+        self.frame_index += 1
+        if self.profiler is not None:
+          self.profiler.mark("read")
+
+        # Resize frame for inference processing
+        inference_frame = cv2.resize(frame, self.config.inference_frame_size)
+        current_time = time.time()
+
+        # Process frame only if the inference interval has elapsed
+        if current_time - self.last_update >= self.config.inference_interval:
+          annotated_frame = self.process_frame(inference_frame)
+          self.last_update = current_time
+        else:
+          # Use the previously annotated frame if available, otherwise fallback to current inference frame
+          annotated_frame = self.annotated_frame if self.annotated_frame is not None else inference_frame
+        if self.profiler is not None:
+          self.profiler.mark("process")
+
+        # Store the current annotated frame and resize for display
+        self.annotated_frame = annotated_frame
+        display_frame = cv2.resize(annotated_frame, self.config.display_frame_size)
+        cv2.imshow("rain-vision-v1", display_frame)
+
+        # Hand the display frame to the background recorder; dropped rather than waited for if it falls behind
+        if self.video_recorder is not None:
+          self.video_recorder.submit(display_frame)
+
+        # Start a new shoe if 'r' key is pressed, and exit loop if 'q' key is pressed
+        key = cv2.waitKey(1) & 0xFF
+        if self.profiler is not None:
+          self.profiler.mark("display")
+          self.profiler.end()
+        if key == ord("r"):
+          self.reshuffle()
+        elif key == ord("q"):
+          logger.info("Quit signal received; exiting")
+          break
+    finally:
+      # Release video capture, JVM, and close display windows, also when the loop fails
+      self.close()
+      cv2.destroyAllWindows()
+
+  def close(self, shutdown_evaluator: bool = True) -> None:
+    """
+    Releases everything the analyzer owns: the video source and recorder, the detection log, shoe journal and round
+    history, the profiler, the background EV workers and, unless told otherwise, the evaluator.
+
+    Calling close more than once has no effect.
+
+    Parameters:
+      shutdown_evaluator (bool): Whether to shut the evaluator down. An in-process engine shuts down the JVM,
+      which cannot be restarted, so analyzers sharing one (see server.frame_server) pass False and shut it down
+      once all of them are closed.
+    """
+    if self.closed:
+      return
+    self.closed = True
+
+    if self.cap is not None:
+      self.cap.release()
+    if self.video_recorder is not None:
+      self.video_recorder.close()
+    if self.recorder is not None:
+      self.recorder.close()
+    if self.journal is not None:
+      self.journal.close()
+    if self.history is not None:
+      self.history.close()
+    if self.profiler is not None:
+      self.profiler.close()
+    if self.anytime is not None:
+      self.anytime.shutdown()
+    self.speculator.shutdown()
+    if shutdown_evaluator:
+      self.evaluator.shutdown()
+    logger.info("Analyzer resources released")
+
 
 if __name__ == "__main__":
   config = DetectionSettings()
-  app = BlackjackVisionAnalyzer(config)
-  app.run()
\ No newline at end of file
+  if config.pipeline_processes:
+    app = BlackjackVisionAnalyzer(config, open_source=False)
+    run_pipeline(app)
+  else:
+    app = BlackjackVisionAnalyzer(config)
+    app.run()
\ No newline at end of file
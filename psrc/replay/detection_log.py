@@ -0,0 +1,342 @@
+"""
+Module for recording and reading per-frame detections.
+
+This module defines a compact columnar binary format for the output of run_inference, so the post-detection
+pipeline can be replayed without video or YOLO weights. DetectionRecorder buffers detections frame by frame and
+appends them to the file in chunks, every few frames and every few seconds, so memory stays bounded and a crash
+loses at most the last chunk; DetectionLog memory-maps a recorded file and exposes the columns of each chunk as
+NumPy views of the file.
+
+File layout (little-endian, every column aligned to 8 bytes):
+  - Header: magic b"BJDETLOG", uint32 version, uint32 reserved.
+  - Chunks, back to back, each aligned to 8 bytes:
+    - Chunk header: magic b"BJDCHUNK", uint32 CRC-32 of the columns, uint32 reserved, uint64 frame count F,
+      uint64 detection count D.
+    - frame_index: int64[F], the capture frame index of each processed frame.
+    - timestamp: float64[F], the wall-clock time (seconds) each frame was processed.
+    - offsets: int64[F + 1], detections of frame i are rows offsets[i] to offsets[i + 1] of the columns below.
+    - boxes: float32[D, 4], boxes as [x1, y1, x2, y2].
+    - classes: uint8[D], card codes (see evaluation.card_codes.Card).
+    - confidences: float32[D], detection confidences.
+
+A chunk that is incomplete or fails its CRC, as left by a crash while it was written, ends the log.
+"""
+
+import struct
+import time
+import zlib
+import numpy as np
+from typing import Dict, Iterator, List, Tuple
+from debugging.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_MAGIC = b"BJDETLOG"
+_CHUNK_MAGIC = b"BJDCHUNK"
+_VERSION = 2
+_HEADER = struct.Struct("<8sII")
+_CHUNK = struct.Struct("<8sIIQQ")
+
+Detections = Tuple[int, float, np.ndarray, np.ndarray, np.ndarray]
+
+def _align(offset: int) -> int:
+  """
+  Round a byte offset up to the next multiple of 8.
+
+  Parameters:
+    offset (int): A byte offset.
+
+  Returns:
+    int: The aligned offset.
+  """
+  return (offset + 7) & ~7
+
+def _column_layout(
+  num_frames: int, num_detections: int, start: int
+) -> Tuple[List[Tuple[str, np.dtype, Tuple[int, ...], int]], int]:
+  """
+  Compute the name, dtype, shape and byte offset of every column of a chunk.
+
+  Parameters:
+    num_frames (int): The number of frames in the chunk.
+    num_detections (int): The total number of detections in the chunk.
+    start (int): The byte offset of the first column.
+
+  Returns:
+    tuple: (name, dtype, shape, offset) for each column, in file order, and the aligned offset after the last.
+  """
+  columns = [
+    ("frame_index", np.dtype("<i8"), (num_frames,)),
+    ("timestamp", np.dtype("<f8"), (num_frames,)),
+    ("offsets", np.dtype("<i8"), (num_frames + 1,)),
+    ("boxes", np.dtype("<f4"), (num_detections, 4)),
+    ("classes", np.dtype("u1"), (num_detections,)),
+    ("confidences", np.dtype("<f4"), (num_detections,))
+  ]
+
+  layout = []
+  offset = _align(start)
+
+  for name, dtype, shape in columns:
+    layout.append((name, dtype, shape, offset))
+    offset = _align(offset + dtype.itemsize * int(np.prod(shape)))
+
+  return layout, offset
+
+class DetectionRecorder:
+  """
+  A class to record the detections of each processed frame into a detection log file.
+
+  Detections are buffered in memory as compact arrays and appended to the file as a chunk once chunk_frames frames
+  are buffered or flush_seconds have passed since the last chunk, and on close.
+  """
+
+  def __init__(self, path: str, chunk_frames: int = 256, flush_seconds: float = 5.0) -> None:
+    """
+    Initialize the DetectionRecorder instance and start a new log file, replacing any file at the path.
+
+    Parameters:
+      path (str): The path of the detection log file to write.
+      chunk_frames (int): The number of frames buffered before they are written.
+      flush_seconds (float): The longest time buffered frames wait to be written.
+    """
+    self.path = path
+    self.chunk_frames = max(int(chunk_frames), 1)
+    self.flush_seconds = flush_seconds
+    self.closed = False
+    self.num_frames = 0
+    self.num_detections = 0
+    self._reset_buffers()
+    self._last_flush = time.monotonic()
+
+    self._file = open(path, "wb")
+    self._file.write(_HEADER.pack(_MAGIC, _VERSION, 0))
+    self._file.write(bytes(_align(_HEADER.size) - _HEADER.size))
+    self._file.flush()
+    logger.info("Recording detections to %s", path)
+
+  def _reset_buffers(self) -> None:
+    """
+    Empty the frame buffers.
+    """
+    self._frame_indices: List[int] = []
+    self._timestamps: List[float] = []
+    self._counts: List[int] = []
+    self._boxes: List[np.ndarray] = []
+    self._classes: List[np.ndarray] = []
+    self._confidences: List[np.ndarray] = []
+
+  def record(
+    self, frame_index: int, timestamp: float,
+    boxes: List[List[float]], labels: List[int],
+    confidences: List[float]
+  ) -> None:
+    """
+    Append the detections of one processed frame, and write the buffered frames if a chunk is due.
+
+    Parameters:
+      frame_index (int): The capture frame index of the frame.
+      timestamp (float): The wall-clock time the frame was processed.
+      boxes (list): Bounding boxes in the format [x1, y1, x2, y2], as returned by run_inference.
+      labels (list): Card codes corresponding to each box.
+      confidences (list): Confidence scores corresponding to each box.
+    """
+    self._frame_indices.append(frame_index)
+    self._timestamps.append(timestamp)
+    self._counts.append(len(boxes))
+
+    if boxes:
+      self._boxes.append(np.asarray(boxes, dtype=np.float32).reshape(-1, 4))
+      self._classes.append(np.asarray(labels, dtype=np.uint8))
+      self._confidences.append(np.asarray(confidences, dtype=np.float32))
+
+    if len(self._frame_indices) >= self.chunk_frames or time.monotonic() - self._last_flush >= self.flush_seconds:
+      self.flush()
+
+  def flush(self) -> None:
+    """
+    Append the buffered frames to the log file as one chunk.
+    """
+    self._last_flush = time.monotonic()
+    num_frames = len(self._frame_indices)
+    if num_frames == 0:
+      return
+
+    offsets = np.zeros(num_frames + 1, dtype=np.int64)
+    np.cumsum(self._counts, out=offsets[1:])
+    num_detections = int(offsets[-1])
+
+    columns = {
+      "frame_index": np.asarray(self._frame_indices, dtype=np.int64),
+      "timestamp": np.asarray(self._timestamps, dtype=np.float64),
+      "offsets": offsets,
+      "boxes": np.concatenate(self._boxes) if self._boxes else np.empty((0, 4), dtype=np.float32),
+      "classes": np.concatenate(self._classes) if self._classes else np.empty(0, dtype=np.uint8),
+      "confidences": np.concatenate(self._confidences) if self._confidences else np.empty(0, dtype=np.float32)
+    }
+
+    # Lay the columns out relative to the chunk header, which is always written at an aligned offset
+    layout, end = _column_layout(num_frames, num_detections, _CHUNK.size)
+    body = bytearray(end - _CHUNK.size)
+    for name, dtype, shape, offset in layout:
+      data = np.ascontiguousarray(columns[name], dtype=dtype).reshape(shape).tobytes()
+      body[offset - _CHUNK.size:offset - _CHUNK.size + len(data)] = data
+
+    self._file.write(_CHUNK.pack(_CHUNK_MAGIC, zlib.crc32(body), 0, num_frames, num_detections))
+    self._file.write(body)
+    self._file.flush()  # Hand the chunk to the OS, so it survives the process being killed
+
+    self.num_frames += num_frames
+    self.num_detections += num_detections
+    self._reset_buffers()
+
+  def close(self) -> None:
+    """
+    Write the buffered detections and close the log file.
+
+    Calling close more than once has no effect.
+    """
+    if self.closed:
+      return
+
+    self.flush()
+    self._file.close()
+    self.closed = True
+    logger.info("Wrote %d frame(s) and %d detection(s) to %s", self.num_frames, self.num_detections, self.path)
+
+class DetectionLog:
+  """
+  A memory-mapped reader for detection log files.
+
+  The columns of each chunk are read-only views of the mapped file; frames are located through the cumulative
+  frame counts of the chunks, so no column is copied, whatever the length of the log.
+  """
+
+  def __init__(self, path: str) -> None:
+    """
+    Open a detection log file.
+
+    Parameters:
+      path (str): The path of the detection log file.
+
+    Raises:
+      ValueError: If the file is not a detection log or has an unsupported version.
+    """
+    self.path = path
+    self._data = np.memmap(path, dtype=np.uint8, mode="r")
+
+    magic, version, _ = _HEADER.unpack_from(self._data[:_HEADER.size].tobytes())
+
+    if magic != _MAGIC:
+      raise ValueError(f"Not a detection log: {path}")
+
+    if version != _VERSION:
+      raise ValueError(f"Unsupported detection log version {version}: {path}")
+
+    self.chunks = self._map_chunks()
+
+    # Frame i of the log is in the last chunk whose first frame is at or before i
+    self._chunk_starts = np.zeros(len(self.chunks) + 1, dtype=np.int64)
+    np.cumsum([len(chunk["frame_index"]) for chunk in self.chunks], out=self._chunk_starts[1:])
+
+  def _map_columns(self, num_frames: int, num_detections: int, start: int) -> Tuple[Dict[str, np.ndarray], int]:
+    """
+    Create views of the columns of one chunk.
+
+    Parameters:
+      num_frames (int): The number of frames in the chunk.
+      num_detections (int): The number of detections in the chunk.
+      start (int): The byte offset of the first column.
+
+    Returns:
+      tuple: The view of each column by name, and the offset after the chunk.
+    """
+    layout, end = _column_layout(num_frames, num_detections, start)
+    views = {}
+
+    for name, dtype, shape, offset in layout:
+      nbytes = dtype.itemsize * int(np.prod(shape))
+      views[name] = self._data[offset:offset + nbytes].view(dtype).reshape(shape)
+
+    return views, end
+
+  def _map_chunks(self) -> List[Dict[str, np.ndarray]]:
+    """
+    Create views of the columns of every complete chunk, stopping at the first incomplete or corrupt one.
+
+    Returns:
+      list: The views of each chunk, in file order; offsets are relative to the chunk.
+    """
+    chunks = []
+    position = _align(_HEADER.size)
+
+    while position + _CHUNK.size <= len(self._data):
+      magic, crc, _, num_frames, num_detections = _CHUNK.unpack_from(
+        self._data[position:position + _CHUNK.size].tobytes()
+      )
+      body = position + _CHUNK.size
+      end = body + _column_layout(num_frames, num_detections, _CHUNK.size)[1] - _CHUNK.size
+
+      if magic != _CHUNK_MAGIC or end > len(self._data) or zlib.crc32(self._data[body:end]) != crc:
+        logger.warning("Ignoring an incomplete chunk at byte %d of %s", position, self.path)
+        break
+
+      chunks.append(self._map_columns(num_frames, num_detections, body)[0])
+      position = end
+
+    return chunks
+
+  def __len__(self) -> int:
+    """
+    Returns:
+      int: The number of recorded frames.
+    """
+    return int(self._chunk_starts[-1])
+
+  def frame(self, i: int) -> Detections:
+    """
+    Retrieve the detections of one recorded frame.
+
+    Parameters:
+      i (int): The position of the frame in the log (0 to len - 1).
+
+    Returns:
+      tuple: (frame_index, timestamp, boxes, classes, confidences), where the arrays are views into the file.
+
+    Raises:
+      IndexError: If i is out of range.
+    """
+    if not 0 <= i < len(self):
+      raise IndexError(f"Frame {i} out of range for a log of {len(self)} frame(s)")
+
+    c = int(np.searchsorted(self._chunk_starts, i, side="right")) - 1
+    return self._chunk_frame(self.chunks[c], i - int(self._chunk_starts[c]))
+
+  def __iter__(self) -> Iterator[Detections]:
+    """
+    Iterate over the recorded frames in order.
+
+    Returns:
+      iterator: The detections of each frame, as returned by frame().
+    """
+    for chunk in self.chunks:
+      for i in range(len(chunk["frame_index"])):
+        yield self._chunk_frame(chunk, i)
+
+  @staticmethod
+  def _chunk_frame(chunk: Dict[str, np.ndarray], i: int) -> Detections:
+    """
+    Retrieve the detections of a frame of a chunk.
+
+    Parameters:
+      chunk (dict): The views of the chunk's columns.
+      i (int): The position of the frame in the chunk.
+
+    Returns:
+      tuple: (frame_index, timestamp, boxes, classes, confidences), as returned by frame().
+    """
+    start, end = int(chunk["offsets"][i]), int(chunk["offsets"][i + 1])
+    return (
+      int(chunk["frame_index"][i]), float(chunk["timestamp"][i]),
+      chunk["boxes"][start:end], chunk["classes"][start:end], chunk["confidences"][start:end]
+    )
@@ -0,0 +1,82 @@
+"""
+Module for replaying recorded detections through the post-detection pipeline.
+
+This module drives BlackjackVisionAnalyzer.process_detections from a detection log written by DetectionRecorder,
+without a video source or YOLO model, so card tracking, hand grouping, deck updates and EV evaluation can be
+benchmarked and regression-tested on any machine. Frames are replayed either as fast as possible or at the pace
+they were recorded.
+
+Usage (from the project root):
+  PYTHONPATH=psrc python -m replay.replay_driver detections.bjdet [--realtime] [--config config.yaml]
+"""
+
+import argparse
+import time
+from typing import Dict
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+from main import BlackjackVisionAnalyzer
+from replay.detection_log import DetectionLog
+
+logger = setup_logger(__name__)
+
+def replay(app: BlackjackVisionAnalyzer, log: DetectionLog, realtime: bool = False) -> Dict[str, float]:
+  """
+  Feed every frame of a detection log through the analyzer's post-detection pipeline.
+
+  Parameters:
+    app (BlackjackVisionAnalyzer): The analyzer to drive, typically created with load_detector=False.
+    log (DetectionLog): The recorded detections.
+    realtime (bool): Whether to sleep between frames to reproduce the recorded timestamps.
+
+  Returns:
+    dict: The number of frames replayed, the elapsed seconds, and the resulting frames per second.
+  """
+  start = time.perf_counter()
+  first_timestamp = log.frame(0)[1] if len(log) else 0.0
+
+  for frame_index, timestamp, boxes, classes, confidences in log:
+    if realtime:
+      delay = (timestamp - first_timestamp) - (time.perf_counter() - start)
+      if delay > 0:
+        time.sleep(delay)
+
+    app.frame_index = frame_index
+    if app.profiler is not None:
+      app.profiler.begin()
+    app.process_detections(None, boxes.tolist(), classes.tolist(), confidences.tolist())
+    if app.profiler is not None:
+      app.profiler.end()
+
+  elapsed = time.perf_counter() - start
+  return {
+    "frames": len(log),
+    "seconds": elapsed,
+    "fps": len(log) / elapsed if elapsed > 0 else float("inf")
+  }
+
+def main() -> None:
+  """
+  Parse command-line arguments and replay a detection log.
+  """
+  parser = argparse.ArgumentParser(description="Replay recorded detections through the post-detection pipeline.")
+  parser.add_argument("log_path", help="Detection log file written by DetectionRecorder")
+  parser.add_argument("--config", default="config.yaml", help="Configuration file (default: config.yaml)")
+  parser.add_argument("--realtime", action="store_true", help="Replay at the recorded pace instead of maximum speed")
+  args = parser.parse_args()
+
+  config = DetectionSettings(args.config)
+  config.record_detections_path = None  # Never overwrite a log while replaying
+  config.shoe_journal_path = None  # Nor advance the live shoe
+  app = BlackjackVisionAnalyzer(config, load_detector=False)
+  log = DetectionLog(args.log_path)
+
+  try:
+    stats = replay(app, log, realtime=args.realtime)
+  finally:
+    app.close()
+
+  logger.info("Replayed %d frame(s) in %.3f s (%.1f frames/s)", stats["frames"], stats["seconds"], stats["fps"])
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,390 @@
+"""
+Module for storing and analyzing the history of decisions.
+
+This module defines a fixed-schema columnar store for the decisions the analyzer makes: the count at decision
+time, the EV of every action, the recommendation and its margin, and the evaluation latency. RoundHistoryWriter
+buffers rows in memory and appends them in chunks, when a chunk fills or every few seconds, on a background thread
+to one raw file per column; RoundHistory memory-maps the columns for reading and offers vectorized queries, so
+analytics over millions of decisions need no parsing and no database.
+
+Directory layout:
+  - manifest.json: the format version, the committed row count, and the name, dtype and shape of every column.
+    It is replaced atomically after each chunk, so readers only ever see whole chunks.
+  - <column>.bin: the column's values, little-endian, one fixed-size element per row. Bytes past the committed
+    row count, left by a crash in the middle of a chunk, are truncated when a writer reopens the store.
+
+Usage (from the project root):
+  PYTHONPATH=psrc python -m replay.round_history history/ [--bucket-width 1.0]
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from debugging.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ACTIONS = ["stand", "hit", "double", "split"]  # Order of the ev column and codes of the recommended column
+NO_ACTION = 255  # Recommended code of a decision without any evaluation
+
+_VERSION = 1
+_MANIFEST = "manifest.json"
+
+ROUND_COLUMNS: List[Tuple[str, str, Tuple[int, ...]]] = [
+  ("timestamp", "<f8", ()),  # Wall-clock time of the decision
+  ("frame_index", "<i8", ()),  # Capture frame the decision was made on
+  ("shoe", "<i4", ()),  # Shoe number of the deck
+  ("hand", "u1", ()),  # Hand number within the frame
+  ("num_cards", "u1", ()),  # Cards in the player's hand
+  ("player_total", "u1", ()),  # Blackjack total of the player's hand
+  ("dealer_card", "i1", ()),  # Card code of the dealer's first card
+  ("running_count", "<i4", ()),  # Hi-Lo running count at decision time
+  ("true_count", "<f4", ()),  # Hi-Lo true count at decision time
+  ("remaining", "<i2", ()),  # Cards left in the shoe
+  ("ev", "<f4", (len(ACTIONS),)),  # EV per action in ACTIONS order; NaN for actions not evaluated
+  ("recommended", "u1", ()),  # Index of the recommended action in ACTIONS, or NO_ACTION
+  ("exact", "u1", ()),  # 1 if every EV was exact, 0 if any was an estimate
+  ("ev_margin", "<f4", ()),  # Best EV minus the second best; NaN with fewer than two actions
+  ("latency_ms", "<f4", ())  # Time taken to evaluate the hand
+]
+
+def _column_dtypes() -> Dict[str, Tuple[np.dtype, Tuple[int, ...]]]:
+  """
+  Returns:
+    dict: The dtype and element shape of every column, by name.
+  """
+  return {name: (np.dtype(dtype), shape) for name, dtype, shape in ROUND_COLUMNS}
+
+def _read_manifest(directory: str) -> Optional[Dict[str, Any]]:
+  """
+  Parameters:
+    directory (str): The store directory.
+
+  Returns:
+    dict or None: The manifest, or None if the store has none.
+
+  Raises:
+    ValueError: If the manifest was written for another version or schema.
+  """
+  path = os.path.join(directory, _MANIFEST)
+  if not os.path.exists(path):
+    return None
+
+  with open(path, "r") as f:
+    manifest = json.load(f)
+
+  expected = [[name, dtype, list(shape)] for name, dtype, shape in ROUND_COLUMNS]
+  if manifest.get("version") != _VERSION or manifest.get("columns") != expected:
+    raise ValueError(f"Round history in {directory} has another version or schema")
+  return manifest
+
+class RoundHistoryWriter:
+  """
+  A class to append decision rows to a round-history store in chunks.
+
+  Rows are buffered on the calling thread; full or stale chunks are handed to a background writer thread, which
+  appends and fsyncs them and commits them in the manifest, so the frame loop never waits on the disk.
+  """
+
+  def __init__(self, directory: str, chunk_rows: int = 4096, flush_seconds: float = 5.0) -> None:
+    """
+    Open the store, creating it if needed, drop any partial chunk left by a crash, and start the writer thread.
+
+    Parameters:
+      directory (str): The store directory.
+      chunk_rows (int): The number of rows buffered before they are appended to the column files.
+      flush_seconds (float): The longest time buffered rows wait to be appended, so a slow session's decisions
+        reach the store without waiting for a full chunk.
+
+    Raises:
+      ValueError: If the store exists with another version or schema.
+    """
+    self.directory = directory
+    self.chunk_rows = max(int(chunk_rows), 1)
+    self.flush_seconds = flush_seconds
+    self.columns = _column_dtypes()
+    self.closed = False
+
+    os.makedirs(directory, exist_ok=True)
+    manifest = _read_manifest(directory)
+    self.rows = manifest["rows"] if manifest is not None else 0  # Committed rows; updated by the writer thread
+
+    self._files = {}
+    for name, (dtype, shape) in self.columns.items():
+      path = os.path.join(directory, f"{name}.bin")
+      committed = self.rows * dtype.itemsize * int(np.prod(shape))
+      if os.path.exists(path) and os.path.getsize(path) != committed:
+        logger.warning("Truncating %s to %d committed row(s)", path, self.rows)
+        with open(path, "r+b") as f:
+          f.truncate(committed)
+      self._files[name] = open(path, "ab")
+
+    self._defaults = {name: (np.nan if dtype.kind == "f" else 0) for name, (dtype, _) in self.columns.items()}
+    self._defaults["recommended"] = NO_ACTION
+    self._new_buffer()
+    self._last_flush = time.monotonic()
+
+    if manifest is None:
+      self._write_manifest()
+
+    self._queue: "queue.Queue[Optional[Tuple[Dict[str, np.ndarray], int]]]" = queue.Queue()
+    self._thread = threading.Thread(target=self._run, name="round-history", daemon=True)
+    self._thread.start()
+    logger.info("Round history %s: %d row(s)", directory, self.rows)
+
+  def _new_buffer(self) -> None:
+    """
+    Start an empty chunk buffer; the previous one belongs to the writer thread once handed over.
+    """
+    self._buffer = {name: np.zeros((self.chunk_rows, *shape), dtype=dtype) for name, (dtype, shape) in self.columns.items()}
+    self._size = 0
+
+  def append(self, **values: Any) -> None:
+    """
+    Buffer one row, handing the chunk to the writer thread once it is full or flush_seconds have passed since
+    the last chunk.
+
+    Parameters:
+      **values: The value of each column by name; columns left out get NaN (floats), NO_ACTION (recommended) or 0.
+
+    Raises:
+      KeyError: If a value is given for an unknown column.
+    """
+    i = self._size
+    for name, default in self._defaults.items():
+      self._buffer[name][i] = values.pop(name, default)
+
+    if values:
+      raise KeyError(f"Unknown round history column(s): {sorted(values)}")
+
+    self._size += 1
+    if self._size == self.chunk_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+      self.flush()
+
+  def flush(self) -> None:
+    """
+    Hand the buffered rows to the writer thread without waiting for them to be written.
+    """
+    self._last_flush = time.monotonic()
+    if self._size == 0:
+      return
+
+    self._queue.put((self._buffer, self._size))
+    self._new_buffer()
+
+  def _run(self) -> None:
+    """
+    Writer loop: append every chunk handed over, until the end-of-stream marker.
+    """
+    while True:
+      chunk = self._queue.get()
+      if chunk is None:
+        break
+      self._write_chunk(*chunk)
+
+  def _write_chunk(self, buffer: Dict[str, np.ndarray], size: int) -> None:
+    """
+    Append a chunk to the column files and commit it in the manifest.
+
+    Parameters:
+      buffer (dict): The chunk's array per column.
+      size (int): The number of rows of the chunk in use.
+    """
+    for name, f in self._files.items():
+      f.write(buffer[name][:size].tobytes())
+      f.flush()
+      os.fsync(f.fileno())
+
+    self.rows += size
+    self._write_manifest()
+
+  def _write_manifest(self) -> None:
+    """
+    Replace the manifest atomically with the current committed row count.
+    """
+    manifest = {
+      "version": _VERSION,
+      "rows": self.rows,
+      "columns": [[name, dtype, list(shape)] for name, dtype, shape in ROUND_COLUMNS]
+    }
+    path = os.path.join(self.directory, _MANIFEST)
+    temp_path = path + ".tmp"
+
+    with open(temp_path, "w") as f:
+      json.dump(manifest, f)
+      f.flush()
+      os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+  def close(self) -> None:
+    """
+    Commit the buffered rows, stop the writer thread and close the column files.
+
+    Calling close more than once has no effect.
+    """
+    if self.closed:
+      return
+
+    self.flush()
+    self._queue.put(None)
+    self._thread.join()
+    for f in self._files.values():
+      f.close()
+    self.closed = True
+    logger.info("Round history closed with %d row(s)", self.rows)
+
+class RoundHistory:
+  """
+  A class to read a round-history store through memory-mapped columns and query it.
+  """
+
+  def __init__(self, directory: str) -> None:
+    """
+    Map the committed rows of every column.
+
+    Parameters:
+      directory (str): The store directory.
+
+    Raises:
+      FileNotFoundError: If the directory holds no round history.
+      ValueError: If the store has another version or schema.
+    """
+    manifest = _read_manifest(directory)
+    if manifest is None:
+      raise FileNotFoundError(f"No round history in {directory}")
+
+    self.directory = directory
+    self.rows = manifest["rows"]
+    self.columns: Dict[str, np.ndarray] = {}
+
+    for name, (dtype, shape) in _column_dtypes().items():
+      if self.rows == 0:
+        self.columns[name] = np.zeros((0, *shape), dtype=dtype)
+      else:
+        path = os.path.join(directory, f"{name}.bin")
+        self.columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(self.rows, *shape))
+
+  def __len__(self) -> int:
+    return self.rows
+
+  def __getitem__(self, name: str) -> np.ndarray:
+    """
+    Parameters:
+      name (str): A column name.
+
+    Returns:
+      numpy.ndarray: The memory-mapped column.
+    """
+    return self.columns[name]
+
+  def best_ev(self) -> np.ndarray:
+    """
+    Returns:
+      numpy.ndarray: The highest EV of each decision; NaN for decisions without any evaluation.
+    """
+    ev = np.asarray(self.columns["ev"])
+    best = np.full(self.rows, np.nan, dtype=np.float32)
+    evaluated = ~np.all(np.isnan(ev), axis=1)
+    best[evaluated] = np.nanmax(ev[evaluated], axis=1)
+    return best
+
+  def ev_by_true_count(self, bucket_width: float = 1.0, mask: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Aggregate the best EV of the decisions by true-count bucket.
+
+    Parameters:
+      bucket_width (float): The width of each true-count bucket; buckets are [k * width, (k + 1) * width).
+      mask (numpy.ndarray, optional): A boolean row filter.
+
+    Returns:
+      dict: The lower edge of each non-empty bucket ("true_count"), its number of decisions ("decisions"), and
+      their mean best EV ("mean_ev") and mean EV margin ("mean_margin").
+    """
+    best = self.best_ev()
+    selected = ~np.isnan(best) if mask is None else (~np.isnan(best) & mask)
+
+    buckets = np.floor(np.asarray(self.columns["true_count"])[selected] / bucket_width).astype(np.int64)
+    best = best[selected].astype(np.float64)
+    margin = np.asarray(self.columns["ev_margin"])[selected].astype(np.float64)
+    has_margin = ~np.isnan(margin)
+
+    if buckets.size == 0:
+      empty = np.zeros(0)
+      return {"true_count": empty, "decisions": empty.astype(np.int64), "mean_ev": empty, "mean_margin": empty}
+
+    offset = buckets.min()
+    index = buckets - offset
+    decisions = np.bincount(index)
+    ev_sums = np.bincount(index, weights=best)
+    margin_counts = np.bincount(index[has_margin], minlength=decisions.size)
+    margin_sums = np.bincount(index[has_margin], weights=margin[has_margin], minlength=decisions.size)
+    present = decisions > 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+      return {
+        "true_count": ((np.flatnonzero(present) + offset) * bucket_width).astype(np.float64),
+        "decisions": decisions[present],
+        "mean_ev": ev_sums[present] / decisions[present],
+        "mean_margin": margin_sums[present] / margin_counts[present]
+      }
+
+  def latency_percentiles(
+    self, percentiles: Sequence[float] = (50, 90, 99, 99.9),
+    mask: Optional[np.ndarray] = None
+  ) -> Dict[float, float]:
+    """
+    Parameters:
+      percentiles (sequence of float): The percentiles to compute.
+      mask (numpy.ndarray, optional): A boolean row filter.
+
+    Returns:
+      dict: The decision latency in milliseconds at each percentile; empty if no row is selected.
+    """
+    latency = np.asarray(self.columns["latency_ms"])
+    if mask is not None:
+      latency = latency[mask]
+    if latency.size == 0:
+      return {}
+    return dict(zip(percentiles, np.percentile(latency, percentiles).tolist()))
+
+  def recommendation_counts(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+    """
+    Parameters:
+      mask (numpy.ndarray, optional): A boolean row filter.
+
+    Returns:
+      dict: The number of decisions recommending each action.
+    """
+    recommended = np.asarray(self.columns["recommended"])
+    if mask is not None:
+      recommended = recommended[mask]
+    counts = np.bincount(recommended[recommended != NO_ACTION], minlength=len(ACTIONS))
+    return dict(zip(ACTIONS, counts.tolist()))
+
+def main() -> None:
+  """
+  Parse command-line arguments and print a summary of a round-history store.
+  """
+  parser = argparse.ArgumentParser(description="Summarize a round-history store.")
+  parser.add_argument("directory", help="Round history directory")
+  parser.add_argument("--bucket-width", type=float, default=1.0, help="True-count bucket width (default: 1.0)")
+  args = parser.parse_args()
+
+  history = RoundHistory(args.directory)
+  exact = np.asarray(history["exact"]) == 1
+  print(f"{len(history)} decision(s), {int(exact.sum())} exact")
+  print(f"recommendations: {history.recommendation_counts()}")
+  print("latency ms: " + ", ".join(f"p{p:g} {value:.2f}" for p, value in history.latency_percentiles().items()))
+
+  table = history.ev_by_true_count(args.bucket_width)
+  print(f"{'true count':>10} {'decisions':>10} {'mean EV':>9} {'margin':>8}")
+  for tc, n, ev, margin in zip(table["true_count"], table["decisions"], table["mean_ev"], table["mean_margin"]):
+    print(f"{tc:>10.1f} {n:>10d} {ev * 100:>8.2f}% {margin * 100:>7.2f}%")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,518 @@
+"""
+Module for journaling the shoe so it survives a restart.
+
+This module defines the ShoeJournal class, which records every change to a CardDeck (card removals, bulk removals
+and additions, reshuffles) in an append-only journal file, and periodically writes a compact snapshot of the
+composition and count. Events are queued by the deck and written, fsynced in batches, and snapshotted on a
+background thread, so the frame loop never waits on the disk. On startup the current shoe is restored from the
+latest snapshot plus the journal records written after it, which takes milliseconds. The journal is kept whole,
+so it can also be read back for analysis with read_journal or the command-line summary below.
+
+File layout (little-endian):
+  - Journal: magic b"BJSHOEJL", uint32 version, uint32 deck count, then 40-byte records (RECORD_DTYPE): uint64
+    sequence, float64 timestamp, uint32 shoe, uint8 event, int8 card code (removals; -1 otherwise), uint8[10]
+    per-value counts (bulk changes; a change of more than 255 cards of a value spans several records), 4 reserved
+    bytes, and the CRC-32 of the preceding 36 bytes. A torn or corrupt tail left by a crash is truncated on open.
+  - Snapshot (the journal path plus ".snap", replaced atomically): magic b"BJSHOESN", uint32 version, uint32 deck
+    count, uint64 number of records covered, uint32 shoe, int32 running count, int32[10] per-value counts,
+    float64 timestamp, and the CRC-32 of the preceding bytes.
+
+Usage (from the project root):
+  PYTHONPATH=psrc python -m replay.shoe_journal shoe.journal [--events]
+"""
+
+import argparse
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+from debugging.logger import setup_logger
+from evaluation.card_codes import CARDS_PER_DECK, NUM_VALUES, VALUE_HI_LO_WEIGHTS, VALUE_INDEX, card_label
+from evaluation.deck import CardDeck
+
+logger = setup_logger(__name__)
+
+EVENT_REMOVE = 1  # One card removed (a card lock)
+EVENT_REMOVE_BULK = 2  # Several cards removed, given as per-value counts
+EVENT_ADD_BULK = 3  # Several cards returned, given as per-value counts
+EVENT_RESHUFFLE = 4  # The deck was reset to a full shoe
+
+EVENT_NAMES = {EVENT_REMOVE: "remove", EVENT_REMOVE_BULK: "remove_bulk", EVENT_ADD_BULK: "add_bulk", EVENT_RESHUFFLE: "reshuffle"}
+
+RECORD_DTYPE = np.dtype([
+  ("sequence", "<u8"),
+  ("timestamp", "<f8"),
+  ("shoe", "<u4"),
+  ("event", "u1"),
+  ("card", "i1"),
+  ("counts", "u1", (NUM_VALUES,)),
+  ("reserved", "<u4"),
+  ("crc", "<u4")
+])
+
+_VERSION = 1
+_JOURNAL_MAGIC = b"BJSHOEJL"
+_JOURNAL_HEADER = struct.Struct("<8sII")
+_SNAPSHOT_MAGIC = b"BJSHOESN"
+_SNAPSHOT = struct.Struct(f"<8sIIQIi{NUM_VALUES}id")
+_CRC = struct.Struct("<I")
+_CRC_BYTES = RECORD_DTYPE.itemsize - 4  # Bytes of a record covered by its CRC
+_MAX_RECORD_COUNT = np.iinfo(RECORD_DTYPE["counts"].base).max  # Larger bulk changes are split over several records
+
+class ShoeState:
+  """
+  The composition and shoe number of a shoe, as of a number of journal records.
+  """
+
+  def __init__(self, counts: np.ndarray, shoe: int, records: int) -> None:
+    """
+    Parameters:
+      counts (numpy.ndarray): The per-value counts in engine value order.
+      shoe (int): The shoe number.
+      records (int): The number of journal records the state includes.
+    """
+    self.counts = np.array(counts, dtype=np.int32)
+    self.shoe = int(shoe)
+    self.records = int(records)
+
+  def running_count(self, deck_size: int) -> int:
+    """
+    Parameters:
+      deck_size (int): The number of decks in the shoe.
+
+    Returns:
+      int: The Hi-Lo running count of the cards dealt.
+    """
+    return int(np.dot(VALUE_HI_LO_WEIGHTS, CARDS_PER_DECK * deck_size - self.counts))
+
+def apply_records(state: ShoeState, records: np.ndarray, deck_size: int) -> ShoeState:
+  """
+  Apply journal records to a shoe state.
+
+  Only the records after the last reshuffle matter, and their changes are summed rather than applied one by one.
+
+  Parameters:
+    state (ShoeState): The state before the records.
+    records (numpy.ndarray): Consecutive journal records following the state.
+    deck_size (int): The number of decks in the shoe.
+
+  Returns:
+    ShoeState: The state after the records.
+  """
+  counts, shoe = state.counts, state.shoe
+  reshuffles = np.flatnonzero(records["event"] == EVENT_RESHUFFLE)
+
+  if reshuffles.size:
+    counts = CARDS_PER_DECK * deck_size
+    shoe = int(records["shoe"][reshuffles[-1]])
+    current = records[reshuffles[-1] + 1:]
+  else:
+    current = records
+
+  events = current["event"]
+  delta = np.bincount(VALUE_INDEX[current["card"][events == EVENT_REMOVE]], minlength=NUM_VALUES)
+  delta += current["counts"][events == EVENT_REMOVE_BULK].sum(axis=0, dtype=np.int64)
+  delta -= current["counts"][events == EVENT_ADD_BULK].sum(axis=0, dtype=np.int64)
+
+  counts = np.clip(counts - delta, 0, CARDS_PER_DECK * deck_size)
+  return ShoeState(counts, shoe, state.records + records.size)
+
+def read_journal(path: str) -> Tuple[int, np.ndarray]:
+  """
+  Memory-map the records of a journal file for analysis.
+
+  Parameters:
+    path (str): The journal path.
+
+  Returns:
+    tuple: The deck count from the header and the records (RECORD_DTYPE), up to the last whole record.
+
+  Raises:
+    ValueError: If the file is not a shoe journal.
+  """
+  with open(path, "rb") as f:
+    header = f.read(_JOURNAL_HEADER.size)
+
+  if len(header) < _JOURNAL_HEADER.size:
+    raise ValueError(f"{path} is too short to be a shoe journal")
+
+  magic, version, deck_size = _JOURNAL_HEADER.unpack(header)
+  if magic != _JOURNAL_MAGIC or version != _VERSION:
+    raise ValueError(f"{path} is not a version {_VERSION} shoe journal")
+
+  count = (os.path.getsize(path) - _JOURNAL_HEADER.size) // RECORD_DTYPE.itemsize
+  if count == 0:
+    return deck_size, np.zeros(0, dtype=RECORD_DTYPE)
+  return deck_size, np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=_JOURNAL_HEADER.size, shape=(count,))
+
+def load_snapshot(path: str, deck_size: int) -> Optional[ShoeState]:
+  """
+  Read a snapshot file.
+
+  Parameters:
+    path (str): The snapshot path.
+    deck_size (int): The deck count the snapshot must have been written for.
+
+  Returns:
+    ShoeState or None: The snapshot, or None if it is missing, corrupt, or for another deck count.
+  """
+  try:
+    with open(path, "rb") as f:
+      data = f.read()
+  except FileNotFoundError:
+    return None
+
+  if len(data) != _SNAPSHOT.size + _CRC.size or _CRC.unpack_from(data, _SNAPSHOT.size)[0] != zlib.crc32(data[:_SNAPSHOT.size]):
+    logger.warning("Ignoring corrupt shoe snapshot %s", path)
+    return None
+
+  magic, version, snapshot_decks, records, shoe, _, *counts = _SNAPSHOT.unpack_from(data)[:6 + NUM_VALUES]
+  if magic != _SNAPSHOT_MAGIC or version != _VERSION or snapshot_decks != deck_size:
+    logger.warning("Ignoring shoe snapshot %s written for another format or deck count", path)
+    return None
+
+  return ShoeState(counts, shoe, records)
+
+def _valid_prefix(records: np.ndarray) -> int:
+  """
+  Parameters:
+    records (numpy.ndarray): Journal records.
+
+  Returns:
+    int: The number of leading records whose CRC matches.
+  """
+  raw = records.view(np.uint8).reshape(records.size, RECORD_DTYPE.itemsize)
+  for i in range(records.size):
+    if zlib.crc32(raw[i, :_CRC_BYTES].tobytes()) != int(records["crc"][i]):
+      return i
+  return records.size
+
+class ShoeJournal:
+  """
+  A class to journal the changes of a CardDeck on a background thread and restore its shoe after a restart.
+  """
+
+  def __init__(
+    self, path: str, deck_size: int,
+    fsync_interval: float = 0.05, snapshot_every: int = 256
+  ) -> None:
+    """
+    Open or create the journal, recover the shoe it holds, and start the writer thread.
+
+    Parameters:
+      path (str): The journal path; the snapshot is kept next to it.
+      deck_size (int): The number of decks in the shoe.
+      fsync_interval (float): The longest time, in seconds, a written event may wait for its fsync; events
+        arriving in between are synced together.
+      snapshot_every (int): The number of events between snapshots.
+
+    Raises:
+      ValueError: If the journal exists but was written for another deck count or format.
+    """
+    self.path = path
+    self.snapshot_path = path + ".snap"
+    self.deck_size = deck_size
+    self.fsync_interval = fsync_interval
+    self.snapshot_every = max(int(snapshot_every), 1)
+
+    self.synced = 0
+    self.snapshots = 0
+
+    started = time.perf_counter()
+    self.state = self._recover()
+    self.recovered = self.state.records > 0
+    logger.info(
+      "Shoe journal %s: %d record(s), shoe %d with %d card(s) left (recovered in %.1f ms)",
+      path, self.state.records, self.state.shoe, int(self.state.counts.sum()), (time.perf_counter() - started) * 1e3
+    )
+
+    self._snapshot_records = self.state.records
+    self._file = open(path, "ab")
+    self._queue: "queue.Queue[Optional[Tuple[int, int, Optional[np.ndarray], float]]]" = queue.Queue()
+    self._thread = threading.Thread(target=self._run, name="shoe-journal", daemon=True)
+    self._thread.start()
+
+  def _recover(self) -> ShoeState:
+    """
+    Read the latest snapshot and apply the journal records after it, truncating any torn or corrupt tail, or
+    create the journal if there is none.
+
+    Returns:
+      ShoeState: The state of the shoe as of the last valid record.
+    """
+    full_shoe = ShoeState(CARDS_PER_DECK * self.deck_size, 0, 0)
+
+    if not os.path.exists(self.path) or os.path.getsize(self.path) < _JOURNAL_HEADER.size:
+      with open(self.path, "wb") as f:
+        f.write(_JOURNAL_HEADER.pack(_JOURNAL_MAGIC, _VERSION, self.deck_size))
+        f.flush()
+        os.fsync(f.fileno())
+      return full_shoe
+
+    journal_decks, records = read_journal(self.path)
+    if journal_decks != self.deck_size:
+      raise ValueError(f"Shoe journal {self.path} was written for {journal_decks} deck(s), not {self.deck_size}")
+
+    snapshot = load_snapshot(self.snapshot_path, self.deck_size)
+    if snapshot is not None and snapshot.records > records.size:
+      logger.warning("Shoe snapshot covers more records than the journal holds; replaying the whole journal")
+      snapshot = None
+    state = snapshot or full_shoe
+
+    tail = records[state.records:]
+    valid = _valid_prefix(tail)
+    state = apply_records(state, np.asarray(tail[:valid]), self.deck_size)
+
+    end = _JOURNAL_HEADER.size + state.records * RECORD_DTYPE.itemsize
+    del records, tail
+    if os.path.getsize(self.path) != end:
+      logger.warning("Truncating shoe journal %s after record %d", self.path, state.records)
+      with open(self.path, "r+b") as f:
+        f.truncate(end)
+
+    return state
+
+  def restore(self, deck: CardDeck) -> bool:
+    """
+    Restore the recovered shoe into a deck and journal the deck's changes from now on.
+
+    Parameters:
+      deck (CardDeck): A deck with the journal's deck count.
+
+    Returns:
+      bool: True if a shoe in progress was restored, False if the journal was new.
+    """
+    if self.recovered:
+      deck.restore(self.state.counts, self.state.shoe)
+    else:
+      self.state.shoe = deck.shoe
+    deck.journal = self
+    return self.recovered
+
+  def card_removed(self, card: int) -> None:
+    """
+    Queue the removal of one card.
+
+    Parameters:
+      card (int): The card code.
+    """
+    self._queue.put((EVENT_REMOVE, card, None, time.time()))
+
+  def cards_removed(self, counts: np.ndarray) -> None:
+    """
+    Queue a bulk removal.
+
+    Parameters:
+      counts (numpy.ndarray): The per-value counts removed.
+    """
+    self._put_bulk(EVENT_REMOVE_BULK, counts)
+
+  def cards_added(self, counts: np.ndarray) -> None:
+    """
+    Queue a bulk addition.
+
+    Parameters:
+      counts (numpy.ndarray): The per-value counts returned.
+    """
+    self._put_bulk(EVENT_ADD_BULK, counts)
+
+  def _put_bulk(self, event: int, counts: np.ndarray) -> None:
+    """
+    Queue a bulk change as one record, or as several when a count exceeds the 255 a record field holds (possible
+    with more than 7 decks); replay sums bulk records, so the split is exact.
+
+    Parameters:
+      event (int): EVENT_REMOVE_BULK or EVENT_ADD_BULK.
+      counts (numpy.ndarray): The per-value counts changed.
+
+    Raises:
+      ValueError: If counts has the wrong shape or contains negative values.
+    """
+    remaining = np.array(counts, dtype=np.int64)
+    if remaining.shape != (NUM_VALUES,) or np.any(remaining < 0):
+      raise ValueError(f"Expected {NUM_VALUES} non-negative per-value counts, got {remaining.tolist()}")
+
+    timestamp = time.time()
+    while True:
+      part = np.minimum(remaining, _MAX_RECORD_COUNT)
+      self._queue.put((event, -1, part.astype(np.uint8), timestamp))
+      remaining -= part
+      if not remaining.any():
+        break
+
+  def reshuffled(self) -> None:
+    """
+    Queue a reshuffle.
+    """
+    self._queue.put((EVENT_RESHUFFLE, -1, None, time.time()))
+
+  def _run(self) -> None:
+    """
+    Writer loop: write every queued event in one batch, fsync at most once per fsync interval, and snapshot every
+    snapshot_every events, until the end-of-stream marker.
+    """
+    dirty = False
+    last_sync = time.monotonic()
+    stopping = False
+
+    while not stopping:
+      timeout = max(last_sync + self.fsync_interval - time.monotonic(), 0.0) if dirty else None
+      try:
+        events = [self._queue.get(timeout=timeout)]
+      except queue.Empty:
+        events = []
+
+      # Drain whatever else is waiting, so a burst of events is written together
+      while True:
+        try:
+          events.append(self._queue.get_nowait())
+        except queue.Empty:
+          break
+
+      if None in events:
+        stopping = True
+        events = [event for event in events if event is not None]
+
+      if events:
+        self._write(events)
+        dirty = True
+
+      if dirty and (stopping or time.monotonic() - last_sync >= self.fsync_interval):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.synced = self.state.records
+        last_sync = time.monotonic()
+        dirty = False
+
+        # Snapshots only cover synced records, so a snapshot never runs ahead of the journal
+        if stopping or self.state.records - self._snapshot_records >= self.snapshot_every:
+          self._write_snapshot()
+
+    self._file.close()
+
+  def _write(self, events: list) -> None:
+    """
+    Append events to the journal and apply them to the mirrored state.
+
+    Parameters:
+      events (list): (event, card, counts, timestamp) per event.
+    """
+    records = np.zeros(len(events), dtype=RECORD_DTYPE)
+    shoe = self.state.shoe
+
+    for i, (event, card, counts, timestamp) in enumerate(events):
+      if event == EVENT_RESHUFFLE:
+        shoe += 1
+      records[i]["sequence"] = self.state.records + i
+      records[i]["timestamp"] = timestamp
+      records[i]["shoe"] = shoe
+      records[i]["event"] = event
+      records[i]["card"] = card
+      if counts is not None:
+        records[i]["counts"] = counts
+
+    raw = records.view(np.uint8).reshape(len(events), RECORD_DTYPE.itemsize)
+    for i in range(len(events)):
+      records[i]["crc"] = zlib.crc32(raw[i, :_CRC_BYTES].tobytes())
+
+    self._file.write(records.tobytes())
+    self.state = apply_records(self.state, records, self.deck_size)
+
+  def _write_snapshot(self) -> None:
+    """
+    Write the mirrored state to the snapshot file, replacing the previous snapshot atomically.
+    """
+    data = _SNAPSHOT.pack(
+      _SNAPSHOT_MAGIC, _VERSION, self.deck_size, self.state.records, self.state.shoe,
+      self.state.running_count(self.deck_size), *self.state.counts.tolist(), time.time()
+    )
+    data += _CRC.pack(zlib.crc32(data))
+    temp_path = self.snapshot_path + ".tmp"
+
+    with open(temp_path, "wb") as f:
+      f.write(data)
+      f.flush()
+      os.fsync(f.fileno())
+    os.replace(temp_path, self.snapshot_path)
+
+    self._snapshot_records = self.state.records
+    self.snapshots += 1
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Retrieve journal counters.
+
+    Returns:
+      dict: The number of records written and fsynced, the number of snapshots written this session, and the
+      number of events waiting to be written.
+    """
+    return {
+      "records": self.state.records,
+      "synced": self.synced,
+      "snapshots": self.snapshots,
+      "queued": self._queue.qsize()
+    }
+
+  def close(self, timeout: Optional[float] = None) -> None:
+    """
+    Write and fsync the queued events, write a final snapshot, and stop the writer thread.
+
+    Parameters:
+      timeout (float, optional): Seconds to wait for the writer to finish.
+    """
+    self._queue.put(None)
+    self._thread.join(timeout)
+    logger.info("Shoe journal closed: %s", self.stats())
+
+def main() -> None:
+  """
+  Parse command-line arguments and summarize a journal per shoe, or list its events.
+  """
+  parser = argparse.ArgumentParser(description="Summarize a shoe journal.")
+  parser.add_argument("path", help="Shoe journal file")
+  parser.add_argument("--events", action="store_true", help="List every event with the running count after it")
+  args = parser.parse_args()
+
+  deck_size, records = read_journal(args.path)
+  records = np.asarray(records[:_valid_prefix(records)])
+  full = CARDS_PER_DECK * deck_size
+  counts = full.copy()
+  shoe = None
+  shoes = {}
+
+  for record in records:
+    event = int(record["event"])
+    if event == EVENT_RESHUFFLE:
+      counts = full.copy()
+    elif event == EVENT_REMOVE:
+      counts[VALUE_INDEX[record["card"]]] -= 1
+    elif event == EVENT_REMOVE_BULK:
+      counts -= record["counts"]
+    elif event == EVENT_ADD_BULK:
+      counts += record["counts"]
+
+    shoe = int(record["shoe"])
+    running = int(np.dot(VALUE_HI_LO_WEIGHTS, full - counts))
+    summary = shoes.setdefault(shoe, {"events": 0, "start": float(record["timestamp"])})
+    summary.update(events=summary["events"] + 1, end=float(record["timestamp"]), remaining=int(counts.sum()), running=running)
+
+    if args.events:
+      card = card_label(int(record["card"])) if event == EVENT_REMOVE else ""
+      print(
+        f"{int(record['sequence']):>8} {time.strftime('%H:%M:%S', time.localtime(record['timestamp']))} "
+        f"shoe {shoe:>4} {EVENT_NAMES.get(event, '?'):<12} {card:<3} remaining {int(counts.sum()):>4} running {running:>4}"
+      )
+
+  print(f"{records.size} record(s), {deck_size} deck(s)")
+  for shoe, summary in shoes.items():
+    print(
+      f"shoe {shoe:>4}: {summary['events']:>5} event(s) over {summary['end'] - summary['start']:.0f} s, "
+      f"{summary['remaining']} card(s) left, running count {summary['running']}"
+    )
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,445 @@
+"""
+Module for serving card detection and EV evaluation to local clients over HTTP.
+
+This module defines a frame-submission server for running several tables from one process. Clients POST frames,
+either encoded (JPEG, PNG) or as raw BGR bytes, to /tables/{table_id}/frames and receive the table's hands, the
+cards locked by the frame, the counts, and the EV evaluations as JSON. Every table keeps its own card tracker and
+deck in a BlackjackVisionAnalyzer created without a detector, while all tables share one YOLO model and one EV
+engine. As with evaluation.ev_service, the tables are at different points of their shoes, so the engine cache they
+share is not cleared or pruned as any one table's shoe advances. Frames submitted concurrently are collected by the
+InferenceBatcher into a single model call, so the GPU sees batches instead of a stream of single frames.
+
+Frames of one table are processed in submission order, one at a time; frames of different tables are analyzed in
+parallel. The server binds to the loopback interface by default and has no authentication.
+
+Usage (from the project root):
+  PYTHONPATH=psrc python -m server.frame_server [--config config.yaml] [--host 127.0.0.1] [--port 8765]
+"""
+
+import argparse
+import copy
+import json
+import math
+import queue
+import re
+import threading
+import time
+import cv2
+import numpy as np
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from ultralytics import YOLO
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+from detection.inference import run_inference_batch
+from evaluation.card_codes import card_labels
+from main import BlackjackVisionAnalyzer
+
+logger = setup_logger(__name__)
+
+_FRAMES_PATH = re.compile(r"^/tables/([A-Za-z0-9_.-]{1,64})/frames$")
+
+class InferenceBatcher:
+  """
+  A class to run frames submitted from many threads through the model in batches on one inference thread.
+  """
+
+  def __init__(self, model: YOLO, overlap_threshold: float = 0.9, max_batch: int = 8, max_wait: float = 0.005) -> None:
+    """
+    Initialize the InferenceBatcher instance and start its inference thread.
+
+    Parameters:
+      model (YOLO): The YOLO model shared by all tables.
+      overlap_threshold (float): Overlap threshold for NMS.
+      max_batch (int): The maximum number of frames per model call.
+      max_wait (float): Seconds to wait for more frames once the first frame of a batch has arrived.
+    """
+    self.model = model
+    self.overlap_threshold = overlap_threshold
+    self.max_batch = max(int(max_batch), 1)
+    self.max_wait = max_wait
+
+    self.batches = 0
+    self.frames = 0
+
+    self._queue: "queue.Queue[Optional[Tuple[np.ndarray, Future]]]" = queue.Queue()
+    self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+    self._thread.start()
+
+  def submit(self, frame: np.ndarray) -> Future:
+    """
+    Queue a frame for inference.
+
+    Parameters:
+      frame (numpy.ndarray): A BGR frame at the inference resolution.
+
+    Returns:
+      concurrent.futures.Future: Resolves to ((boxes, labels, confidences), batch_size), where batch_size is the
+      number of frames in the model call that processed this one.
+    """
+    future = Future()
+    self._queue.put((frame, future))
+    return future
+
+  def _run(self) -> None:
+    """
+    Inference loop: take the first waiting frame, gather more until the batch is full or the wait runs out, and
+    run the batch through the model.
+    """
+    stopping = False
+
+    while not stopping:
+      item = self._queue.get()
+      if item is None:
+        break
+
+      batch = [item]
+      deadline = time.monotonic() + self.max_wait
+
+      while len(batch) < self.max_batch:
+        try:
+          item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+        except queue.Empty:
+          break
+        if item is None:
+          stopping = True
+          break
+        batch.append(item)
+
+      frames = [frame for frame, _ in batch]
+      try:
+        detections = run_inference_batch(frames, self.model, overlap_threshold=self.overlap_threshold)
+      except Exception as e:
+        logger.error("Inference failed for a batch of %d frame(s): %s", len(batch), e)
+        for _, future in batch:
+          future.set_exception(e)
+        continue
+
+      self.batches += 1
+      self.frames += len(batch)
+      for (_, future), result in zip(batch, detections):
+        future.set_result((result, len(batch)))
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Retrieve batching counters.
+
+    Returns:
+      dict: The number of model calls, the number of frames processed, the mean batch size, and the number of
+      frames waiting.
+    """
+    return {
+      "batches": self.batches,
+      "frames": self.frames,
+      "mean_batch_size": self.frames / self.batches if self.batches else 0.0,
+      "queued": self._queue.qsize()
+    }
+
+  def close(self, timeout: Optional[float] = None) -> None:
+    """
+    Process the frames already queued and stop the inference thread.
+
+    Parameters:
+      timeout (float, optional): Seconds to wait for the inference thread to finish.
+    """
+    self._queue.put(None)
+    self._thread.join(timeout)
+
+class TableSession:
+  """
+  The state of one table: its analyzer and the lock that keeps its frames in order.
+  """
+
+  def __init__(self, table_id: str, config: DetectionSettings) -> None:
+    """
+    Parameters:
+      table_id (str): The table identifier used in request paths.
+      config (DetectionSettings): Settings for the table's analyzer.
+    """
+    self.table_id = table_id
+    self.analyzer = BlackjackVisionAnalyzer(config, load_detector=False, shared_ev_cache=True)  # Tables share the engine cache namespace of their rules
+    self.lock = threading.Lock()
+
+class FrameServer:
+  """
+  A class to process frames of many tables with shared, batched inference.
+  """
+
+  def __init__(self, config: DetectionSettings, model: YOLO) -> None:
+    """
+    Initialize the FrameServer instance.
+
+    Parameters:
+      config (DetectionSettings): Settings for the batcher and for every table's analyzer.
+      model (YOLO): The YOLO model shared by all tables.
+    """
+    self.config = copy.copy(config)
+    self.config.record_detections_path = None  # Tables would overwrite each other's log, journal and history
+    self.config.shoe_journal_path = None
+    self.config.round_history_dir = None
+    self.config.record_video = False
+    self.config.profile_slow_frames_ms = None  # Sessions run on server threads, not a profiled frame loop
+    self.batcher = InferenceBatcher(
+      model,
+      overlap_threshold=config.inference_overlap_threshold,
+      max_batch=config.server_max_batch,
+      max_wait=config.server_max_wait_ms / 1000.0
+    )
+    self.tables: Dict[str, TableSession] = {}
+    self._tables_lock = threading.Lock()
+
+  def table(self, table_id: str) -> TableSession:
+    """
+    Retrieve the session of a table, creating it on its first frame.
+
+    Parameters:
+      table_id (str): The table identifier.
+
+    Returns:
+      TableSession: The table's session.
+    """
+    with self._tables_lock:
+      session = self.tables.get(table_id)
+      if session is None:
+        session = TableSession(table_id, self.config)
+        self.tables[table_id] = session
+        logger.info("Opened table %s", table_id)
+      return session
+
+  def process(self, table_id: str, frame: np.ndarray) -> Dict[str, Any]:
+    """
+    Run one frame of a table through batched inference and the table's analyzer.
+
+    Parameters:
+      table_id (str): The table identifier.
+      frame (numpy.ndarray): A BGR frame of any size; it is resized to the inference resolution.
+
+    Returns:
+      dict: The JSON-serializable response for the frame.
+    """
+    if (frame.shape[1], frame.shape[0]) != tuple(self.config.inference_frame_size):
+      frame = cv2.resize(frame, self.config.inference_frame_size)
+
+    session = self.table(table_id)
+
+    # Hold the table for the whole frame, so its frames reach the tracker in submission order
+    with session.lock:
+      started = time.perf_counter()
+      (boxes, labels, confidences), batch_size = self.batcher.submit(frame).result()
+      inferred = time.perf_counter()
+
+      app = session.analyzer
+      app.frame_index += 1
+      analysis = app.analyze_detections(boxes, labels, confidences)
+      analyzed = time.perf_counter()
+
+      return {
+        "table": table_id,
+        "frame": app.frame_index,
+        "detections": len(boxes),
+        "hands": {
+          "player": [card_labels(hand) for hand in analysis["player_hands"]],
+          "dealer": card_labels(analysis["dealer_hand"]) if analysis["dealer_hand"] is not None else None,
+          "totals": {str(key): total for key, total in analysis["hand_totals"].items()}
+        },
+        "locked_cards": card_labels(analysis["locked_cards"]),
+        "counts": {
+          "cards": app.deck.get_labeled_counts(),
+          "remaining": app.deck.remaining,
+          "running_count": app.deck.get_running_count(),
+          "true_count": app.deck.get_true_count()
+        },
+        "evaluations": {str(i): evaluation for i, evaluation in analysis["evaluations"].items()},
+        "batch_size": batch_size,
+        "timings_ms": {"inference": (inferred - started) * 1e3, "analysis": (analyzed - inferred) * 1e3}
+      }
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Returns:
+      dict: The open tables and the batching counters.
+    """
+    with self._tables_lock:
+      tables = sorted(self.tables)
+    return {"tables": tables, "inference": self.batcher.stats()}
+
+  def close(self) -> None:
+    """
+    Stop batching and release every table's background workers and the EV engine.
+    """
+    self.batcher.close()
+
+    with self._tables_lock:
+      sessions = list(self.tables.values())
+
+    for session in sessions:
+      session.analyzer.close(shutdown_evaluator=False)
+
+    # Tables share the engine, so it is shut down once every table is closed
+    if sessions:
+      sessions[0].analyzer.evaluator.shutdown()
+
+def decode_frame(body: bytes, headers: Any) -> np.ndarray:
+  """
+  Decode a submitted frame.
+
+  Raw frames are sent with Content-Type application/octet-stream and their size in the X-Frame-Width and
+  X-Frame-Height headers; any other content type is decoded as an encoded image.
+
+  Parameters:
+    body (bytes): The request body.
+    headers (email.message.Message): The request headers.
+
+  Returns:
+    numpy.ndarray: The frame as a BGR image.
+
+  Raises:
+    ValueError: If the body cannot be decoded or does not match the declared size.
+  """
+  if not body:
+    raise ValueError("Empty frame")
+
+  if headers.get("Content-Type", "").split(";")[0].strip() == "application/octet-stream":
+    try:
+      width = int(headers["X-Frame-Width"])
+      height = int(headers["X-Frame-Height"])
+    except (KeyError, TypeError, ValueError):
+      raise ValueError("Raw frames need X-Frame-Width and X-Frame-Height headers")
+    if width <= 0 or height <= 0 or len(body) != width * height * 3:
+      raise ValueError(f"Raw frame of {len(body)} bytes does not match {width}x{height} BGR")
+    return np.frombuffer(body, dtype=np.uint8).reshape(height, width, 3)
+
+  frame = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+  if frame is None:
+    raise ValueError("Unable to decode image")
+  return frame
+
+def finite_or_null(value: Any) -> Any:
+  """
+  Replace non-finite floats, such as the -inf EV of a split that is not allowed, with None, so responses are
+  standard JSON (null) rather than the Infinity and NaN tokens most JSON parsers reject.
+
+  Parameters:
+    value: A JSON-serializable value; dicts, lists and tuples are converted recursively.
+
+  Returns:
+    The value with every non-finite float replaced by None.
+  """
+  if isinstance(value, float):
+    return value if math.isfinite(value) else None
+  if isinstance(value, dict):
+    return {key: finite_or_null(item) for key, item in value.items()}
+  if isinstance(value, (list, tuple)):
+    return [finite_or_null(item) for item in value]
+  return value
+
+def make_handler(frame_server: FrameServer) -> type:
+  """
+  Build the request handler class bound to a frame server.
+
+  Parameters:
+    frame_server (FrameServer): The server processing the frames.
+
+  Returns:
+    type: A BaseHTTPRequestHandler subclass.
+  """
+  class FrameRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections open between frames
+
+    def do_POST(self) -> None:
+      match = _FRAMES_PATH.match(self.path)
+
+      # Reject a body that cannot be read safely before reading it; its bytes are then left unread, so the
+      # connection is closed rather than reused
+      try:
+        length = int(self.headers.get("Content-Length", 0))
+        if length < 0:
+          raise ValueError(length)
+      except ValueError:
+        self._send_json(400, {"error": "Invalid Content-Length header"}, close=True)
+        return
+      if length > frame_server.config.server_max_frame_bytes:
+        self._send_json(413, {
+          "error": f"Frame of {length} bytes exceeds the limit of {frame_server.config.server_max_frame_bytes} bytes"
+        }, close=True)
+        return
+
+      body = self.rfile.read(length) if length > 0 else b""
+
+      if match is None:
+        self._send_json(404, {"error": f"Unknown path: {self.path}"})
+        return
+
+      try:
+        frame = decode_frame(body, self.headers)
+      except ValueError as e:
+        self._send_json(400, {"error": str(e)})
+        return
+
+      try:
+        response = frame_server.process(match.group(1), frame)
+      except Exception as e:
+        logger.exception("Error processing frame for table %s", match.group(1))
+        self._send_json(500, {"error": str(e)})
+        return
+
+      self._send_json(200, response)
+
+    def do_GET(self) -> None:
+      if self.path == "/stats":
+        self._send_json(200, frame_server.stats())
+      else:
+        self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def _send_json(self, status: int, payload: Dict[str, Any], close: bool = False) -> None:
+      data = json.dumps(finite_or_null(payload), allow_nan=False).encode("utf-8")
+      self.send_response(status)
+      self.send_header("Content-Type", "application/json")
+      self.send_header("Content-Length", str(len(data)))
+      if close:
+        self.send_header("Connection", "close")
+        self.close_connection = True
+      self.end_headers()
+      self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+      logger.debug("%s - %s", self.address_string(), format % args)
+
+  return FrameRequestHandler
+
+def main() -> None:
+  """
+  Parse command-line arguments, load the model, and serve until interrupted.
+  """
+  parser = argparse.ArgumentParser(description="Serve card detection and EV evaluation for several tables.")
+  parser.add_argument("--config", default="config.yaml", help="Configuration file (default: config.yaml)")
+  parser.add_argument("--host", help="Address to bind to (default: server_host from the configuration)")
+  parser.add_argument("--port", type=int, help="Port to bind to (default: server_port from the configuration)")
+  args = parser.parse_args()
+
+  config = DetectionSettings(args.config)
+  host = args.host or config.server_host
+  port = args.port if args.port is not None else config.server_port
+
+  try:
+    model = YOLO(config.yolo_path)
+  except Exception as e:
+    raise FileNotFoundError(f"YOLO model file not found or invalid: {config.yolo_path}") from e
+
+  frame_server = FrameServer(config, model)
+  httpd = ThreadingHTTPServer((host, port), make_handler(frame_server))
+  httpd.daemon_threads = True
+  logger.info("Serving frames on http://%s:%d/tables/{table_id}/frames", host, port)
+
+  try:
+    httpd.serve_forever()
+  except KeyboardInterrupt:
+    logger.info("Interrupted; shutting down")
+  finally:
+    httpd.server_close()
+    frame_server.close()
+    logger.info("Frame server stopped: %s", frame_server.stats())
+
+if __name__ == "__main__":
+  main()
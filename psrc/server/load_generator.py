@@ -0,0 +1,158 @@
+"""
+Load generator for the frame-submission server.
+
+This module submits JPEG-encoded frames to a running frame server from several concurrent clients, spread over a
+number of tables, and reports the request throughput, the latency percentiles, and the mean inference batch size
+observed by the server. Frames are read from a video file, or drawn synthetically when none is given.
+
+Usage (from the project root, with the server running):
+  PYTHONPATH=psrc python -m server.load_generator [--clients 8] [--tables 4] [--requests 100] [--video clip.mp4]
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+def load_frames(video_path: str, count: int, frame_size: Tuple[int, int], quality: int) -> List[bytes]:
+  """
+  Read frames from a video file, or draw synthetic table scenes, and JPEG-encode them.
+
+  Parameters:
+    video_path (str or None): The video file to read, or None for synthetic frames.
+    count (int): The maximum number of frames.
+    frame_size (tuple): The frame resolution as (width, height).
+    quality (int): The JPEG quality.
+
+  Returns:
+    list of bytes: The encoded frames.
+
+  Raises:
+    ValueError: If the video yields no frames.
+  """
+  frames = []
+
+  if video_path:
+    cap = cv2.VideoCapture(video_path)
+    while len(frames) < count:
+      ok, frame = cap.read()
+      if not ok:
+        break
+      frames.append(cv2.resize(frame, frame_size))
+    cap.release()
+    if not frames:
+      raise ValueError(f"No frames read from {video_path}")
+  else:
+    rng = np.random.default_rng(0)
+    width, height = frame_size
+    for _ in range(count):
+      frame = np.full((height, width, 3), (40, 110, 30), dtype=np.uint8)  # Felt green
+      for _ in range(int(rng.integers(2, 12))):
+        x, y = int(rng.integers(0, width - 80)), int(rng.integers(0, height - 120))
+        cv2.rectangle(frame, (x, y), (x + 80, y + 120), (245, 245, 245), -1)
+      frames.append(frame)
+
+  params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+  return [cv2.imencode(".jpg", frame, params)[1].tobytes() for frame in frames]
+
+def run_client(
+  host: str, port: int, table_id: str,
+  frames: List[bytes], requests: int, offset: int,
+  results: List[Tuple[float, int, int]]
+) -> None:
+  """
+  Submit frames of one table over a persistent connection and record each request.
+
+  Parameters:
+    host (str): The server address.
+    port (int): The server port.
+    table_id (str): The table to submit frames for.
+    frames (list of bytes): The encoded frames, cycled through.
+    requests (int): The number of requests to make.
+    offset (int): The index of the first frame, so clients do not send identical frames.
+    results (list): Receives (latency in seconds, HTTP status, batch size) per request.
+  """
+  connection = http.client.HTTPConnection(host, port)
+  path = f"/tables/{table_id}/frames"
+
+  try:
+    for k in range(requests):
+      body = frames[(offset + k) % len(frames)]
+      start = time.perf_counter()
+      connection.request("POST", path, body=body, headers={"Content-Type": "image/jpeg"})
+      response = connection.getresponse()
+      payload = response.read()
+      latency = time.perf_counter() - start
+
+      batch_size = json.loads(payload).get("batch_size", 0) if response.status == 200 else 0
+      results.append((latency, response.status, batch_size))
+  finally:
+    connection.close()
+
+def summarize(results: List[Tuple[float, int, int]], seconds: float) -> Dict[str, Any]:
+  """
+  Parameters:
+    results (list): (latency in seconds, HTTP status, batch size) per request.
+    seconds (float): The wall-clock duration of the run.
+
+  Returns:
+    dict: The number of requests and errors, the throughput, the latency percentiles in milliseconds, and the
+    mean batch size of the successful requests.
+  """
+  latencies = np.array([latency for latency, _, _ in results]) * 1e3
+  ok = [batch_size for _, status, batch_size in results if status == 200]
+  return {
+    "requests": len(results),
+    "errors": len(results) - len(ok),
+    "throughput": len(results) / seconds if seconds > 0 else 0.0,
+    "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+    "p99_ms": float(np.percentile(latencies, 99)) if latencies.size else 0.0,
+    "max_ms": float(latencies.max()) if latencies.size else 0.0,
+    "mean_batch_size": float(np.mean(ok)) if ok else 0.0
+  }
+
+def main() -> None:
+  """
+  Parse command-line arguments, run the clients, and print the summary.
+  """
+  parser = argparse.ArgumentParser(description="Submit frames to the frame server and report throughput and latency.")
+  parser.add_argument("--host", default="127.0.0.1", help="Server address (default: 127.0.0.1)")
+  parser.add_argument("--port", type=int, default=8765, help="Server port (default: 8765)")
+  parser.add_argument("--clients", type=int, default=8, help="Concurrent clients (default: 8)")
+  parser.add_argument("--tables", type=int, default=4, help="Tables the clients are spread over (default: 4)")
+  parser.add_argument("--requests", type=int, default=100, help="Requests per client (default: 100)")
+  parser.add_argument("--video", help="Video file to take frames from (default: synthetic frames)")
+  parser.add_argument("--frames", type=int, default=64, help="Distinct frames to cycle through (default: 64)")
+  parser.add_argument("--size", type=int, nargs=2, default=[1920, 1080], metavar=("WIDTH", "HEIGHT"), help="Frame size (default: 1920 1080)")
+  parser.add_argument("--quality", type=int, default=90, help="JPEG quality (default: 90)")
+  args = parser.parse_args()
+
+  frames = load_frames(args.video, args.frames, tuple(args.size), args.quality)
+  results: List[Tuple[float, int, int]] = []  # list.append is atomic, so clients share it
+  threads = [
+    threading.Thread(
+      target=run_client,
+      args=(args.host, args.port, f"table{k % args.tables}", frames, args.requests, k * 7, results)
+    )
+    for k in range(args.clients)
+  ]
+
+  start = time.perf_counter()
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  seconds = time.perf_counter() - start
+
+  stats = summarize(results, seconds)
+  print(f"{stats['requests']} request(s), {stats['errors']} error(s) in {seconds:.2f} s")
+  print(f"throughput {stats['throughput']:.1f} frames/s")
+  print(f"latency p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+  print(f"mean batch size {stats['mean_batch_size']:.2f}")
+
+if __name__ == "__main__":
+  main()
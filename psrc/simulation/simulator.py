@@ -0,0 +1,549 @@
+"""
+Module for Monte Carlo simulation of blackjack shoes.
+
+This module plays seeded shoes out round by round under the configured table rules and a chosen strategy (see
+simulation.strategies). Shoes are simulated in batches: every array in ShoeBatch has one row per shoe, and each
+step of a round (dealing, deciding, hitting, the dealer's draw, settlement) is applied to all shoes still in play
+at once. Batches are sharded across a process pool, and results are accumulated per Hi-Lo true count bucket so
+the EV and variance of a flat one-unit bet can be summarized by count.
+
+Simplifications: a hand is split at most once, and without a dealer peek a dealer natural takes every bet of the
+round except a surrender.
+
+Usage (from the project root):
+  PYTHONPATH=psrc python -m simulation.simulator --shoes 10000 --strategy basic [--workers 4] [--seed 0]
+"""
+
+import argparse
+import math
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+from evaluation.card_codes import CARDS_PER_DECK, NUM_VALUES, VALUE_BLACKJACK_VALUES, VALUE_HI_LO_WEIGHTS
+from simulation.strategies import (
+  DOUBLE, HIT, MAX_TRUE_COUNT, NUM_TRUE_COUNTS, SPLIT, STAND, SURRENDER,
+  make_strategy, true_count_buckets
+)
+
+logger = setup_logger(__name__)
+
+MAX_HAND_CARDS = 22  # A hand stops drawing at 21, so it never holds more than 22 cards
+
+class ShoeBatch:
+  """
+  The state of a batch of shoes being simulated, one row per shoe.
+
+  Each shoe is a pre-shuffled array of card values followed by a second shuffled shoe that is only reached if a
+  round runs past the end of the first, in which case the composition and running count restart as after a
+  reshuffle. Each shoe holds up to two player hands (slot 1 is used by a split) and the dealer's cards.
+  """
+
+  def __init__(
+    self, num_shoes: int, decks: int,
+    penetration: float, rng: np.random.Generator,
+    composition: Optional[np.ndarray] = None
+  ) -> None:
+    """
+    Initialize the ShoeBatch instance with freshly shuffled shoes.
+
+    Parameters:
+      num_shoes (int): The number of shoes in the batch.
+      decks (int): The number of decks per shoe.
+      penetration (float): The fraction of the shoe dealt before it is retired.
+      rng (numpy.random.Generator): The random generator used to shuffle.
+      composition (numpy.ndarray, optional): The counts of each value to shuffle instead of full decks, for
+        sampling the rest of a partly dealt shoe; decks is ignored when given.
+    """
+    self.full_counts = CARDS_PER_DECK * decks if composition is None else np.asarray(composition, dtype=np.int32)
+    self.shoe_size = int(self.full_counts.sum())
+    self.cut = int(self.shoe_size * penetration)
+
+    shoe = np.repeat(np.arange(NUM_VALUES, dtype=np.int8), self.full_counts)
+    stacked = np.tile(shoe, (num_shoes, 1))
+    self.cards = np.hstack([rng.permuted(stacked, axis=1), rng.permuted(stacked, axis=1)])
+
+    self.position = np.zeros(num_shoes, dtype=np.intp)
+    self.counts = np.tile(self.full_counts, (num_shoes, 1))
+    self.running_count = np.zeros(num_shoes, dtype=np.int32)
+
+    self.hands = np.zeros((num_shoes, 2, MAX_HAND_CARDS), dtype=np.int8)
+    self.num_cards = np.zeros((num_shoes, 2), dtype=np.intp)
+    self.base = np.zeros((num_shoes, 2), dtype=np.int32)  # Hand totals counting Aces as 1
+    self.has_ace = np.zeros((num_shoes, 2), dtype=bool)
+    self.bets = np.zeros((num_shoes, 2), dtype=np.float64)
+    self.upcard = np.zeros(num_shoes, dtype=np.int8)
+    self.hole = np.zeros(num_shoes, dtype=np.int8)
+    self.results = np.zeros(num_shoes, dtype=np.float64)
+
+  def active(self) -> np.ndarray:
+    """
+    Returns:
+      numpy.ndarray: The shoes that have not reached the cut card.
+    """
+    return np.flatnonzero(self.position < self.cut)
+
+  def draw(self, rows: np.ndarray) -> np.ndarray:
+    """
+    Draw the next card of each given shoe and update its composition and running count.
+
+    Parameters:
+      rows (numpy.ndarray): Distinct shoe indices.
+
+    Returns:
+      numpy.ndarray: The value drawn for each shoe.
+    """
+    reshuffled = rows[self.position[rows] == self.shoe_size]
+    if reshuffled.size:
+      self.counts[reshuffled] = self.full_counts
+      self.running_count[reshuffled] = 0
+
+    values = self.cards[rows, self.position[rows]]
+    self.position[rows] += 1
+    self.counts[rows, values] -= 1
+    self.running_count[rows] += VALUE_HI_LO_WEIGHTS[values]
+    return values
+
+  def deal_to(self, rows: np.ndarray, slot: int) -> None:
+    """
+    Deal one card to a hand slot of each given shoe.
+
+    Parameters:
+      rows (numpy.ndarray): Distinct shoe indices.
+      slot (int): The hand slot.
+    """
+    values = self.draw(rows)
+    self.hands[rows, slot, self.num_cards[rows, slot]] = values
+    self.num_cards[rows, slot] += 1
+    self.base[rows, slot] += VALUE_BLACKJACK_VALUES[values]
+    self.has_ace[rows, slot] |= values == 0
+
+  def totals(self, rows: np.ndarray, slot: int) -> tuple:
+    """
+    Score a hand slot of each given shoe.
+
+    Parameters:
+      rows (numpy.ndarray): Shoe indices.
+      slot (int): The hand slot.
+
+    Returns:
+      tuple: (totals, soft), the best totals and whether each counts an Ace as 11.
+    """
+    base = self.base[rows, slot]
+    soft = self.has_ace[rows, slot] & (base + 10 <= 21)
+    return base + 10 * soft, soft
+
+  def true_counts(self, rows: np.ndarray) -> np.ndarray:
+    """
+    Compute the Hi-Lo true count of each given shoe from the cards it has left.
+
+    Parameters:
+      rows (numpy.ndarray): Shoe indices.
+
+    Returns:
+      numpy.ndarray: The running count divided by the number of decks remaining.
+    """
+    return self.running_count[rows] / (self.counts[rows].sum(axis=1) / 52.0)
+
+  def composition(self, row: int) -> np.ndarray:
+    """
+    The composition a player sees at a shoe: the remaining cards plus the dealer's unseen hole card.
+
+    Parameters:
+      row (int): The shoe index.
+
+    Returns:
+      numpy.ndarray: The counts of each value, in engine value order.
+    """
+    counts = self.counts[row].copy()
+    counts[self.hole[row]] += 1
+    return counts
+
+  def hand(self, row: int, slot: int) -> List[int]:
+    """
+    The cards of one hand, as card codes.
+
+    Parameters:
+      row (int): The shoe index.
+      slot (int): The hand slot.
+
+    Returns:
+      list of int: The card codes of the hand.
+    """
+    return self.hands[row, slot, :self.num_cards[row, slot]].tolist()
+
+class ShoeSimulator:
+  """
+  Plays rounds across a ShoeBatch with one strategy and one set of table rules.
+  """
+
+  def __init__(self, settings: DetectionSettings, strategy: Any) -> None:
+    """
+    Initialize the ShoeSimulator instance.
+
+    Parameters:
+      settings (DetectionSettings): Settings providing the table rules.
+      strategy: The strategy deciding every player action (see simulation.strategies).
+    """
+    self.settings = settings
+    self.strategy = strategy
+
+  def run(self, batch: ShoeBatch) -> Dict[str, np.ndarray]:
+    """
+    Play every shoe of a batch to its cut card.
+
+    Parameters:
+      batch (ShoeBatch): The shoes to play.
+
+    Returns:
+      dict: Per true count bucket, the number of rounds ("rounds") and the sum ("total") and sum of squares
+      ("total_sq") of the round results, in units of the initial bet.
+    """
+    rounds = np.zeros(NUM_TRUE_COUNTS, dtype=np.int64)
+    total = np.zeros(NUM_TRUE_COUNTS, dtype=np.float64)
+    total_sq = np.zeros(NUM_TRUE_COUNTS, dtype=np.float64)
+
+    rows = batch.active()
+
+    while rows.size:
+      buckets = true_count_buckets(batch.true_counts(rows))  # Counted before the round is dealt, when bets are placed
+      results = self.play_round(batch, rows)
+
+      rounds += np.bincount(buckets, minlength=NUM_TRUE_COUNTS)
+      total += np.bincount(buckets, weights=results, minlength=NUM_TRUE_COUNTS)
+      total_sq += np.bincount(buckets, weights=results * results, minlength=NUM_TRUE_COUNTS)
+      rows = batch.active()
+
+    return {"rounds": rounds, "total": total, "total_sq": total_sq}
+
+  def play_round(self, batch: ShoeBatch, rows: np.ndarray) -> np.ndarray:
+    """
+    Play one round at each given shoe.
+
+    Parameters:
+      batch (ShoeBatch): The shoes being simulated.
+      rows (numpy.ndarray): The shoes playing the round.
+
+    Returns:
+      numpy.ndarray: The result of the round at each shoe, in units of the initial bet.
+    """
+    settings = self.settings
+
+    batch.num_cards[rows] = 0
+    batch.base[rows] = 0
+    batch.has_ace[rows] = False
+    batch.bets[rows] = 0.0
+    batch.bets[rows, 0] = 1.0
+    batch.results[rows] = 0.0
+
+    batch.deal_to(rows, 0)
+    batch.upcard[rows] = batch.draw(rows)
+    batch.deal_to(rows, 0)
+    batch.hole[rows] = batch.draw(rows)
+
+    # Settle naturals
+    player_natural = batch.has_ace[rows, 0] & (batch.base[rows, 0] == 11)
+    dealer_natural = (batch.upcard[rows] + batch.hole[rows] == 9) & ((batch.upcard[rows] == 0) | (batch.hole[rows] == 0))
+    batch.results[rows[player_natural & ~dealer_natural]] = settings.blackjack_odds
+    settled = player_natural | (dealer_natural & settings.dealer_peaks_for_21)
+    batch.results[rows[~player_natural & dealer_natural & settings.dealer_peaks_for_21]] = -1.0
+    playing = rows[~settled]
+
+    if playing.size:
+      self._play_player(batch, playing)
+      self.settle(batch, playing)
+
+    return batch.results[rows]
+
+  def _play_player(self, batch: ShoeBatch, rows: np.ndarray) -> None:
+    """
+    Play the player's hands at each given shoe, from the first decision to the last card.
+
+    Parameters:
+      batch (ShoeBatch): The shoes being simulated.
+      rows (numpy.ndarray): The shoes whose hands are played.
+    """
+    settings = self.settings
+    pairs = batch.hands[rows, 0, 0] == batch.hands[rows, 0, 1]
+    actions = self.strategy.decide(
+      batch, rows, 0,
+      can_double=np.ones(rows.size, dtype=bool),
+      can_split=pairs,
+      can_surrender=np.full(rows.size, settings.can_surrender)
+    )
+
+    surrendered = rows[actions == SURRENDER]
+    batch.bets[surrendered, 0] = 0.0
+    batch.results[surrendered] = -0.5
+
+    normal = actions <= DOUBLE
+    self.play_hand(batch, rows[normal], 0, actions[normal])
+    self.play_split(batch, rows[actions == SPLIT])
+
+  def play_split(self, batch: ShoeBatch, rows: np.ndarray) -> None:
+    """
+    Split the pair in hand slot 0 of each given shoe into two hands and play both.
+
+    Parameters:
+      batch (ShoeBatch): The shoes being simulated.
+      rows (numpy.ndarray): The shoes whose pair is split.
+    """
+    if not rows.size:
+      return
+
+    settings = self.settings
+    first = batch.hands[rows, 0, 0]
+    aces = first == 0
+
+    batch.hands[rows, 1, 0] = first
+    batch.num_cards[rows] = 1
+    batch.base[rows] = VALUE_BLACKJACK_VALUES[first][:, None]
+    batch.has_ace[rows] = aces[:, None]
+    batch.bets[rows] = 1.0
+
+    # As in the EV engine, split hands double only with double after split, and split aces only if they may be hit too
+    can_double = settings.double_after_split & np.where(aces, settings.hit_split_aces and settings.double_split_aces, True)
+
+    for slot in (0, 1):
+      batch.deal_to(rows, slot)
+      actions = self.strategy.decide(
+        batch, rows, slot,
+        can_double=can_double,
+        can_split=np.zeros(rows.size, dtype=bool),
+        can_surrender=np.zeros(rows.size, dtype=bool)
+      )
+      if not settings.hit_split_aces:
+        actions[aces & (actions == HIT)] = STAND
+      self.play_hand(batch, rows, slot, actions)
+
+  def play_hand(self, batch: ShoeBatch, rows: np.ndarray, slot: int, actions: np.ndarray) -> None:
+    """
+    Apply stand, hit or double to a hand slot of each given shoe, asking the strategy again after every hit.
+
+    Parameters:
+      batch (ShoeBatch): The shoes being simulated.
+      rows (numpy.ndarray): The shoes whose hand is played.
+      slot (int): The hand slot.
+      actions (numpy.ndarray): The first action of each hand (STAND, HIT or DOUBLE).
+    """
+    while rows.size:
+      double = actions == DOUBLE
+      drawing = double | (actions == HIT)
+
+      batch.bets[rows[double], slot] *= 2.0
+      rows, double = rows[drawing], double[drawing]
+      if not rows.size:
+        break
+
+      batch.deal_to(rows, slot)
+      totals, _ = batch.totals(rows, slot)
+      rows = rows[~double & (totals < 21)]
+
+      if rows.size:
+        no = np.zeros(rows.size, dtype=bool)
+        actions = self.strategy.decide(batch, rows, slot, can_double=no, can_split=no, can_surrender=no)
+
+  def settle(self, batch: ShoeBatch, rows: np.ndarray) -> None:
+    """
+    Play the dealer's hand where any player hand is still live, then settle every hand at each given shoe.
+
+    Parameters:
+      batch (ShoeBatch): The shoes being simulated.
+      rows (numpy.ndarray): The shoes to settle.
+    """
+    settings = self.settings
+    player_totals = np.stack([batch.totals(rows, slot)[0] for slot in (0, 1)], axis=1)
+    live = (batch.bets[rows] > 0) & (player_totals <= 21)
+
+    dealer_base = VALUE_BLACKJACK_VALUES[batch.upcard[rows]] + VALUE_BLACKJACK_VALUES[batch.hole[rows]]
+    dealer_ace = (batch.upcard[rows] == 0) | (batch.hole[rows] == 0)
+    dealer_natural = (dealer_base == 11) & dealer_ace
+
+    drawing = np.flatnonzero(live.any(axis=1) & ~dealer_natural)
+
+    while drawing.size:
+      base = dealer_base[drawing]
+      soft = dealer_ace[drawing] & (base + 10 <= 21)
+      total = base + 10 * soft
+      hits = (total < 17) | (settings.dealer_hits_on_soft_17 & soft & (total == 17))
+      drawing = drawing[hits]
+
+      if drawing.size:
+        values = batch.draw(rows[drawing])
+        dealer_base[drawing] += VALUE_BLACKJACK_VALUES[values]
+        dealer_ace[drawing] |= values == 0
+
+    dealer_soft = dealer_ace & (dealer_base + 10 <= 21)
+    dealer_totals = (dealer_base + 10 * dealer_soft)[:, None]
+    dealer_bust = dealer_totals > 21
+
+    bets = batch.bets[rows]
+    wins = live & (dealer_bust | (player_totals > dealer_totals))
+    losses = (bets > 0) & ~wins & ((player_totals > 21) | (player_totals < dealer_totals))
+
+    # A split hand of an Ace and a 10-valued card pays as a natural only if the rules say so
+    if settings.natural_blackjack_splits:
+      split_natural = (batch.bets[rows, 1] > 0)[:, None] & (batch.num_cards[rows] == 2) & (player_totals == 21)
+      payouts = np.where(split_natural & ~dealer_natural[:, None], settings.blackjack_odds, 1.0)
+    else:
+      payouts = 1.0
+
+    results = (bets * payouts * wins).sum(axis=1) - (bets * losses).sum(axis=1)
+
+    # Without a peek, a dealer natural beats every hand still in play
+    results = np.where(dealer_natural, -bets.sum(axis=1), results)
+    surrendered = batch.results[rows] == -0.5
+    batch.results[rows] = np.where(surrendered, -0.5, results)
+
+def simulate_shoes(
+  settings: DetectionSettings, strategy_name: str,
+  table_path: Optional[str], num_shoes: int, decks: int,
+  penetration: float, seed: np.random.SeedSequence
+) -> Dict[str, Any]:
+  """
+  Simulate one shard of shoes. This is the unit of work sent to each process of the pool.
+
+  Parameters:
+    settings (DetectionSettings): Settings providing the table rules.
+    strategy_name (str): "basic", "table" or "engine".
+    table_path (str or None): The .npz file for the "table" strategy.
+    num_shoes (int): The number of shoes in the shard.
+    decks (int): The number of decks per shoe.
+    penetration (float): The fraction of each shoe dealt before it is retired.
+    seed (numpy.random.SeedSequence): The seed of the shard.
+
+  Returns:
+    dict: The per true count accumulators of ShoeSimulator.run, plus the CPU seconds spent ("seconds").
+  """
+  start = time.process_time()
+  strategy = make_strategy(strategy_name, settings, table_path)
+  batch = ShoeBatch(num_shoes, decks, penetration, np.random.default_rng(seed))
+  summary = ShoeSimulator(settings, strategy).run(batch)
+  summary["seconds"] = time.process_time() - start
+  return summary
+
+def run_simulation(
+  settings: DetectionSettings, strategy_name: str = "basic",
+  table_path: Optional[str] = None, num_shoes: int = 10000,
+  decks: Optional[int] = None, penetration: float = 0.75,
+  seed: int = 0, workers: Optional[int] = None,
+  shoes_per_task: int = 1000
+) -> Dict[str, Any]:
+  """
+  Simulate many shoes, sharded across a process pool.
+
+  Parameters:
+    settings (DetectionSettings): Settings providing the table rules and, by default, the number of decks.
+    strategy_name (str): "basic", "table" or "engine".
+    table_path (str or None): The .npz file for the "table" strategy.
+    num_shoes (int): The total number of shoes.
+    decks (int or None): The number of decks per shoe; defaults to settings.deck_size.
+    penetration (float): The fraction of each shoe dealt before it is retired.
+    seed (int): The root seed; the same seed and shard layout reproduce the same results.
+    workers (int or None): The number of processes; defaults to the number of CPUs.
+    shoes_per_task (int): The number of shoes simulated together in one batch.
+
+  Returns:
+    dict: The merged per true count accumulators, the total CPU seconds across workers ("seconds"), and the
+    elapsed wall-clock seconds ("wall_seconds").
+  """
+  decks = decks or settings.deck_size
+  workers = workers or os.cpu_count() or 1
+  num_tasks = math.ceil(num_shoes / shoes_per_task)
+  seeds = np.random.SeedSequence(seed).spawn(num_tasks)
+  sizes = [min(shoes_per_task, num_shoes - i * shoes_per_task) for i in range(num_tasks)]
+
+  merged = {
+    "rounds": np.zeros(NUM_TRUE_COUNTS, dtype=np.int64),
+    "total": np.zeros(NUM_TRUE_COUNTS, dtype=np.float64),
+    "total_sq": np.zeros(NUM_TRUE_COUNTS, dtype=np.float64),
+    "seconds": 0.0
+  }
+
+  start = time.perf_counter()
+
+  # Spawned rather than forked workers, so each starts its own JVM when the engine strategy is used
+  with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+    shards = pool.map(
+      simulate_shoes,
+      [settings] * num_tasks, [strategy_name] * num_tasks, [table_path] * num_tasks,
+      sizes, [decks] * num_tasks, [penetration] * num_tasks, seeds
+    )
+
+    for shard in shards:
+      for key in merged:
+        merged[key] += shard[key]
+
+  merged["wall_seconds"] = time.perf_counter() - start
+  logger.info(
+    "Simulated %d round(s) from %d shoe(s) in %.2f s", int(merged["rounds"].sum()), num_shoes, merged["wall_seconds"]
+  )
+  return merged
+
+def summarize(summary: Dict[str, Any]) -> List[Dict[str, float]]:
+  """
+  Compute the EV and variance of a one-unit bet per true count bucket.
+
+  Parameters:
+    summary (dict): Accumulators as returned by run_simulation.
+
+  Returns:
+    list of dict: For each bucket with at least one round, the true count, the number of rounds, the mean result
+    ("ev"), the sample variance, and the standard error of the mean.
+  """
+  rows = []
+
+  for bucket in np.flatnonzero(summary["rounds"]):
+    n = int(summary["rounds"][bucket])
+    ev = summary["total"][bucket] / n
+    variance = (summary["total_sq"][bucket] - n * ev * ev) / (n - 1) if n > 1 else 0.0
+    rows.append({
+      "true_count": int(bucket) - MAX_TRUE_COUNT,
+      "rounds": n,
+      "ev": ev,
+      "variance": variance,
+      "std_error": math.sqrt(variance / n)
+    })
+
+  return rows
+
+def main() -> None:
+  """
+  Parse command-line arguments, run a simulation, and print the per true count summary and throughput.
+  """
+  parser = argparse.ArgumentParser(description="Monte Carlo simulation of blackjack shoes.")
+  parser.add_argument("--config", default="config.yaml", help="Configuration file providing the table rules")
+  parser.add_argument("--strategy", default="basic", choices=["basic", "table", "engine"], help="Strategy source")
+  parser.add_argument("--table", help="Strategy tables (.npz) for --strategy table")
+  parser.add_argument("--shoes", type=int, default=10000, help="Number of shoes to simulate")
+  parser.add_argument("--decks", type=int, help="Decks per shoe (default: deck_size from the configuration)")
+  parser.add_argument("--penetration", type=float, default=0.75, help="Fraction of each shoe dealt")
+  parser.add_argument("--seed", type=int, default=0, help="Root random seed")
+  parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+  parser.add_argument("--shoes-per-task", type=int, default=1000, help="Shoes simulated together in one batch")
+  args = parser.parse_args()
+
+  settings = DetectionSettings(args.config)
+  summary = run_simulation(
+    settings, args.strategy, args.table, args.shoes, args.decks, args.penetration, args.seed, args.workers,
+    args.shoes_per_task
+  )
+
+  print(f"{'TC':>4} {'rounds':>12} {'EV %':>9} {'variance':>9} {'std err %':>10}")
+  for row in summarize(summary):
+    print(
+      f"{row['true_count']:>4} {row['rounds']:>12} {row['ev'] * 100:>9.3f} {row['variance']:>9.4f} "
+      f"{row['std_error'] * 100:>10.3f}"
+    )
+
+  total_rounds = int(summary["rounds"].sum())
+  overall_ev = summary["total"].sum() / total_rounds
+  print(f"overall EV: {overall_ev * 100:.3f}% over {total_rounds} rounds")
+  print(f"throughput: {total_rounds / summary['seconds']:.0f} rounds/s/core, {total_rounds / summary['wall_seconds']:.0f} rounds/s wall")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,301 @@
+"""
+Module for the playing strategies used by the shoe simulator.
+
+This module defines the action codes shared by the simulator and its strategies, and three strategy sources:
+TableStrategy looks decisions up in hard, soft and pair tables (optionally indexed by true count) for a whole batch
+of hands at once, basic_strategy builds such a table for the standard multi-deck chart, and EngineStrategy asks the
+Java EV engine for the exact best action of each hand given the shoe's remaining composition.
+
+Every strategy exposes decide(batch, rows, slot, can_double, can_split, can_surrender), which returns one action
+code per row and only returns an action that is allowed for that row.
+"""
+
+import numpy as np
+from typing import Any, Dict, Optional
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Action codes returned by strategies
+STAND = 0
+HIT = 1
+DOUBLE = 2
+SPLIT = 3
+SURRENDER = 4
+
+ACTION_NAMES = ["stand", "hit", "double", "split", "surrender"]
+
+MAX_TRUE_COUNT = 10  # True counts are bucketed as integers clipped to [-MAX_TRUE_COUNT, MAX_TRUE_COUNT]
+NUM_TRUE_COUNTS = 2 * MAX_TRUE_COUNT + 1
+
+# Table entries: preferred action and the fallback used when the preferred action is not allowed
+_TABLE_CODES = {"S": 0, "H": 1, "D": 2, "Ds": 3, "R": 4, "Rs": 5}
+_PREFERRED = np.array([STAND, HIT, DOUBLE, DOUBLE, SURRENDER, SURRENDER], dtype=np.int8)
+_FALLBACK = np.array([STAND, HIT, HIT, STAND, HIT, STAND], dtype=np.int8)
+
+def true_count_buckets(true_counts: np.ndarray) -> np.ndarray:
+  """
+  Convert true counts into bucket indices.
+
+  Parameters:
+    true_counts (numpy.ndarray): Hi-Lo true counts.
+
+  Returns:
+    numpy.ndarray: Bucket index per count (0 to NUM_TRUE_COUNTS - 1), where bucket MAX_TRUE_COUNT holds counts in
+    [0, 1).
+  """
+  return np.clip(np.floor(true_counts), -MAX_TRUE_COUNT, MAX_TRUE_COUNT).astype(np.intp) + MAX_TRUE_COUNT
+
+class TableStrategy:
+  """
+  A strategy that looks decisions up in precomputed tables.
+
+  The hard and soft tables hold table codes indexed by [total, upcard] (totals 0-21, upcards as value indices
+  0-9 for A-10), and the pair table holds booleans indexed by [pair value, upcard]. Each table may carry a leading
+  true count axis of length NUM_TRUE_COUNTS, in which case decisions depend on the true count bucket of the shoe.
+  """
+
+  def __init__(self, hard: np.ndarray, soft: np.ndarray, pairs: np.ndarray) -> None:
+    """
+    Initialize the TableStrategy instance.
+
+    Parameters:
+      hard (numpy.ndarray): Table codes for hard totals.
+      soft (numpy.ndarray): Table codes for soft totals.
+      pairs (numpy.ndarray): Whether to split each pair.
+
+    Raises:
+      ValueError: If a table has an unexpected shape.
+    """
+    self.hard = self._check(np.asarray(hard, dtype=np.int8), (22, 10), "hard")
+    self.soft = self._check(np.asarray(soft, dtype=np.int8), (22, 10), "soft")
+    self.pairs = self._check(np.asarray(pairs, dtype=bool), (10, 10), "pairs")
+
+  @staticmethod
+  def _check(table: np.ndarray, shape: tuple, name: str) -> np.ndarray:
+    """
+    Validate the shape of a table, adding a true count axis if it has none.
+
+    Parameters:
+      table (numpy.ndarray): The table.
+      shape (tuple): The expected shape without the true count axis.
+      name (str): The table name, for error messages.
+
+    Returns:
+      numpy.ndarray: The table with a leading true count axis.
+
+    Raises:
+      ValueError: If the table has an unexpected shape.
+    """
+    if table.shape == shape:
+      return np.broadcast_to(table, (NUM_TRUE_COUNTS,) + shape)
+    if table.shape == (NUM_TRUE_COUNTS,) + shape:
+      return table
+    raise ValueError(f"Unexpected shape {table.shape} for the {name} table")
+
+  @classmethod
+  def load(cls, path: str) -> "TableStrategy":
+    """
+    Load tables from a NumPy .npz file with "hard", "soft" and "pairs" arrays.
+
+    Parameters:
+      path (str): The path of the file.
+
+    Returns:
+      TableStrategy: The loaded strategy.
+    """
+    with np.load(path) as data:
+      return cls(data["hard"], data["soft"], data["pairs"])
+
+  def save(self, path: str) -> None:
+    """
+    Save the tables to a NumPy .npz file.
+
+    Parameters:
+      path (str): The path of the file.
+    """
+    np.savez(path, hard=self.hard, soft=self.soft, pairs=self.pairs)
+
+  def decide(
+    self, batch: Any, rows: np.ndarray, slot: int,
+    can_double: np.ndarray, can_split: np.ndarray,
+    can_surrender: np.ndarray
+  ) -> np.ndarray:
+    """
+    Decide the action of one hand slot for a batch of shoes.
+
+    Parameters:
+      batch (ShoeBatch): The shoes being simulated.
+      rows (numpy.ndarray): The shoes whose hand is to be decided.
+      slot (int): The hand slot (0, or 1 for the second hand of a split).
+      can_double (numpy.ndarray): Whether each hand may double.
+      can_split (numpy.ndarray): Whether each hand may split.
+      can_surrender (numpy.ndarray): Whether each hand may surrender.
+
+    Returns:
+      numpy.ndarray: An action code per row.
+    """
+    totals, soft = batch.totals(rows, slot)
+    upcards = batch.upcard[rows]
+    buckets = true_count_buckets(batch.true_counts(rows))
+
+    codes = np.where(
+      soft,
+      self.soft[buckets, np.minimum(totals, 21), upcards],
+      self.hard[buckets, np.minimum(totals, 21), upcards]
+    )
+    preferred = _PREFERRED[codes]
+    allowed = np.where(preferred == DOUBLE, can_double, np.where(preferred == SURRENDER, can_surrender, True))
+    actions = np.where(allowed, preferred, _FALLBACK[codes])
+
+    split = can_split & self.pairs[buckets, batch.hands[rows, slot, 0], upcards]
+    return np.where(split, SPLIT, actions).astype(np.int8)
+
+def _parse_chart(chart: Dict[int, str]) -> np.ndarray:
+  """
+  Build a [total, upcard] table from chart rows written for upcards 2-10 then A.
+
+  Parameters:
+    chart (dict): Space-separated table codes per total; totals not listed default to "H" below 12 and "S" above.
+
+  Returns:
+    numpy.ndarray: Table codes indexed by [total, upcard value index].
+  """
+  table = np.empty((22, 10), dtype=np.int8)
+
+  for total in range(22):
+    row = chart.get(total)
+    codes = row.split() if row else ["H" if total < 12 else "S"] * 10
+    table[total] = [_TABLE_CODES[code] for code in codes[9:] + codes[:9]]  # Move the A column to value index 0
+
+  return table
+
+def basic_strategy() -> TableStrategy:
+  """
+  Build the standard multi-deck basic strategy.
+
+  The chart assumes the dealer hits soft 17, doubling after splits and late surrender; for other rules it is a
+  close approximation, and EngineStrategy gives the exact decision.
+
+  Returns:
+    TableStrategy: Basic strategy, independent of the true count.
+  """
+  hard = _parse_chart({
+    9: "H D D D D H H H H H",
+    10: "D D D D D D D D H H",
+    11: "D D D D D D D D D D",
+    12: "H H S S S H H H H H",
+    13: "S S S S S H H H H H",
+    14: "S S S S S H H H H H",
+    15: "S S S S S H H H R R",
+    16: "S S S S S H H R R R",
+    17: "S S S S S S S S S Rs"
+  })
+  soft = _parse_chart({
+    12: "H H H H H H H H H H",
+    13: "H H H D D H H H H H",
+    14: "H H H D D H H H H H",
+    15: "H H D D D H H H H H",
+    16: "H H D D D H H H H H",
+    17: "H D D D D H H H H H",
+    18: "Ds Ds Ds Ds Ds S S H H H",
+    19: "S S S S Ds S S S S S"
+  })
+
+  split_upcards = {  # Upcards (2-11, 11 for A) against which each pair value is split
+    1: range(2, 12), 2: range(2, 8), 3: range(2, 8), 4: range(5, 7), 6: range(2, 7),
+    7: range(2, 8), 8: range(2, 12), 9: [2, 3, 4, 5, 6, 8, 9]
+  }
+  pairs = np.zeros((10, 10), dtype=bool)
+
+  for value, upcards in split_upcards.items():
+    for upcard in upcards:
+      pairs[value - 1, 0 if upcard == 11 else upcard - 1] = True
+
+  return TableStrategy(hard, soft, pairs)
+
+class EngineStrategy:
+  """
+  A strategy that plays every hand by the Java EV engine's highest-EV action.
+
+  Each decision evaluates the allowed actions against the exact remaining composition of the hand's shoe, so this
+  strategy is exact but orders of magnitude slower than a table; it runs one hand at a time.
+  """
+
+  def __init__(self, settings: DetectionSettings, jar_path: str = "target/blackjack-cv-ev-analyzer-1.0.0.jar") -> None:
+    """
+    Initialize the EngineStrategy instance.
+
+    Parameters:
+      settings (DetectionSettings): Settings providing the table rules and the Java EV calculator.
+      jar_path (str): The path to the JAR file containing the EV engine.
+    """
+    from evaluation.ev_engine import EVEngineWrapper  # Imported here so table strategies run without JPype
+    self.evaluator = EVEngineWrapper(settings, jar_path=jar_path)
+
+  def decide(
+    self, batch: Any, rows: np.ndarray, slot: int,
+    can_double: np.ndarray, can_split: np.ndarray,
+    can_surrender: np.ndarray
+  ) -> np.ndarray:
+    """
+    Decide the action of one hand slot for a batch of shoes.
+
+    Parameters:
+      batch (ShoeBatch): The shoes being simulated.
+      rows (numpy.ndarray): The shoes whose hand is to be decided.
+      slot (int): The hand slot (0, or 1 for the second hand of a split).
+      can_double (numpy.ndarray): Whether each hand may double.
+      can_split (numpy.ndarray): Whether each hand may split.
+      can_surrender (numpy.ndarray): Whether each hand may surrender.
+
+    Returns:
+      numpy.ndarray: An action code per row.
+    """
+    actions = np.empty(len(rows), dtype=np.int8)
+
+    for i, row in enumerate(rows):
+      deck = batch.composition(row)
+      player_hand = batch.hand(row, slot)
+      dealer_hand = [int(batch.upcard[row])]
+
+      evs = {
+        STAND: self.evaluator.calculate_ev("stand", deck, player_hand, dealer_hand),
+        HIT: self.evaluator.calculate_ev("hit", deck, player_hand, dealer_hand)
+      }
+      if can_double[i]:
+        evs[DOUBLE] = self.evaluator.calculate_ev("double", deck, player_hand, dealer_hand)
+      if can_split[i]:
+        evs[SPLIT] = self.evaluator.calculate_ev("split", deck, player_hand, dealer_hand)
+      if can_surrender[i]:
+        evs[SURRENDER] = -0.5
+
+      actions[i] = max(evs, key=evs.get)
+
+    return actions
+
+def make_strategy(name: str, settings: DetectionSettings, table_path: Optional[str] = None) -> Any:
+  """
+  Create a strategy by name.
+
+  Parameters:
+    name (str): "basic", "table" or "engine".
+    settings (DetectionSettings): Settings providing the table rules and the Java EV calculator.
+    table_path (str): The .npz file to load for the "table" strategy.
+
+  Returns:
+    The strategy.
+
+  Raises:
+    ValueError: If the name is unknown or a table strategy has no table path.
+  """
+  if name == "basic":
+    return basic_strategy()
+  if name == "table":
+    if not table_path:
+      raise ValueError("The table strategy requires a table path")
+    return TableStrategy.load(table_path)
+  if name == "engine":
+    return EngineStrategy(settings)
+  raise ValueError(f"Unknown strategy: {name}")
@@ -0,0 +1,194 @@
+"""
+Module for running capture, inference and rendering in separate processes.
+
+This module splits the main loop of BlackjackVisionAnalyzer over three processes that exchange frames through a
+FrameRing, so decoding, inference with card tracking and EV evaluation, and annotation with display each get a
+core instead of contending for the GIL:
+
+  capture (child)    reads the video source and resizes each frame straight into a free ring slot;
+  inference (main)   runs detection and analysis on the slot in place, at the configured inference interval;
+  render (child)     annotates the slot in place with the latest analysis, displays and records it, and frees
+                     the slot.
+
+Only slot indices, sequence numbers and the analysis results pass through the queues between them. When rendering
+falls behind, capture waits for a free slot rather than buffering frames.
+"""
+
+import multiprocessing
+import time
+import cv2
+from typing import Any, Optional, Union
+from annotation.annotator import annotate_frame_with_scores
+from config.detection_settings import DetectionSettings
+from debugging.logger import setup_logger
+from video.frame_ring import FrameRing
+from video.video_recorder import VideoRecorder
+from video.video_stream import VideoStreamReader
+
+logger = setup_logger(__name__)
+
+_POLL_SECONDS = 0.5  # How often a waiting process checks for a stop request
+
+def capture_worker(source: Union[int, str], ring: FrameRing, output: Any, stop: Any) -> None:
+  """
+  Capture process: read frames into ring slots and announce them, until the source ends or a stop is requested.
+
+  Parameters:
+    source (int or str): The webcam index or video file path.
+    ring (FrameRing): The ring shared with the other processes.
+    output (multiprocessing.Queue): Receives a FrameSlot per frame, then None when capture ends.
+    stop (multiprocessing.Event): Set when the pipeline should stop.
+  """
+  height, width = ring.frame_shape[:2]
+  reader = VideoStreamReader(source)
+
+  try:
+    while not stop.is_set():
+      frame = reader.read_frame()
+      if frame is None:
+        break
+
+      slot = None
+      while slot is None and not stop.is_set():
+        slot = ring.acquire(timeout=_POLL_SECONDS)
+      if slot is None:
+        break
+
+      cv2.resize(frame, (width, height), dst=ring.frame(slot))  # Decoded frame is resized straight into shared memory
+      output.put(ring.publish(slot, {"timestamp": time.time()}))
+  finally:
+    reader.release()
+    output.put(None)
+    ring.close()
+
+def render_worker(ring: FrameRing, source: Any, config: DetectionSettings, stop: Any, reshuffle: Any) -> None:
+  """
+  Render process: annotate, display and record each frame, then free its slot, until the inference process
+  signals the end.
+
+  Parameters:
+    ring (FrameRing): The ring shared with the other processes.
+    source (multiprocessing.Queue): FrameSlot messages carrying the analysis to draw, then None.
+    config (DetectionSettings): Settings for the display size and video recording.
+    stop (multiprocessing.Event): Set here when the quit key is pressed.
+    reshuffle (multiprocessing.Event): Set here when the reshuffle key is pressed; cleared by the inference process.
+  """
+  video_recorder = None
+  if config.record_video:
+    video_recorder = VideoRecorder(
+      config.record_video_dir,
+      codec=config.record_video_codec,
+      fps=config.record_video_fps,
+      frame_size=config.record_video_frame_size,
+      keep_every=config.record_video_keep_every,
+      segment_seconds=config.record_video_segment_seconds,
+      queue_size=config.record_video_queue_size
+    )
+
+  try:
+    while True:
+      message = source.get()
+      if message is None:
+        break
+
+      frame = ring.frame(message.slot)
+      annotation = message.metadata
+      if annotation is not None:
+        annotate_frame_with_scores(
+          frame, annotation["boxes"], annotation["grouped_hands"], annotation["stable_labels"],
+          annotation["hand_totals"], annotation["recommendations"]
+        )
+
+      display_frame = cv2.resize(frame, config.display_frame_size)  # A new array, so the slot can be freed now
+      del frame
+      ring.release(message.slot)
+
+      cv2.imshow("rain-vision-v1", display_frame)
+      if video_recorder is not None:
+        video_recorder.submit(display_frame)
+
+      key = cv2.waitKey(1) & 0xFF
+      if key == ord("r"):
+        reshuffle.set()
+      elif key == ord("q"):
+        logger.info("Quit signal received; stopping pipeline")
+        stop.set()
+  finally:
+    if video_recorder is not None:
+      video_recorder.close()
+    cv2.destroyAllWindows()
+    ring.close()
+
+def run_pipeline(app: Any) -> None:
+  """
+  Run the analyzer's main loop as a capture, inference and render pipeline over three processes.
+
+  Parameters:
+    app (BlackjackVisionAnalyzer): An analyzer with its model loaded, created with open_source=False; this
+      process runs its inference and analysis.
+  """
+  config = app.config
+  width, height = config.inference_frame_size
+  context = multiprocessing.get_context("spawn")  # Children must not inherit the JVM or the model
+  ring = FrameRing(config.pipeline_ring_slots, (height, width, 3), context=context)
+  captured = context.Queue()
+  rendered = context.Queue()
+  stop = context.Event()
+  reshuffle = context.Event()
+
+  source = config.webcam_index if config.use_webcam else config.video_path
+  capture = context.Process(target=capture_worker, args=(source, ring, captured, stop), name="capture", daemon=True)
+  render = context.Process(target=render_worker, args=(ring, rendered, config, stop, reshuffle), name="render", daemon=True)
+  capture.start()
+  render.start()
+  logger.info("Starting pipelined main loop")
+
+  annotation: Optional[dict] = None
+
+  try:
+    while True:
+      message = captured.get()
+      if message is None:
+        logger.info("Capture ended; exiting main loop")
+        break
+      app.frame_index += 1
+      if app.profiler is not None:
+        app.profiler.begin()  # Waiting for capture is left out; the capture process reads in parallel
+
+      if reshuffle.is_set():
+        reshuffle.clear()
+        app.reshuffle()
+
+      # The slot cannot be overwritten here: capture only writes into slots released by the render process, which
+      # releases each frame once, after this process has forwarded it below (see video.frame_ring)
+      # Analyze the frame in place only if the inference interval has elapsed; otherwise redraw the last analysis
+      current_time = time.time()
+      if current_time - app.last_update >= config.inference_interval:
+        frame = ring.frame(message.slot)
+        boxes, labels, confidences = app.detect(frame)
+        del frame
+        if app.profiler is not None:
+          app.profiler.mark("inference")
+        analysis = app.analyze_detections(boxes, labels, confidences)
+        annotation = {
+          "boxes": boxes,
+          "grouped_hands": analysis["grouped_hands"],
+          "stable_labels": analysis["stable_labels"],
+          "hand_totals": analysis["hand_totals"],
+          "recommendations": {i: evaluation["recommendation"] for i, evaluation in analysis["evaluations"].items()}
+        }
+        app.last_update = current_time
+
+      rendered.put(message._replace(metadata=annotation))
+      if app.profiler is not None:
+        app.profiler.mark("analysis")
+        app.profiler.end()
+  finally:
+    stop.set()
+    rendered.put(None)
+    capture.join(timeout=5)
+    render.join(timeout=5)
+    logger.info("Frame ring: %s", ring.stats())
+    ring.close()
+
+    app.close()
@@ -0,0 +1,177 @@
+"""
+Module for passing frames between processes through shared memory.
+
+This module defines the FrameRing class, a ring of fixed-size frame slots in a multiprocessing.shared_memory block.
+A producer acquires a free slot, writes the frame straight into it, and publishes it as a FrameSlot message: the
+slot index, a sequence number and small metadata. Only these messages travel through multiprocessing queues, so
+a 1920x1080x3 frame is never pickled; every stage works on a view of the same memory, and the last stage releases
+the slot for reuse. When every slot is in flight, the producer waits, which applies backpressure to capture.
+
+The ring keeps two shared cursors, the last published sequence number and the number of released frames, from
+which any process can read how many frames are in flight. A slot is only handed out again once it is released, so
+a published frame stays in its slot until the last stage is done with it. A ring has a single producer.
+"""
+
+import multiprocessing
+import queue
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from debugging.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_ALIGNMENT = 64  # Slots start on cache-line boundaries
+_PUBLISHED = 0  # Cursor: last published sequence number (-1 before the first)
+_RELEASED = 1  # Cursor: number of frames released
+
+class FrameSlot(NamedTuple):
+  """
+  A message announcing a frame in a ring slot.
+  """
+  slot: int
+  sequence: int
+  metadata: Optional[Dict[str, Any]] = None
+
+class FrameRing:
+  """
+  A class to exchange frames between processes through shared-memory slots.
+  """
+
+  def __init__(
+    self, num_slots: int, frame_shape: Tuple[int, ...],
+    dtype: Any = np.uint8, context: Optional[Any] = None
+  ) -> None:
+    """
+    Create the shared-memory block and mark every slot free. The ring is passed to child processes as a process
+    argument; they attach to the same block.
+
+    Parameters:
+      num_slots (int): The number of frame slots, i.e. the maximum number of frames in flight.
+      frame_shape (tuple): The shape of every frame, e.g. (height, width, 3).
+      dtype (numpy.dtype): The element type of the frames.
+      context (multiprocessing context, optional): The context the consuming processes are started from.
+    """
+    self.num_slots = int(num_slots)
+    self.frame_shape = tuple(frame_shape)
+    self.dtype = np.dtype(dtype)
+    self.frame_bytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+    self.slot_bytes = -(-self.frame_bytes // _ALIGNMENT) * _ALIGNMENT
+    self.header_bytes = _ALIGNMENT  # The two int64 cursors, padded to a cache line
+
+    context = context or multiprocessing.get_context()
+    self._shm = shared_memory.SharedMemory(create=True, size=self.header_bytes + self.num_slots * self.slot_bytes)
+    self._owner = True
+    self._free = context.Queue()
+    self._next_sequence = 0
+    self._map()
+
+    self._cursors[_PUBLISHED] = -1
+    self._cursors[_RELEASED] = 0
+    for slot in range(self.num_slots):
+      self._free.put(slot)
+
+    logger.info(
+      "Frame ring %s: %d slot(s) of %s %s (%.1f MiB)",
+      self._shm.name, self.num_slots, self.frame_shape, self.dtype, self._shm.size / 2**20
+    )
+
+  def _map(self) -> None:
+    """
+    Create the views of the header and of every slot.
+    """
+    self._cursors = np.ndarray((2,), dtype=np.int64, buffer=self._shm.buf)
+    self._frames = [
+      np.ndarray(self.frame_shape, dtype=self.dtype, buffer=self._shm.buf, offset=self.header_bytes + slot * self.slot_bytes)
+      for slot in range(self.num_slots)
+    ]
+
+  def __getstate__(self) -> Dict[str, Any]:
+    state = {key: value for key, value in self.__dict__.items() if key not in ("_shm", "_cursors", "_frames")}
+    state["_name"] = self._shm.name
+    return state
+
+  def __setstate__(self, state: Dict[str, Any]) -> None:
+    name = state.pop("_name")
+    self.__dict__.update(state)
+    self._owner = False
+    self._shm = shared_memory.SharedMemory(name=name)
+    self._map()
+
+  def acquire(self, timeout: Optional[float] = None) -> Optional[int]:
+    """
+    Take a free slot to write a frame into.
+
+    Parameters:
+      timeout (float, optional): Seconds to wait for a slot; None waits indefinitely.
+
+    Returns:
+      int or None: The slot index, or None if no slot was released in time.
+    """
+    try:
+      return self._free.get(timeout=timeout)
+    except queue.Empty:
+      return None
+
+  def frame(self, slot: int) -> np.ndarray:
+    """
+    Parameters:
+      slot (int): A slot index.
+
+    Returns:
+      numpy.ndarray: A view of the slot's frame in shared memory. It is only valid until the slot is released.
+    """
+    return self._frames[slot]
+
+  def publish(self, slot: int, metadata: Optional[Dict[str, Any]] = None) -> FrameSlot:
+    """
+    Announce a written slot under the next sequence number. Only the producer publishes.
+
+    Parameters:
+      slot (int): The slot the frame was written into.
+      metadata (dict, optional): Small picklable data to pass along with the frame.
+
+    Returns:
+      FrameSlot: The message to send to the next stage.
+    """
+    sequence = self._next_sequence
+    self._next_sequence += 1
+    self._cursors[_PUBLISHED] = sequence
+    return FrameSlot(slot, sequence, metadata)
+
+  def release(self, slot: int) -> None:
+    """
+    Return a slot to the producer once the last stage is done with its frame. Only the last stage releases.
+
+    Parameters:
+      slot (int): The slot index.
+    """
+    self._cursors[_RELEASED] += 1
+    self._free.put(slot)
+
+  def stats(self) -> Dict[str, int]:
+    """
+    Retrieve the ring cursors.
+
+    Returns:
+      dict: The number of frames published and released, and the number currently in flight.
+    """
+    published = int(self._cursors[_PUBLISHED]) + 1
+    released = int(self._cursors[_RELEASED])
+    return {"published": published, "released": released, "in_flight": published - released}
+
+  def close(self) -> None:
+    """
+    Detach from the shared-memory block, and free it if this ring created it. Views returned by frame() must not
+    be used afterwards.
+    """
+    self._cursors = None
+    self._frames = []
+
+    try:
+      self._shm.close()
+    except BufferError:
+      logger.warning("Frame ring %s still has views in use; leaving it mapped", self._shm.name)
+
+    if self._owner:
+      self._shm.unlink()
@@ -0,0 +1,162 @@
+"""
+Module for recording annotated frames to video files in the background.
+
+This module defines the VideoRecorder class, which takes frames from the main loop through a bounded queue and
+encodes them with OpenCV on a background thread, so encoding never adds to the time of a frame. Frames are
+decimated before they are queued, resized to the output resolution on the encoder thread, and written to segment
+files that are rotated after a fixed duration. When the encoder falls behind and the queue is full, new frames are
+dropped and counted instead of blocking the caller.
+"""
+
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+from debugging.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class VideoRecorder:
+  """
+  A class to record frames to rotating video segment files on a background encoder thread.
+  """
+
+  def __init__(
+    self, output_dir: str, codec: str = "mp4v",
+    fps: float = 30.0, frame_size: Tuple[int, int] = (1280, 720),
+    keep_every: int = 1, segment_seconds: float = 300.0,
+    queue_size: int = 64, extension: str = "mp4"
+  ) -> None:
+    """
+    Initialize the VideoRecorder instance and start its encoder thread.
+
+    Parameters:
+      output_dir (str): The directory segment files are written to; created if missing.
+      codec (str): The FourCC code of the video codec (e.g., "mp4v", "avc1", "MJPG").
+      fps (float): The frame rate written to the files, i.e. the rate of the frames kept after decimation.
+      frame_size (tuple): The output resolution as (width, height); frames of another size are resized.
+      keep_every (int): Keep one of every keep_every submitted frames.
+      segment_seconds (float): The video duration of each segment file before a new one is started.
+      queue_size (int): The maximum number of frames waiting to be encoded.
+      extension (str): The file extension of the segment files.
+    """
+    self.output_dir = output_dir
+    self.fourcc = cv2.VideoWriter_fourcc(*codec)
+    self.fps = fps
+    self.frame_size = tuple(frame_size)
+    self.keep_every = max(int(keep_every), 1)
+    self.segment_frames = max(int(segment_seconds * fps), 1)
+    self.extension = extension
+    self.session = time.strftime("%Y%m%d_%H%M%S")
+
+    self.submitted = 0
+    self.decimated = 0
+    self.dropped = 0
+    self.written = 0
+    self.segments = 0
+
+    self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(maxsize=queue_size)
+    self._writer = None
+    self._segment_written = 0
+
+    os.makedirs(output_dir, exist_ok=True)
+    self._thread = threading.Thread(target=self._run, name="video-recorder", daemon=True)
+    self._thread.start()
+    logger.info("Recording video to %s (%s, %.1f fps, %dx%d)", output_dir, codec, fps, *self.frame_size)
+
+  def submit(self, frame: np.ndarray) -> bool:
+    """
+    Offer a frame for recording without blocking.
+
+    The frame is queued as is, so the caller must not modify it afterwards.
+
+    Parameters:
+      frame (numpy.ndarray): A BGR frame.
+
+    Returns:
+      bool: True if the frame was queued, False if it was skipped by decimation or dropped because the queue was
+      full.
+    """
+    self.submitted += 1
+
+    if (self.submitted - 1) % self.keep_every:
+      self.decimated += 1
+      return False
+
+    try:
+      self._queue.put_nowait(frame)
+      return True
+    except queue.Full:
+      self.dropped += 1
+      return False
+
+  def _run(self) -> None:
+    """
+    Encoder loop: write queued frames until the end-of-stream marker, rotating segments as they fill.
+    """
+    while True:
+      frame = self._queue.get()
+
+      if frame is None:
+        break
+
+      if self._writer is None or self._segment_written >= self.segment_frames:
+        self._open_segment()
+
+      if (frame.shape[1], frame.shape[0]) != self.frame_size:
+        frame = cv2.resize(frame, self.frame_size)
+
+      self._writer.write(frame)
+      self._segment_written += 1
+      self.written += 1
+
+    if self._writer is not None:
+      self._writer.release()
+
+  def _open_segment(self) -> None:
+    """
+    Close the current segment file, if any, and start the next one.
+    """
+    if self._writer is not None:
+      self._writer.release()
+
+    path = os.path.join(self.output_dir, f"session_{self.session}_{self.segments:03d}.{self.extension}")
+    self._writer = cv2.VideoWriter(path, self.fourcc, self.fps, self.frame_size)
+
+    if not self._writer.isOpened():
+      logger.error("Unable to open video writer for %s", path)
+
+    self._segment_written = 0
+    self.segments += 1
+    logger.info("Recording segment %s", path)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    Retrieve recording counters.
+
+    Returns:
+      dict: The number of frames submitted, skipped by decimation, dropped under backpressure and written, the
+      number of frames currently queued, and the number of segment files started.
+    """
+    return {
+      "submitted": self.submitted,
+      "decimated": self.decimated,
+      "dropped": self.dropped,
+      "written": self.written,
+      "queued": self._queue.qsize(),
+      "segments": self.segments
+    }
+
+  def close(self, timeout: Optional[float] = None) -> None:
+    """
+    Encode the frames still queued, close the current segment and stop the encoder thread.
+
+    Parameters:
+      timeout (float, optional): Seconds to wait for the encoder to finish.
+    """
+    self._queue.put(None)
+    self._thread.join(timeout)
+    logger.info("Video recording stopped: %s", self.stats())
@@ -0,0 +1,8 @@
+"""
+Shared pytest setup: the application modules live in psrc and import each other as top-level packages.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "psrc"))
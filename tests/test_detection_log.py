@@ -0,0 +1,95 @@
+"""
+Tests for the detection log format: DetectionRecorder writes, DetectionLog reads.
+"""
+
+import os
+import numpy as np
+import pytest
+from replay.detection_log import DetectionLog, DetectionRecorder
+
+def _detections(i):
+  """
+  The detections recorded for frame i: i % 3 boxes, so some frames have none.
+  """
+  n = i % 3
+  boxes = [[float(i), float(k), float(i) + 1.0, float(k) + 1.0] for k in range(n)]
+  return boxes, [(i + k) % 13 for k in range(n)], [0.5 + 0.01 * k for k in range(n)]
+
+def _record(path, num_frames, chunk_frames):
+  recorder = DetectionRecorder(path, chunk_frames=chunk_frames, flush_seconds=3600.0)
+  for i in range(num_frames):
+    recorder.record(i * 2, 1000.0 + i, *_detections(i))
+  recorder.close()
+
+def _check_frame(log, position):
+  frame_index, timestamp, boxes, classes, confidences = log.frame(position)
+  expected_boxes, expected_classes, expected_confidences = _detections(position)
+  assert frame_index == position * 2
+  assert timestamp == 1000.0 + position
+  np.testing.assert_array_equal(boxes, np.asarray(expected_boxes, dtype=np.float32).reshape(-1, 4))
+  np.testing.assert_array_equal(classes, expected_classes)
+  np.testing.assert_allclose(confidences, expected_confidences, rtol=1e-6)
+
+def test_round_trip_over_several_chunks(tmp_path):
+  path = str(tmp_path / "log.bjdet")
+  _record(path, 10, chunk_frames=4)
+
+  log = DetectionLog(path)
+  assert len(log) == 10
+  assert len(log.chunks) == 3
+  for position in range(10):
+    _check_frame(log, position)
+  assert [frame[0] for frame in log] == [i * 2 for i in range(10)]
+
+def test_chunks_are_views_of_the_file(tmp_path):
+  path = str(tmp_path / "log.bjdet")
+  _record(path, 600, chunk_frames=256)
+
+  log = DetectionLog(path)
+  assert len(log.chunks) == 3
+  for chunk in log.chunks:
+    for column in chunk.values():
+      assert np.shares_memory(column, log._data)
+
+def test_torn_tail_ends_the_log(tmp_path):
+  path = str(tmp_path / "log.bjdet")
+  _record(path, 10, chunk_frames=4)
+
+  with open(path, "r+b") as f:
+    f.truncate(os.path.getsize(path) - 3)
+
+  log = DetectionLog(path)
+  assert len(log) == 8
+  _check_frame(log, 7)
+
+def test_corrupt_chunk_ends_the_log(tmp_path):
+  path = str(tmp_path / "log.bjdet")
+  _record(path, 10, chunk_frames=4)
+
+  with open(path, "r+b") as f:
+    f.seek(-1, os.SEEK_END)
+    last = f.read(1)
+    f.seek(-1, os.SEEK_END)
+    f.write(bytes([last[0] ^ 0xFF]))
+
+  assert len(DetectionLog(path)) == 8
+
+def test_empty_log(tmp_path):
+  path = str(tmp_path / "log.bjdet")
+  _record(path, 0, chunk_frames=4)
+
+  log = DetectionLog(path)
+  assert len(log) == 0
+  assert list(log) == []
+  with pytest.raises(IndexError):
+    log.frame(0)
+
+def test_rejects_other_files(tmp_path):
+  path = tmp_path / "other.bin"
+  path.write_bytes(b"NOTALOG!" + bytes(8))
+  with pytest.raises(ValueError):
+    DetectionLog(str(path))
+
+  path.write_bytes(b"BJDETLOG" + (1).to_bytes(4, "little") + bytes(4))
+  with pytest.raises(ValueError):
+    DetectionLog(str(path))
@@ -0,0 +1,104 @@
+"""
+Tests for the binary message format of the EV service.
+"""
+
+import socket
+import struct
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from evaluation import ev_protocol
+
+def _settings(**flags):
+  settings = SimpleNamespace(blackjack_odds=1.5, **{name: False for name in ev_protocol.RULE_FLAGS})
+  for name, value in flags.items():
+    setattr(settings, name, value)
+  return settings
+
+def _payload(message):
+  (length,) = struct.unpack_from("<I", message)
+  assert length == len(message) - 4
+  return message[4:]
+
+def test_rules_round_trip():
+  rules = ev_protocol.encode_rules(_settings(can_surrender=True, double_split_aces=True))
+  decoded = _settings(dealer_hits_on_soft_17=True)
+  decoded.blackjack_odds = 1.2
+  ev_protocol.apply_rules(decoded, rules)
+
+  assert decoded.blackjack_odds == 1.5
+  assert decoded.can_surrender and decoded.double_split_aces
+  assert not decoded.dealer_hits_on_soft_17
+
+def test_ev_request_round_trip():
+  rules = ev_protocol.encode_rules(_settings(hit_split_aces=True))
+  deck = np.array([24, 23, 24, 22, 24, 24, 21, 24, 24, 90], dtype=np.int32)
+  message = ev_protocol.encode_ev_request(0xFFFFFFFF, rules, ["split", "stand"], deck, [0, 0], [9, 12])
+
+  request_id, op, decoded_rules, request = ev_protocol.decode_request(_payload(message))
+  assert (request_id, op, decoded_rules) == (0xFFFFFFFF, ev_protocol.OP_EV, rules)
+  actions, decoded_deck, player_hand, dealer_hand = request
+  assert actions == ["stand", "split"]  # Action order, not request order
+  np.testing.assert_array_equal(decoded_deck, deck)
+  assert (player_hand, dealer_hand) == ([0, 0], [9, 12])
+
+def test_stats_request_round_trip():
+  rules = ev_protocol.encode_rules(_settings())
+  message = ev_protocol.encode_stats_request(7, rules)
+  assert ev_protocol.decode_request(_payload(message)) == (7, ev_protocol.OP_STATS, rules, None)
+
+def test_unknown_action_is_rejected():
+  with pytest.raises(ValueError):
+    ev_protocol.encode_ev_request(1, (1.5, 0), ["surrender"], np.zeros(10), [0], [0])
+
+def test_malformed_request_is_rejected():
+  message = ev_protocol.encode_ev_request(1, (1.5, 0), ["hit"], np.full(10, 4), [1, 2], [3])
+  with pytest.raises(ValueError):
+    ev_protocol.decode_request(_payload(message)[:-4])
+
+def test_responses_round_trip():
+  evs = {"stand": -0.25, "double": float("-inf"), "hit": 0.125}
+  payload = _payload(ev_protocol.encode_ev_response(42, evs))
+  assert ev_protocol.response_id(payload) == 42
+  assert ev_protocol.decode_response(payload, ev_protocol.OP_EV) == (42, evs)
+
+  stats = {"entries": 3, "hit_rate": 0.5}
+  payload = _payload(ev_protocol.encode_stats_response(43, stats))
+  assert ev_protocol.decode_response(payload, ev_protocol.OP_STATS) == (43, stats)
+
+  payload = _payload(ev_protocol.encode_error_response(44, "engine failed"))
+  assert ev_protocol.response_id(payload) == 44
+  with pytest.raises(RuntimeError, match="engine failed"):
+    ev_protocol.decode_response(payload, ev_protocol.OP_EV)
+
+  with pytest.raises(ValueError):
+    ev_protocol.response_id(b"\x01")
+
+def test_read_message_framing():
+  client, server = socket.socketpair()
+  try:
+    first = ev_protocol.encode_ev_response(1, {"stand": 0.5})
+    second = ev_protocol.encode_stats_response(2, {})
+    client.sendall(first + second)
+    assert ev_protocol.read_message(server) == first[4:]
+    assert ev_protocol.read_message(server) == second[4:]
+
+    client.sendall(struct.pack("<I", ev_protocol.MAX_MESSAGE_BYTES + 1))
+    with pytest.raises(ConnectionError):
+      ev_protocol.read_message(server)
+
+    client.sendall(struct.pack("<I", 10) + b"abc")
+    client.shutdown(socket.SHUT_WR)
+    with pytest.raises(ConnectionError):
+      ev_protocol.read_message(server)
+  finally:
+    client.close()
+    server.close()
+
+def test_read_message_at_clean_close():
+  client, server = socket.socketpair()
+  client.close()
+  try:
+    assert ev_protocol.read_message(server) is None
+  finally:
+    server.close()
@@ -0,0 +1,59 @@
+"""
+Tests for the round-history store: appending, reopening and recovering from a partial chunk.
+"""
+
+import os
+import numpy as np
+from replay.round_history import NO_ACTION, RoundHistory, RoundHistoryWriter
+
+def _append_rows(writer, shoes):
+  for shoe in shoes:
+    writer.append(shoe=shoe, running_count=-shoe, ev=[0.1 * shoe, 0.0, np.nan, np.nan], recommended=0)
+
+def test_reopen_appends_after_committed_rows(tmp_path):
+  directory = str(tmp_path / "history")
+  writer = RoundHistoryWriter(directory, chunk_rows=4)
+  _append_rows(writer, range(6))
+  writer.close()
+
+  writer = RoundHistoryWriter(directory, chunk_rows=4)
+  assert writer.rows == 6
+  _append_rows(writer, range(6, 9))
+  writer.close()
+
+  history = RoundHistory(directory)
+  assert len(history) == 9
+  np.testing.assert_array_equal(history["shoe"], np.arange(9))
+  np.testing.assert_array_equal(history["running_count"], -np.arange(9))
+  assert np.isnan(history["ev"][:, 2]).all()
+
+def test_missing_columns_get_defaults(tmp_path):
+  directory = str(tmp_path / "history")
+  writer = RoundHistoryWriter(directory)
+  writer.append(shoe=3)
+  writer.close()
+
+  history = RoundHistory(directory)
+  assert history["recommended"][0] == NO_ACTION
+  assert np.isnan(history["true_count"][0])
+  assert history["hand"][0] == 0
+
+def test_partial_chunk_is_truncated_on_reopen(tmp_path):
+  directory = str(tmp_path / "history")
+  writer = RoundHistoryWriter(directory, chunk_rows=4)
+  _append_rows(writer, range(4))
+  writer.close()
+
+  # A crash in the middle of a chunk leaves bytes past the committed row count
+  shoe_path = os.path.join(directory, "shoe.bin")
+  committed = os.path.getsize(shoe_path)
+  with open(shoe_path, "ab") as f:
+    f.write(b"\xff" * 6)
+
+  writer = RoundHistoryWriter(directory, chunk_rows=4)
+  assert os.path.getsize(shoe_path) == committed
+  _append_rows(writer, [4])
+  writer.close()
+
+  history = RoundHistory(directory)
+  np.testing.assert_array_equal(history["shoe"], np.arange(5))
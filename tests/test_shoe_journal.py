@@ -0,0 +1,87 @@
+"""
+Tests for journaling a shoe and restoring it after a restart.
+"""
+
+import os
+import numpy as np
+from evaluation.card_codes import CARDS_PER_DECK, Card
+from evaluation.deck import CardDeck
+from replay.shoe_journal import EVENT_RESHUFFLE, ShoeJournal, read_journal
+
+def _journaled_deck(path, decks):
+  journal = ShoeJournal(path, decks)
+  deck = CardDeck(decks)
+  journal.restore(deck)
+  return deck, journal
+
+def _assert_same_shoe(deck, restored):
+  np.testing.assert_array_equal(restored.get_counts(), deck.get_counts())
+  assert restored.shoe == deck.shoe
+  assert restored.remaining == deck.remaining
+  assert restored.get_running_count() == deck.get_running_count()
+
+def test_restore_after_restart(tmp_path):
+  path = str(tmp_path / "shoe.journal")
+  deck, journal = _journaled_deck(path, 6)
+  for card in [Card.ACE, Card.KING, Card.FIVE, Card.SEVEN, Card.TWO]:
+    deck.remove_card(card)
+  deck.remove_cards(np.array([0, 1, 0, 0, 2, 0, 0, 0, 0, 3]))
+  deck.add_cards(np.array([0, 0, 0, 0, 1, 0, 0, 0, 0, 0]))
+  journal.close()
+
+  restored, journal = _journaled_deck(path, 6)
+  assert journal.recovered
+  _assert_same_shoe(deck, restored)
+  journal.close()
+
+def test_reshuffle_starts_a_new_shoe(tmp_path):
+  path = str(tmp_path / "shoe.journal")
+  deck, journal = _journaled_deck(path, 2)
+  deck.remove_card(Card.TEN)
+  deck.reset()
+  deck.remove_card(Card.SIX)
+  journal.close()
+
+  restored, journal = _journaled_deck(path, 2)
+  _assert_same_shoe(deck, restored)
+  assert restored.shoe == 1
+  journal.close()
+
+  _, records = read_journal(path)
+  assert int((records["event"] == EVENT_RESHUFFLE).sum()) == 1
+
+def test_bulk_counts_above_255_are_split(tmp_path):
+  path = str(tmp_path / "shoe.journal")
+  decks = 40  # 640 ten-valued cards
+  deck, journal = _journaled_deck(path, decks)
+  removed = np.zeros(len(CARDS_PER_DECK), dtype=np.int32)
+  removed[9] = 600
+  removed[0] = 100
+  deck.remove_cards(removed)
+  deck.add_cards(np.array([0] * 9 + [300]))
+  journal.close()
+
+  _, records = read_journal(path)
+  assert len(records) == 5  # 600 over three records, 300 over two
+  assert int(records["counts"][:, 9].astype(np.int64).sum()) == 900
+
+  restored, journal = _journaled_deck(path, decks)
+  _assert_same_shoe(deck, restored)
+  assert restored.get_counts()[9] == 640 - 600 + 300
+  journal.close()
+
+def test_torn_tail_is_truncated(tmp_path):
+  path = str(tmp_path / "shoe.journal")
+  deck, journal = _journaled_deck(path, 1)
+  deck.remove_card(Card.QUEEN)
+  deck.remove_card(Card.THREE)
+  journal.close()
+  size = os.path.getsize(path)
+
+  with open(path, "ab") as f:
+    f.write(b"\x07" * 17)  # Part of a record, as left by a crash mid-write
+
+  restored, journal = _journaled_deck(path, 1)
+  _assert_same_shoe(deck, restored)
+  journal.close()
+  assert os.path.getsize(path) == size